@@ -0,0 +1,76 @@
+# account_numbers.py
+
+import threading
+
+ACCOUNT_PREFIX = "SBI"
+SEQUENCE_DIGITS = 9
+ACCOUNT_SEQUENCE = "account_number"
+
+
+def luhn_check_digit(digits):
+    """Return the Luhn check digit for a string of digits."""
+    total = 0
+    for position, char in enumerate(reversed(digits)):
+        value = int(char)
+        if position % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return str((10 - total % 10) % 10)
+
+
+def luhn_valid(digits):
+    """True if the last digit of a non-empty digit string is its Luhn check digit."""
+    return len(digits) > 1 and luhn_check_digit(digits[:-1]) == digits[-1]
+
+
+def format_account_number(sequence_value):
+    digits = f"{sequence_value:0{SEQUENCE_DIGITS}d}"
+    return f"{ACCOUNT_PREFIX}{digits}{luhn_check_digit(digits)}"
+
+
+def is_valid_account_number(account_number):
+    """Check the prefix, length and check digit of an allocated account number."""
+    if not isinstance(account_number, str) or not account_number.startswith(ACCOUNT_PREFIX):
+        return False
+    digits = account_number[len(ACCOUNT_PREFIX):]
+    if len(digits) != SEQUENCE_DIGITS + 1 or not digits.isdigit():
+        return False
+    return luhn_valid(digits)
+
+
+class SequenceAllocator:
+    """
+    Hands out unique values of a named ledger sequence in O(1).
+
+    Each process reserves a block of values at a time, so gunicorn workers
+    only touch the shared counter once per block rather than once per value.
+    """
+
+    def __init__(self, store, sequence, block_size=1000):
+        self.store = store
+        self.sequence = sequence
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def next_value(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._next = self.store.reserve_block(self.sequence, self.block_size)
+                self._end = self._next + self.block_size
+            value = self._next
+            self._next += 1
+        return value
+
+
+class AccountNumberAllocator(SequenceAllocator):
+    """Account numbers drawn from the shared account_number sequence."""
+
+    def __init__(self, store, block_size=1000):
+        super().__init__(store, ACCOUNT_SEQUENCE, block_size)
+
+    def allocate(self):
+        return format_account_number(self.next_value())
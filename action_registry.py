@@ -0,0 +1,177 @@
+# action_registry.py
+
+import asyncio
+import inspect
+import time
+from contextvars import ContextVar
+
+from pydantic import ValidationError
+
+
+# Account the agent tools act on. The chatbot sets it from the request's
+# session around each model run; the model itself never gets to choose it.
+agent_account = ContextVar("agent_account", default=None)
+
+TOOL_LOGIN_REQUIRED = {"error": "Login required", "message": "Please log in to access account information."}
+
+
+class ActionError(Exception):
+    """Raised when a request names an unknown action or carries invalid params."""
+
+
+def action_succeeded(response):
+    """Banking tools signal failure with a ❌ message, an "error" key or a falsy result."""
+    if isinstance(response, str):
+        return not response.startswith("❌")
+    if isinstance(response, dict):
+        return "error" not in response
+    return bool(response)
+
+
+def _describe_validation_error(error):
+    problems = []
+    for issue in error.errors():
+        field = ".".join(str(part) for part in issue["loc"]) or "params"
+        problems.append(f"{field}: {issue['msg']}")
+    return "Invalid parameters - " + "; ".join(problems)
+
+
+class Action:
+    __slots__ = (
+        "name", "handler", "async_handler", "params_model", "description",
+        "menu_label", "requires_account", "agent_tool",
+    )
+
+    def __init__(self, name, handler, params_model, description, menu_label=None,
+                 requires_account=False, agent_tool=True, async_handler=None):
+        self.name = name
+        self.handler = handler
+        self.async_handler = async_handler
+        self.params_model = params_model
+        self.description = description
+        self.menu_label = menu_label
+        self.requires_account = requires_account
+        self.agent_tool = agent_tool
+
+
+class ActionRegistry:
+    """
+    Single table of banking actions shared by the REST API, the CLI and the
+    agent tool list.
+
+    Each action has a pydantic params model (its validator is built once, when
+    the model class is defined), so malformed requests are rejected before
+    the handler runs. Lookup is a dict access, and every run reports
+    (action name, elapsed seconds, succeeded) to the registered timing hooks.
+    """
+
+    def __init__(self):
+        self._actions = {}
+        self._hooks = []
+
+    def register(self, name, params_model, description, menu_label=None,
+                 requires_account=False, agent_tool=True, async_handler=None):
+        """Decorator registering `handler(**params)` as the implementation of `name`."""
+        def decorator(handler):
+            self._actions[name] = Action(
+                name, handler, params_model, description, menu_label,
+                requires_account, agent_tool, async_handler,
+            )
+            return handler
+        return decorator
+
+    def add_timing_hook(self, hook):
+        self._hooks.append(hook)
+
+    def get(self, name):
+        return self._actions.get(name)
+
+    def __contains__(self, name):
+        return name in self._actions
+
+    def __iter__(self):
+        return iter(self._actions.values())
+
+    def parse(self, name, raw_params):
+        """Look up an action and validate its params; raises ActionError."""
+        action = self._actions.get(name)
+        if action is None:
+            raise ActionError(f"Unknown action: {name}")
+        try:
+            params = action.params_model.model_validate(raw_params or {})
+        except ValidationError as e:
+            raise ActionError(_describe_validation_error(e)) from e
+        return action, params
+
+    def _report(self, action, started, ok):
+        elapsed = time.perf_counter() - started
+        for hook in self._hooks:
+            hook(action.name, elapsed, ok)
+
+    def run(self, action, params):
+        """Run an already validated action."""
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = action.handler(**dict(params))
+            ok = action_succeeded(response)
+            return response
+        finally:
+            self._report(action, started, ok)
+
+    async def run_async(self, action, params):
+        """Run an action from async code: its async handler if it has one, else in a worker thread."""
+        if action.async_handler is None:
+            return await asyncio.to_thread(self.run, action, params)
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = await action.async_handler(**dict(params))
+            ok = action_succeeded(response)
+            return response
+        finally:
+            self._report(action, started, ok)
+
+    def dispatch(self, name, raw_params):
+        action, params = self.parse(name, raw_params)
+        return self.run(action, params)
+
+    def agent_functions(self):
+        """Build one plain function per agent-facing action, typed from its params model."""
+        return [self._tool_function(action) for action in self if action.agent_tool]
+
+    def _tool_function(self, action):
+        """
+        Account actions lose their account_number argument: the tool acts on
+        agent_account (the session's account) or refuses without one.
+        """
+        registry = self
+
+        def tool(**kwargs):
+            if action.requires_account:
+                account_number = agent_account.get()
+                if account_number is None:
+                    return dict(TOOL_LOGIN_REQUIRED)
+                kwargs["account_number"] = account_number
+            try:
+                return registry.dispatch(action.name, kwargs)
+            except ActionError as e:
+                return {"error": "Invalid request", "message": str(e)}
+
+        fields = {
+            name: field for name, field in action.params_model.model_fields.items()
+            if not (action.requires_account and name == "account_number")
+        }
+        tool.__signature__ = inspect.Signature([
+            inspect.Parameter(
+                name,
+                inspect.Parameter.KEYWORD_ONLY,
+                default=inspect.Parameter.empty if field.is_required() else field.default,
+                annotation=field.annotation,
+            )
+            for name, field in fields.items()
+        ])
+        tool.__annotations__ = {name: field.annotation for name, field in fields.items()}
+        tool.__name__ = tool.__qualname__ = action.name
+        tool.__doc__ = action.description
+        return tool
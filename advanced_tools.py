@@ -3,6 +3,12 @@ import random
 from datetime import datetime, timedelta
 from typing import Dict, Any
 
+from fx_engine import exchange_rates_for
+from interest_engine import compute_interest, COMPOUNDING_MODES
+from action_registry import TOOL_LOGIN_REQUIRED, agent_account
+from appointments import schedule
+from banking_tools import appointment_book
+
 # Safe function_tool import with fallback
 try:
     from agents import function_tool
@@ -13,17 +19,16 @@ except ImportError:
         return func
 
 @function_tool
-def check_account_status(account_number: str) -> Dict[str, Any]:
+def check_account_status() -> Dict[str, Any]:
     """
     Check comprehensive account status including holds, restrictions, and alerts.
     """
+    # the chat session's account, never one the model names
+    account_number = agent_account.get()
+    if account_number is None:
+        return dict(TOOL_LOGIN_REQUIRED)
+
     try:
-        if not account_number or len(account_number.strip()) == 0:
-            return {
-                "error": "Invalid account number",
-                "message": "Please provide a valid account number."
-            }
-        
         statuses = ["Active", "Restricted", "On Hold", "Frozen", "Closed"]
         alerts = ["Low Balance", "Unusual Activity", "Payment Due", "Document Required"]
         
@@ -46,9 +51,10 @@ def check_account_status(account_number: str) -> Dict[str, Any]:
         }
 
 @function_tool
-def calculate_interest_earned(principal: float, rate: float, days: int) -> Dict[str, Any]:
+def calculate_interest_earned(principal: float, rate: float, days: int, compounding: str = "simple") -> Dict[str, Any]:
     """
     Calculate interest earned on savings accounts and deposits.
+    Compounding can be "simple", "daily" or "monthly".
     """
     try:
         # Input validation
@@ -70,14 +76,21 @@ def calculate_interest_earned(principal: float, rate: float, days: int) -> Dict[
                 "message": "Days must be between 1 and 3650 (10 years)."
             }
         
+        if compounding not in COMPOUNDING_MODES:
+            return {
+                "error": "Invalid compounding",
+                "message": f"Compounding must be one of: {', '.join(COMPOUNDING_MODES)}."
+            }
+        
         daily_rate = rate / 100 / 365
-        interest_earned = principal * daily_rate * days
+        interest_earned = float(compute_interest(principal, rate, days, compounding))
         final_balance = principal + interest_earned
         
         return {
             "principal_amount": principal,
             "interest_rate": rate,
             "calculation_period_days": days,
+            "compounding": compounding,
             "daily_interest_rate": round(daily_rate * 100, 6),
             "interest_earned": round(interest_earned, 2),
             "final_balance": round(final_balance, 2),
@@ -95,39 +108,14 @@ def calculate_interest_earned(principal: float, rate: float, days: int) -> Dict[
 def get_exchange_rates(base_currency: str = "USD") -> Dict[str, Any]:
     """
     Get current exchange rates for international transfers.
-    (Mock implementation - in production, this would connect to a real exchange rate API)
+    Rates come from the cached FX engine (see fx_engine.py).
     """
     try:
-        # Validate base currency
-        valid_currencies = ["USD", "EUR", "GBP", "CAD", "AUD", "JPY", "CHF", "CNY", "INR", "MXN"]
-        
-        if base_currency not in valid_currencies:
-            return {
-                "error": "Invalid base currency",
-                "message": f"Base currency must be one of: {', '.join(valid_currencies)}"
-            }
-        
-        # Mock exchange rates (in production, fetch from real API)
-        rates = {
-            "EUR": round(random.uniform(0.82, 0.88), 4),
-            "GBP": round(random.uniform(0.70, 0.76), 4),
-            "CAD": round(random.uniform(1.20, 1.30), 4),
-            "AUD": round(random.uniform(1.30, 1.40), 4),
-            "JPY": round(random.uniform(105.0, 115.0), 2),
-            "CHF": round(random.uniform(0.88, 0.96), 4),
-            "CNY": round(random.uniform(6.20, 6.70), 4),
-            "INR": round(random.uniform(72.0, 76.0), 2),
-            "MXN": round(random.uniform(18.0, 22.0), 2)
-        }
-        
-        # Remove base currency from rates if present
-        if base_currency in rates:
-            del rates[base_currency]
-        
+        result = exchange_rates_for(base_currency)
+        if "error" in result:
+            return result
         return {
-            "base_currency": base_currency,
-            "rates": rates,
-            "last_updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            **result,
             "rate_source": "SecureBank International Exchange Desk",
             "disclaimer": "Rates are indicative and subject to change. Contact us for real-time rates."
         }
@@ -143,6 +131,11 @@ def schedule_appointment(service_type: str, preferred_date: str, preferred_time:
     """
     Schedule an appointment with a banking specialist.
     """
+    # booked for the chat session's account, never one the model names
+    account_number = agent_account.get()
+    if account_number is None:
+        return dict(TOOL_LOGIN_REQUIRED)
+
     # Validate inputs
     if not service_type or len(service_type.strip()) == 0:
         return {
@@ -162,38 +155,13 @@ def schedule_appointment(service_type: str, preferred_date: str, preferred_time:
             "message": "Please provide your preferred appointment time."
         }
     
-    # Validate date format (basic validation)
-    try:
-        appointment_date = datetime.strptime(preferred_date, "%Y-%m-%d")
-    except ValueError:
-        return {
-            "error": "Invalid date format",
-            "message": "Please use YYYY-MM-DD format for the date."
-        }
-    if appointment_date < datetime.now():
-        return {
-            "error": "Invalid date",
-            "message": "Appointment date cannot be in the past."
-        }
-    
-    appointment_id = f"APT{random.randint(10000, 99999)}"
-    
-    specialists = {
-        "loan_service": "Senior Loan Officer",
-        "investment_service": "Investment Advisor", 
-        "account_service": "Account Manager",
-        "business_banking": "Business Banking Specialist",
-        "general": "Customer Service Representative"
-    }
-    
-    specialist = specialists.get(service_type.lower(), "Customer Service Representative")
+    # Validates the date/time and books the slot atomically (see appointments.py)
+    booking = schedule(appointment_book, account_number, service_type, preferred_date, preferred_time)
+    if "error" in booking:
+        return booking
     
     return {
-        "appointment_id": appointment_id,
-        "service_type": service_type,
-        "specialist": specialist,
-        "scheduled_date": preferred_date,
-        "scheduled_time": preferred_time,
+        **booking,
         "duration": "30 minutes",
         "location": "SecureBank International Main Branch",
         "preparation_required": "Please bring valid ID and relevant account documents",
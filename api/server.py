@@ -1,74 +1,199 @@
-from fastapi import FastAPI
-impor os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import json
+import os
+from typing import List
 from pydantic import BaseModel
 import logging
-from banking_tools import (
-    create_account,
-    validate_login,
-    get_account_balance,
-    transfer_funds,
-    get_transaction_history,
-    get_loan_information,
-    get_investment_advice,
-    schedule_appointment,
-)
-
-app = FastAPI()
-
-log_file = os.path.join("/tmp", "user_activity.log")
-logging.basicConfig(
-    filename=log_file,
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
-ChatRequest(BaseModel):
+from action_registry import ActionError, action_succeeded
+from banking_actions import registry
+from banking_tools import credential_service, ledger, iter_transaction_history
+from credentials import CredentialServiceBusy
+from session_store import sessions
+from statements import MEDIA_TYPES, export_statement, open_statement, pa
+from logging_setup import configure_logging
+from metrics import CONTENT_TYPE, MetricsMiddleware, metrics
+
+@asynccontextmanager
+async def lifespan(app):
+    yield
+    # stop the credential pool's processes with the app, so none outlive a gunicorn worker
+    credential_service.shutdown()
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware, app_name="api")
+
+configure_logging(os.path.join("/tmp", "user_activity.log"))
+class ChatRequest(BaseModel):
     action: str
     params: dict
 
+class BatchRequest(BaseModel):
+    actions: List[ChatRequest]
+    stop_on_error: bool = False
+
+BATCH_MAX_ITEMS = 10000
+# each hashes or verifies a password (~60 ms of scrypt), which must not run
+# while the batch holds the ledger's write lock; they go through /chat
+BATCH_EXCLUDED_ACTIONS = {"create_account", "login"}
+
+def start_session(account_number):
+    return {"message": f"Welcome back, {account_number}!", "token": sessions.create(account_number)}
+
 @app.get("/")
 def home():
     return {"message": "SecureBank International API is running."}
 
-@app.post("/chat")
-def chat_endpoint(data: ChatRequest):
-    action = data.action.lower()
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus text exposition of the process's metrics."""
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
+
+def prepare_action(action, raw_params):
+    """
+    Resolve the session and validate params for one request.
+    Raises ActionError before any work is done.
+    """
+    params = dict(raw_params)
+    spec = registry.get(action)
+    if spec is not None and spec.requires_account:
+        # account actions act on the session's account, never a caller-supplied one
+        account_number = sessions.resolve(params.pop("token", None))
+        if account_number is None:
+            raise ActionError("Invalid or expired session. Please log in again.")
+        params["account_number"] = account_number
+    return registry.parse(action, params)
+
+def finish_action(spec, params, response):
+    """Turn a handler result into (ok, response), issuing a session on login."""
+    if spec.name == "login":
+        if not response:
+            return False, "Invalid credentials."
+        return True, start_session(params.account_number)
+    return action_succeeded(response), response
 
-    if action == "create_account":
-        name = data.params.get("name")
-        password = data.params.get("password")
-        result = create_account(name, password)
-        return {"response": result}
+def logout(params):
+    if sessions.revoke(params.get("token")):
+        return True, "Logged out."
+    return False, "Invalid or expired session."
 
-    elif action == "login":
-        account_number = data.params.get("account_number")
-        password = data.params.get("password")
-        if validate_login(account_number, password):
-            return {"response": f"Welcome back, {account_number}!"}
-        return {"response": "Invalid credentials."}
+def run_action(action, raw_params):
+    """Execute one action synchronously and return (ok, response)."""
+    if action == "logout":
+        return logout(raw_params)
+    try:
+        spec, params = prepare_action(action, raw_params)
+    except ActionError as e:
+        return False, str(e)
+    return finish_action(spec, params, registry.run(spec, params))
+
+@app.post("/chat")
+async def chat_endpoint(data: ChatRequest):
+    action = data.action.lower()
+    if action == "logout":
+        return {"response": logout(data.params)[1]}
+    try:
+        spec, params = prepare_action(action, data.params)
+    except ActionError as e:
+        return JSONResponse(status_code=422, content={"response": str(e)})
+    try:
+        # login/create_account hash in the credential process pool; the rest run in a worker thread
+        _, response = finish_action(spec, params, await registry.run_async(spec, params))
+    except CredentialServiceBusy:
+        return JSONResponse(
+            status_code=503,
+            content={"response": "Service is busy. Please retry shortly."},
+            headers={"Retry-After": "1"},
+        )
+    return {"response": response}
 
-    elif action == "check_balance":
-        account_number = data.params.get("account_number")
-        return {"response": get_account_balance(account_number)}
+@app.post("/batch")
+def batch_endpoint(data: BatchRequest):
+    if len(data.actions) > BATCH_MAX_ITEMS:
+        return {"response": f"Batch too large (max {BATCH_MAX_ITEMS} actions).", "results": []}
 
-    elif action == "transfer_funds":
-        account_number = data.params.get("account_number")
-        to_account = data.params.get("to_account")
-        amount = float(data.params.get("amount", 0))
-        return {"response": transfer_funds(account_number, to_account, amount)}
+    # Validate the whole batch up front so nothing runs against a bad payload
+    prepared = []
+    for item in data.actions:
+        action = item.action.lower()
+        if action == "logout":
+            prepared.append((None, item.params, None))
+            continue
+        if action in BATCH_EXCLUDED_ACTIONS:
+            prepared.append((None, None, f"'{action}' can't run in a batch; use /chat."))
+            continue
+        try:
+            spec, params = prepare_action(action, item.params)
+            prepared.append((spec, params, None))
+        except ActionError as e:
+            prepared.append((None, None, str(e)))
 
-    elif action == "transaction_history":
-        account_number = data.params.get("account_number")
-        return {"response": get_transaction_history(account_number)}
+    if data.stop_on_error:
+        for index, (_, _, error) in enumerate(prepared):
+            if error:
+                return {
+                    "response": f"Batch rejected: action {index} is invalid ({error}).",
+                    "results": [],
+                }
 
-    elif action == "loan_info":
-        return {"response": get_loan_information()}
+    results = []
+    stopped = False
+    with ledger.batch():
+        for index, (spec, params, error) in enumerate(prepared):
+            if stopped:
+                results.append({"index": index, "ok": False, "response": "Skipped."})
+                continue
+            if error:
+                ok, response = False, error
+            elif spec is None:
+                ok, response = logout(params)
+            else:
+                ok, response = finish_action(spec, params, registry.run(spec, params))
+            results.append({"index": index, "ok": ok, "response": response})
+            if not ok and data.stop_on_error:
+                stopped = True
 
-    elif action == "investment_advice":
-        return {"response": get_investment_advice()}
+    succeeded = sum(1 for result in results if result["ok"])
+    logging.info("Batch processed: %d actions, %d succeeded", len(results), succeeded)
+    return {
+        "response": f"Processed {len(results)} actions, {succeeded} succeeded.",
+        "results": results,
+    }
 
-    elif action == "schedule_appointment":
-        return {"response": schedule_appointment()}
+@app.get("/transactions/stream")
+def stream_transactions(x_session_token: str = Header(...)):
+    """Stream the full history as NDJSON, newest first, one page fetched at a time."""
+    account_number = sessions.resolve(x_session_token)
+    if account_number is None:
+        return JSONResponse(status_code=401, content={"response": "Invalid or expired session."})
 
-    else:
-        return {"response": "Unknown action."}
+    def ndjson():
+        for tx in iter_transaction_history(account_number):
+            yield json.dumps(tx) + "\n"
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
+@app.get("/statements/export")
+def export_statement_endpoint(start_date: str, end_date: str, format: str = "csv",
+                              x_session_token: str = Header(...)):
+    """
+    Stream the session account's statement for two YYYY-MM-DD dates
+    (inclusive) as CSV, JSONL or Parquet, in constant memory.
+    """
+    account_number = sessions.resolve(x_session_token)
+    if account_number is None:
+        return JSONResponse(status_code=401, content={"response": "Invalid or expired session."})
+    if format not in MEDIA_TYPES or (format == "parquet" and pa is None):
+        return JSONResponse(status_code=422, content={"response": f"Unsupported statement format: {format}"})
+    statement = open_statement(account_number, start_date, end_date)
+    if isinstance(statement, dict):
+        return JSONResponse(status_code=422, content={"response": statement["message"]})
+    return StreamingResponse(
+        export_statement(statement, format),
+        media_type=MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{statement.filename(format)}"',
+            "X-Opening-Balance": f"{statement.opening_cents / 100:.2f}",
+            "X-Closing-Balance": f"{statement.closing_cents / 100:.2f}",
+        },
+    )
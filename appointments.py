@@ -0,0 +1,214 @@
+# appointments.py
+
+import itertools
+import threading
+from datetime import date, datetime, time, timedelta
+
+OPENING_HOUR = 9
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 16  # 09:00 to 16:30
+SLOT_TIMES = [
+    f"{OPENING_HOUR + (i * SLOT_MINUTES) // 60:02d}:{(i * SLOT_MINUTES) % 60:02d}"
+    for i in range(SLOTS_PER_DAY)
+]
+SLOT_INDEX = {slot_time: i for i, slot_time in enumerate(SLOT_TIMES)}
+SLOT_CLOCK = [time.fromisoformat(slot_time) for slot_time in SLOT_TIMES]
+FULL_DAY = (1 << SLOTS_PER_DAY) - 1
+
+SPECIALISTS = {
+    "loan_service": "Senior Loan Officer",
+    "investment_service": "Investment Advisor",
+    "account_service": "Account Manager",
+    "business_banking": "Business Banking Specialist",
+    "general": "Customer Service Representative",
+}
+
+
+def normalize_service(service_type):
+    service = (service_type or "").strip().lower()
+    return service if service in SPECIALISTS else "general"
+
+
+class AppointmentBook:
+    """
+    Specialist calendars as one bitmask of booked slots per (service, day).
+
+    Checking or taking a slot is a single bit test/set under the lock stripe
+    for that calendar day, so bookings on different days or specialists never
+    contend and a slot can only ever be taken once. Appointment IDs come from
+    `next_id` (a ledger SequenceAllocator in production), so they never repeat.
+    IDs are guessable, so every booking belongs to the account that made it
+    and only that account can cancel it.
+    """
+
+    def __init__(self, next_id=None, lock_stripes=64):
+        self._next_id = next_id or itertools.count(1).__next__
+        self._days = {}          # (service, date) -> bitmask of booked slots
+        self._appointments = {}  # appointment id -> (service, date, slot, account number)
+        self._locks = [threading.Lock() for _ in range(lock_stripes)]
+        self._index_lock = threading.Lock()
+
+    def _lock(self, key):
+        return self._locks[hash(key) % len(self._locks)]
+
+    def booked_mask(self, service, day):
+        return self._days.get((service, day), 0)
+
+    def book(self, service, day, slot, account_number):
+        """Take one slot for an account; returns the new appointment id, or None if it is already taken."""
+        key = (service, day)
+        bit = 1 << slot
+        with self._lock(key):
+            mask = self._days.get(key, 0)
+            if mask & bit:
+                return None
+            self._days[key] = mask | bit
+        appointment_id = f"APT{self._next_id():08d}"
+        with self._index_lock:
+            self._appointments[appointment_id] = (service, day, slot, account_number)
+        return appointment_id
+
+    def cancel(self, appointment_id, account_number):
+        """Free the slot if the appointment is the account's own; returns whether it did."""
+        with self._index_lock:
+            booking = self._appointments.get(appointment_id)
+            if booking is None or booking[3] != account_number:
+                return False
+            del self._appointments[appointment_id]
+        service, day, slot, _ = booking
+        key = (service, day)
+        with self._lock(key):
+            self._days[key] &= ~(1 << slot)
+        return True
+
+    def get(self, appointment_id):
+        return self._appointments.get(appointment_id)
+
+    def next_free_slots(self, service, start, count=5, max_days=60):
+        """Earliest `count` open (date, slot) pairs from `start` onwards, skipping weekends."""
+        found = []
+        now = datetime.now()
+        today = now.date()
+        for offset in range(max_days):
+            day = start + timedelta(days=offset)
+            if day.weekday() >= 5:
+                continue
+            free = FULL_DAY & ~self.booked_mask(service, day)
+            while free and len(found) < count:
+                slot = (free & -free).bit_length() - 1
+                free &= free - 1
+                if day > today or (day == today and SLOT_CLOCK[slot] > now.time()):
+                    found.append((day, slot))
+            if len(found) >= count:
+                break
+        return found
+
+
+class SharedAppointmentBook(AppointmentBook):
+    """
+    AppointmentBook kept in the SQLite ledger, so gunicorn workers share one
+    calendar: a slot is a unique (service, day, slot) row, so it can only
+    ever be taken once whichever worker books it.
+    """
+
+    def __init__(self, store, next_id):
+        super().__init__(next_id)
+        self.store = store
+
+    def booked_mask(self, service, day):
+        mask = 0
+        for slot in self.store.get_booked_slots(service, day.isoformat()):
+            mask |= 1 << slot
+        return mask
+
+    def book(self, service, day, slot, account_number):
+        appointment_id = f"APT{self._next_id():08d}"
+        if not self.store.add_appointment(appointment_id, service, day.isoformat(), slot, account_number):
+            return None
+        return appointment_id
+
+    def cancel(self, appointment_id, account_number):
+        return self.store.delete_appointment(appointment_id, account_number)
+
+    def get(self, appointment_id):
+        booking = self.store.get_appointment(appointment_id)
+        if booking is None:
+            return None
+        service, day, slot, account_number = booking
+        return service, date.fromisoformat(day), slot, account_number
+
+
+def parse_slot(preferred_date, preferred_time):
+    """Validate a requested date/time; returns (date, slot index) or an error dict."""
+    try:
+        day = datetime.strptime(preferred_date, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return {"error": "Invalid date format", "message": "Please use YYYY-MM-DD format for the date."}
+    if day < date.today():
+        return {"error": "Invalid date", "message": "Appointment date cannot be in the past."}
+    if day.weekday() >= 5:
+        return {"error": "Branch closed", "message": "Appointments are available Monday to Friday."}
+    slot = SLOT_INDEX.get((preferred_time or "").strip())
+    if slot is None:
+        return {
+            "error": "Invalid time",
+            "message": f"Please choose a half-hour slot between {SLOT_TIMES[0]} and {SLOT_TIMES[-1]}.",
+        }
+    now = datetime.now()
+    if day == now.date() and SLOT_CLOCK[slot] <= now.time():
+        return {"error": "Invalid time", "message": "That time has already passed today."}
+    return day, slot
+
+
+def schedule(book, account_number, service_type, preferred_date=None, preferred_time=None):
+    """
+    Book the requested slot for an account, or the next free one when no
+    date/time is given. Returns the appointment details or an error dict
+    with alternatives.
+    """
+    service = normalize_service(service_type)
+    if preferred_date or preferred_time:
+        parsed = parse_slot(preferred_date, preferred_time)
+        if isinstance(parsed, dict):
+            return parsed
+        day, slot = parsed
+        appointment_id = book.book(service, day, slot, account_number)
+        if appointment_id is None:
+            alternatives = book.next_free_slots(service, day, count=3)
+            return {
+                "error": "Slot unavailable",
+                "message": "That time is already booked. Please choose another slot.",
+                "next_available": [f"{d.isoformat()} {SLOT_TIMES[s]}" for d, s in alternatives],
+            }
+    else:
+        # keep trying the earliest open slot in case another request takes it first
+        while True:
+            candidates = book.next_free_slots(service, date.today(), count=1)
+            if not candidates:
+                return {"error": "Fully booked", "message": "No appointments are available in the next 60 days."}
+            day, slot = candidates[0]
+            appointment_id = book.book(service, day, slot, account_number)
+            if appointment_id is not None:
+                break
+
+    return {
+        "appointment_id": appointment_id,
+        "service_type": service,
+        "specialist": SPECIALISTS[service],
+        "scheduled_date": day.isoformat(),
+        "scheduled_time": SLOT_TIMES[slot],
+    }
+
+
+def available_slots(book, service_type, from_date=None, count=5):
+    service = normalize_service(service_type)
+    try:
+        start = datetime.strptime(from_date, "%Y-%m-%d").date() if from_date else date.today()
+    except ValueError:
+        return {"error": "Invalid date format", "message": "Please use YYYY-MM-DD format for the date."}
+    start = max(start, date.today())
+    return {
+        "service_type": service,
+        "specialist": SPECIALISTS[service],
+        "available_slots": [f"{d.isoformat()} {SLOT_TIMES[s]}" for d, s in book.next_free_slots(service, start, count)],
+    }
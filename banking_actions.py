@@ -0,0 +1,299 @@
+# banking_actions.py
+
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from action_registry import ActionRegistry
+from fx_engine import exchange_rates_for, convert_currency
+from interest_engine import interest_table
+from loan_engine import loan_schedule_page
+from metrics import record_action
+from statements import statement_summary
+from advanced_tools import (
+    check_account_status,
+    calculate_interest_earned,
+    get_exchange_rates,
+    schedule_appointment as schedule_specialist_appointment,
+)
+from banking_tools import (
+    HISTORY_PAGE_SIZE,
+    HISTORY_MAX_PAGE_SIZE,
+    create_account,
+    create_account_async,
+    validate_login,
+    validate_login_async,
+    get_account_balance,
+    transfer_funds,
+    get_transaction_page,
+    get_transaction_history,
+    get_transactions_between,
+    get_spending_summary,
+    get_loan_information,
+    get_investment_advice,
+    schedule_appointment,
+    cancel_appointment,
+    get_available_slots,
+)
+
+# Safe function_tool import with fallback
+try:
+    from agents import function_tool
+except ImportError:
+    def function_tool(func):
+        """Fallback decorator if agents library not available"""
+        func._is_tool = True
+        return func
+
+registry = ActionRegistry()
+# every action run is timed into the /metrics histograms
+registry.add_timing_hook(record_action)
+
+
+# Params models. Fields carrying a "prompt" are asked for by the CLI menu;
+# account_number is filled in from the session (API) or the login (CLI).
+
+class Params(BaseModel):
+    model_config = ConfigDict(extra="forbid", str_strip_whitespace=True)
+
+
+class CreateAccountParams(Params):
+    name: str = Field(min_length=1)
+    password: str = Field(min_length=1)
+
+
+class LoginParams(Params):
+    account_number: str = Field(min_length=1)
+    password: str = Field(min_length=1)
+
+
+class AccountParams(Params):
+    account_number: str = Field(min_length=1, description="Customer account number")
+
+
+class TransferParams(AccountParams):
+    to_account: str = Field(
+        min_length=1,
+        description="Recipient account number",
+        json_schema_extra={"prompt": "Enter the recipient's account number"},
+    )
+    amount: float = Field(
+        gt=0,
+        description="Amount to transfer in dollars",
+        json_schema_extra={"prompt": "Enter the amount to transfer"},
+    )
+
+
+class HistoryParams(AccountParams):
+    cursor: Optional[int] = Field(default=None, ge=0, description="next_cursor from the previous page")
+    limit: int = Field(default=HISTORY_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE)
+    format: Literal["text", "json"] = "text"
+
+
+class DateRangeParams(AccountParams):
+    start_date: str = Field(description="YYYY-MM-DD", json_schema_extra={"prompt": "Enter the start date (YYYY-MM-DD)"})
+    end_date: str = Field(description="YYYY-MM-DD", json_schema_extra={"prompt": "Enter the end date (YYYY-MM-DD)"})
+
+
+class DateRangePageParams(DateRangeParams):
+    cursor: Optional[int] = Field(default=None, ge=0, description="next_cursor from the previous page")
+    limit: int = Field(default=HISTORY_MAX_PAGE_SIZE, ge=1, le=HISTORY_MAX_PAGE_SIZE)
+
+
+class StatementParams(DateRangeParams):
+    format: Literal["csv", "jsonl", "parquet"] = Field(
+        default="csv", json_schema_extra={"prompt": "File format (csv, jsonl or parquet), blank for csv"},
+    )
+
+
+class SummaryParams(AccountParams):
+    period: Optional[str] = Field(
+        default=None,
+        description="YYYY-MM month or YYYY-MM-DD day; defaults to the current month",
+        json_schema_extra={"prompt": "Enter a month (YYYY-MM) or day (YYYY-MM-DD), blank for this month"},
+    )
+
+
+class ExchangeRatesParams(Params):
+    base_currency: str = Field(
+        default="USD", min_length=3, max_length=3,
+        json_schema_extra={"prompt": "Enter the base currency (e.g. USD), blank for USD"},
+    )
+
+
+class ConvertParams(Params):
+    amount: float = Field(gt=0, json_schema_extra={"prompt": "Enter the amount to convert"})
+    from_currency: str = Field(min_length=3, max_length=3, json_schema_extra={"prompt": "Convert from (e.g. USD)"})
+    to_currency: str = Field(min_length=3, max_length=3, json_schema_extra={"prompt": "Convert to (e.g. EUR)"})
+
+
+class InterestBatchParams(Params):
+    principals: List[float] = Field(min_length=1, max_length=100000)
+    rates: List[float] = Field(min_length=1, max_length=100000, description="Annual rates in percent")
+    days: List[int] = Field(min_length=1, max_length=100000)
+
+    @model_validator(mode="after")
+    def same_length(self):
+        if not len(self.principals) == len(self.rates) == len(self.days):
+            raise ValueError("principals, rates and days must have the same length")
+        return self
+
+
+class LoanScheduleParams(Params):
+    principal: float = Field(gt=0, le=1e9, json_schema_extra={"prompt": "Enter the loan amount"})
+    annual_rate: float = Field(ge=0, le=50, description="Annual rate in percent",
+                               json_schema_extra={"prompt": "Enter the annual interest rate (%)"})
+    term_months: int = Field(ge=1, le=600, json_schema_extra={"prompt": "Enter the term in months"})
+    extra_payment: float = Field(default=0.0, ge=0, description="Extra principal paid every month",
+                                 json_schema_extra={"prompt": "Extra monthly payment (blank for none)"})
+    page: int = Field(default=1, ge=1)
+    page_size: int = Field(default=12, ge=1, le=120)
+
+
+SERVICE_TYPE_PROMPT = "Service (loan_service, investment_service, account_service, business_banking, general)"
+
+
+class ScheduleParams(AccountParams):
+    service_type: str = Field(default="general", json_schema_extra={"prompt": SERVICE_TYPE_PROMPT})
+    preferred_date: Optional[str] = Field(
+        default=None, description="YYYY-MM-DD; omit for the next free slot",
+        json_schema_extra={"prompt": "Preferred date (YYYY-MM-DD), blank for the next free slot"},
+    )
+    preferred_time: Optional[str] = Field(
+        default=None, description="HH:MM on the half hour, 09:00-16:30",
+        json_schema_extra={"prompt": "Preferred time (HH:MM), blank for the next free slot"},
+    )
+
+
+class CancelAppointmentParams(AccountParams):
+    appointment_id: str = Field(min_length=1, json_schema_extra={"prompt": "Enter the appointment ID"})
+
+
+class SlotsParams(Params):
+    service_type: str = Field(default="general", json_schema_extra={"prompt": SERVICE_TYPE_PROMPT})
+    from_date: Optional[str] = Field(default=None, description="YYYY-MM-DD; defaults to today")
+    count: int = Field(default=5, ge=1, le=50)
+
+
+class NoParams(Params):
+    pass
+
+
+# Actions, in CLI menu order
+
+registry.register(
+    "create_account", CreateAccountParams, "Open a new account.",
+    agent_tool=False, async_handler=create_account_async,
+)(create_account)
+
+registry.register(
+    "login", LoginParams, "Check an account's credentials.",
+    agent_tool=False, async_handler=validate_login_async,
+)(validate_login)
+
+registry.register(
+    "check_balance", AccountParams, "Get the current balance of an account.",
+    menu_label="📊 Check Account Balance", requires_account=True,
+)(get_account_balance)
+
+@registry.register(
+    "transfer_funds", TransferParams, "Transfer money from the account to another account.",
+    menu_label="💸 Transfer Funds", requires_account=True,
+)
+def _transfer_funds(account_number, to_account, amount):
+    return transfer_funds(account_number, to_account, amount)
+
+@registry.register(
+    "transaction_history", HistoryParams,
+    "List recent transactions, newest first. Pass next_cursor back as cursor for older ones.",
+    menu_label="🧾 View Transaction History", requires_account=True,
+)
+def _transaction_history(account_number, cursor, limit, format):
+    if format == "json":
+        return get_transaction_page(account_number, cursor, limit)
+    return get_transaction_history(account_number, cursor, limit)
+
+registry.register(
+    "loan_info", NoParams, "Describe the available loan products and rates.",
+    menu_label="🏠 Loan Information",
+)(get_loan_information)
+
+registry.register(
+    "loan_schedule", LoanScheduleParams,
+    "Monthly payment, total interest and one page of the amortization schedule for a loan, "
+    "optionally with an extra monthly payment.",
+    menu_label="🧮 Loan Calculator",
+)(loan_schedule_page)
+
+registry.register(
+    "investment_advice", NoParams, "Give general investment guidance.",
+    menu_label="📈 Investment Advice",
+)(get_investment_advice)
+
+# agents book through advanced_tools.schedule_appointment instead
+registry.register(
+    "schedule_appointment", ScheduleParams,
+    "Book an appointment with a banking specialist, or the next free slot if no date/time is given.",
+    menu_label="📅 Schedule Appointment", requires_account=True, agent_tool=False,
+)(schedule_appointment)
+
+registry.register(
+    "available_slots", SlotsParams, "List the next open appointment slots for a service.",
+    menu_label="🗂️ Available Appointment Slots",
+)(get_available_slots)
+
+registry.register(
+    "cancel_appointment", CancelAppointmentParams, "Cancel one of the account's appointments by its ID.",
+    menu_label="🚫 Cancel Appointment", requires_account=True,
+)(cancel_appointment)
+
+registry.register(
+    "transactions_between", DateRangePageParams,
+    "List an account's transactions between two dates (YYYY-MM-DD, inclusive), oldest first. "
+    "Pass next_cursor back as cursor for the next page.",
+    menu_label="🗓️ Transactions by Date", requires_account=True,
+)(get_transactions_between)
+
+# the API streams the statement itself from /statements/export; the CLI writes it to a file
+registry.register(
+    "export_statement", StatementParams,
+    "Opening and closing balances for a statement between two dates (YYYY-MM-DD, inclusive).",
+    menu_label="📑 Export Statement", requires_account=True, agent_tool=False,
+)(statement_summary)
+
+registry.register(
+    "spending_summary", SummaryParams,
+    "Summarise money sent and received for a month (YYYY-MM) or day (YYYY-MM-DD).",
+    menu_label="📉 Spending Summary", requires_account=True,
+)(get_spending_summary)
+
+
+# agents use advanced_tools.get_exchange_rates, which adds the desk disclaimer
+registry.register(
+    "exchange_rates", ExchangeRatesParams, "Current exchange rates from a base currency.",
+    menu_label="💱 Exchange Rates", agent_tool=False,
+)(exchange_rates_for)
+
+registry.register(
+    "convert_currency", ConvertParams, "Convert an amount between two currencies at current rates.",
+    menu_label="🔁 Currency Converter",
+)(convert_currency)
+
+
+@registry.register(
+    "calculate_interest_batch", InterestBatchParams,
+    "Simple, daily- and monthly-compounded interest for many principal/rate/days triples at once.",
+    agent_tool=False,
+)
+def _calculate_interest_batch(principals, rates, days):
+    table = interest_table(principals, rates, days)
+    return {mode: [round(value, 2) for value in values.tolist()] for mode, values in table.items()}
+
+
+# Tool list handed to the specialized agents
+ALL_BANKING_TOOLS = [function_tool(func) for func in registry.agent_functions()] + [
+    check_account_status,
+    calculate_interest_earned,
+    get_exchange_rates,
+    schedule_specialist_appointment,
+]
@@ -1,10 +1,36 @@
 # banking_chatbot.py
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
+from typing import Optional
 from specialized_agents import create_specialized_agents
+from action_registry import ActionError, agent_account
+from banking_actions import registry
+from intent_router import IntentRouter
+from enhanced_guardrails import GuardrailViolation, OutputStreamGuard, guardrails, redact_output
+from credentials import CredentialServiceBusy
+from logging_setup import configure_logging
+from metrics import (
+    AGENT_TOOL_SECONDS, AGENT_TURN_SECONDS, CONTENT_TYPE, MetricsMiddleware, metrics, stats_family,
+)
+from model_client import ModelBusy, ModelError, get_model_client
+from response_cache import create_response_cache, is_cacheable
+from session_store import sessions
+from stub_model import stream_stub_answer
+import json
 import logging
+import time
+
+# Streaming agent runs (optional: the stub model answers without the agents SDK)
+try:
+    from agents import AgentsException, RunHooks, Runner
+    from openai import APIError
+    from openai.types.responses import ResponseTextDeltaEvent
+    STREAMING_AVAILABLE = True
+except ImportError:
+    STREAMING_AVAILABLE = False
 
 # Initialize app
 app = FastAPI(title="SecureBank Chatbot API")
@@ -17,37 +43,314 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware, app_name="chatbot")
 
 # Initialize logging
-logging.basicConfig(filename="chatbot.log", level=logging.INFO, format='%(asctime)s - %(message)s')
+configure_logging("chatbot.log")
 
 # Initialize agents
 agents = create_specialized_agents()
 
+# Repeated FAQ-style questions are answered from here instead of the model
+response_cache = create_response_cache()
+
+# Shared model gateway: caps concurrent model calls and coalesces duplicates
+model_client = get_model_client()
+
+# Local intent classifier: picks the agent, answers deterministic intents itself
+router = IntentRouter.load()
+
 # Request schema
 class ChatRequest(BaseModel):
     user_id: str
-    agent_type: str  # 'account', 'transfer', 'loan', 'investment'
+    agent_type: Optional[str] = None  # 'account', 'transfer', 'loan', 'investment'; omit to route automatically
     message: str
 
+class LoginRequest(BaseModel):
+    account_number: str
+    password: str
+
 # Response schema
 class ChatResponse(BaseModel):
     agent_name: str
     response: str
+    cached: bool = False
+    intent: Optional[str] = None
+
+BLOCKED_RESPONSE = "❌ I'm unable to share that response. Please contact a SecureBank advisor."
+LOGIN_REQUIRED = "🔐 Please log in (POST /login) to see your account details."
+MODEL_UNAVAILABLE = "The assistant is unavailable right now, please try again shortly."
+# seconds a client should wait before asking again when the model is busy or failing
+MODEL_RETRY_AFTER = "5"
+
+if STREAMING_AVAILABLE:
+    class ToolTimingHooks(RunHooks):
+        """Times each tool call of one agent run into the /metrics histograms."""
+
+        def __init__(self):
+            self._started = {}
+
+        async def on_tool_start(self, context, agent, tool):
+            self._started.setdefault(tool.name, []).append(time.perf_counter())
+
+        async def on_tool_end(self, context, agent, tool, result):
+            starts = self._started.get(tool.name)
+            if starts:
+                AGENT_TOOL_SECONDS.observe(time.perf_counter() - starts.pop(), tool.name)
+
+def chat_metrics():
+    cache = response_cache.stats()
+    model = model_client.stats()
+    return [
+        stats_family("securebank_chat_cache_lookups_total", "counter", "Chat response cache lookups by outcome.",
+                     "outcome", cache, ("hits", "disk_hits", "misses", "bypasses")),
+        ("securebank_chat_cache_entries", "gauge", "Answers held in the chat response cache.",
+         [({}, cache["entries"])]),
+        stats_family("securebank_model_calls_total", "counter", "Model gateway calls by outcome.", "outcome", model,
+                     ("requests", "upstream_calls", "coalesced", "retries", "rejected", "failures")),
+        ("securebank_model_in_flight", "gauge", "Model calls holding a slot.", [({}, model["in_flight"])]),
+        ("securebank_model_queue_depth", "gauge", "Model calls waiting for a slot.", [({}, model["queue_depth"])]),
+    ]
+
+metrics.add_collector(chat_metrics)
+
+async def route_request(request, account_number):
+    """
+    Pick the agent for a message and, for deterministic intents (balance,
+    history, loan rates), answer it straight from the banking tools for the
+    session's `account_number`. Returns (agent_type, intent, direct answer or None).
+    """
+    route = router.route(request.message)
+    agent_type = request.agent_type or route.agent_type
+    if route.action is None or route.agent_type != agent_type:
+        return agent_type, route.intent, None
+    action = registry.get(route.action)
+    params = {}
+    if action.requires_account:
+        # account data only for the session's own account
+        if account_number is None:
+            return agent_type, route.intent, LOGIN_REQUIRED
+        params["account_number"] = account_number
+    _, params = registry.parse(action.name, params)
+    return agent_type, route.intent, redact_output(str(await registry.run_async(action, params)))
+
+async def stream_response(agent, message, account_number=None):
+    """
+    Yield the agent's answer as text deltas as the model produces them.
+    Account tools act on `account_number` (the session's) and refuse without one.
+    Holds a model slot for the whole answer; raises ModelBusy if none is free
+    and ModelError if the model call fails after the gateway's retries.
+    """
+    async with model_client.slot():
+        if not STREAMING_AVAILABLE or getattr(agent, "model", None) is None:
+            async for delta in stream_stub_answer(message):
+                yield delta
+            return
+        # the run's task is created here and copies the current context, so its tools see the account
+        token = agent_account.set(account_number)
+        try:
+            result = Runner.run_streamed(agent, message, hooks=ToolTimingHooks())
+        finally:
+            agent_account.reset(token)
+        try:
+            async for event in result.stream_events():
+                if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+                    yield event.data.delta
+        except (APIError, AgentsException) as e:
+            raise ModelError(f"Model call failed: {type(e).__name__}: {e}") from e
+        finally:
+            # stops the upstream model call if the client went away mid-answer
+            result.cancel()
+
+def answer_account(agent_type, message, account_number):
+    # shared (cached or coalesced) answers are produced without any account, so they can't carry one
+    return None if is_cacheable(agent_type, message) else account_number
+
+async def generate_response(agent, agent_type, message, account_number=None):
+    async def run():
+        account = answer_account(agent_type, message, account_number)
+        return "".join([delta async for delta in stream_response(agent, message, account)])
+    # identical general questions asked at the same moment share one model call;
+    # answers about a customer's own data never do
+    if is_cacheable(agent_type, message):
+        return await model_client.coalesce(response_cache.key(agent_type, message), run)
+    return await run()
+
+def record_turn(started, agent_type, answered_by):
+    AGENT_TURN_SECONDS.observe(time.perf_counter() - started, agent_type, answered_by)
+
+def log_chat(request, agent_type, intent, answered_by):
+    # message text is not logged: it may contain account or personal details
+    logging.info(
+        "UserID: %s | Agent: %s | Intent: %s | Msg length: %d | Answered by: %s",
+        request.user_id, agent_type, intent, len(request.message), answered_by,
+    )
+
+@app.post("/login")
+async def login(request: LoginRequest):
+    """
+    Check an account's credentials and issue the session token that /chat and
+    /chat/stream read account data with (send it as X-Session-Token). Tokens
+    from the banking API's /chat login work too, as both share one session
+    store: in-process, or the ledger file with BANK_SHARED_STATE=1.
+    """
+    try:
+        action, params = registry.parse("login", request.model_dump())
+        # verified in the credential process pool, off the event loop
+        valid = await registry.run_async(action, params)
+    except ActionError as e:
+        return JSONResponse(status_code=422, content={"response": str(e)})
+    except CredentialServiceBusy:
+        return JSONResponse(
+            status_code=503,
+            content={"response": "Service is busy. Please retry shortly."},
+            headers={"Retry-After": "1"},
+        )
+    if not valid:
+        logging.warning("Chatbot login failed")
+        return JSONResponse(status_code=401, content={"response": "Invalid credentials."})
+    return {"response": f"Welcome back, {params.account_number}!", "token": sessions.create(params.account_number)}
+
+@app.post("/logout")
+def logout(x_session_token: Optional[str] = Header(None)):
+    if sessions.revoke(x_session_token):
+        return {"response": "Logged out."}
+    return JSONResponse(status_code=401, content={"response": "Invalid or expired session."})
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
-    agent = agents.get(request.agent_type)
+async def chat(request: ChatRequest, x_session_token: Optional[str] = Header(None)):
+    started = time.perf_counter()
+    account_number = sessions.resolve(x_session_token)
+    agent_type, intent, direct = await route_request(request, account_number)
+    agent = agents.get(agent_type)
+    if not agent:
+        return {"agent_name": "System", "response": "❌ Invalid service type."}
+
+    if direct is not None:
+        log_chat(request, agent_type, intent, "tools")
+        record_turn(started, agent_type, "tools")
+        return ChatResponse(agent_name=agent.name, response=direct, intent=intent)
+
+    cached = response_cache.get(agent_type, request.message)
+    if cached is not None:
+        log_chat(request, agent_type, intent, "cache")
+        record_turn(started, agent_type, "cache")
+        agent_name, response = cached
+        return ChatResponse(agent_name=agent_name, response=response, cached=True, intent=intent)
+
+    log_chat(request, agent_type, intent, "model")
+    try:
+        response = redact_output(await generate_response(agent, agent_type, request.message, account_number))
+    except ModelBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": MODEL_RETRY_AFTER})
+    except ModelError as e:
+        logging.error("Model call failed | Agent: %s | %s", agent_type, e)
+        raise HTTPException(status_code=503, detail=MODEL_UNAVAILABLE, headers={"Retry-After": MODEL_RETRY_AFTER})
+    except GuardrailViolation:
+        logging.warning("Guardrail blocked a response | Agent: %s", agent_type)
+        record_turn(started, agent_type, "model")
+        return ChatResponse(agent_name=agent.name, response=BLOCKED_RESPONSE, intent=intent)
+    record_turn(started, agent_type, "model")
+    response_cache.put(agent_type, request.message, agent.name, response)
+    return ChatResponse(agent_name=agent.name, response=response, intent=intent)
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def ndjson_event(event, data):
+    return json.dumps({"event": event, **data}) + "\n"
+
+async def relay_answer(http_request, request, agent, agent_type, intent, direct, encode, account_number=None):
+    """Relay guarded deltas to the client; cache the answer only if it completed cleanly."""
+    started = time.perf_counter()
+    yield encode("meta", {"agent_name": agent.name, "intent": intent})
+    if direct is not None:
+        log_chat(request, agent_type, intent, "tools")
+        record_turn(started, agent_type, "tools")
+        yield encode("delta", {"text": direct})
+        yield encode("done", {"cached": False})
+        return
+    cached = response_cache.get(agent_type, request.message)
+    if cached is not None:
+        log_chat(request, agent_type, intent, "cache")
+        record_turn(started, agent_type, "cache")
+        yield encode("delta", {"text": cached[1]})
+        yield encode("done", {"cached": True})
+        return
+    log_chat(request, agent_type, intent, "model")
+
+    guard = OutputStreamGuard()
+    parts = []
+    upstream = stream_response(agent, request.message, answer_account(agent_type, request.message, account_number))
+    try:
+        async for delta in upstream:
+            if await http_request.is_disconnected():
+                logging.info("Client disconnected mid-answer | Agent: %s", agent_type)
+                return
+            released = guard.feed(delta)
+            if released:
+                parts.append(released)
+                yield encode("delta", {"text": released})
+        released = guard.flush()
+    except GuardrailViolation:
+        logging.warning("Guardrail blocked a streamed response | Agent: %s", agent_type)
+        yield encode("error", {"message": BLOCKED_RESPONSE})
+        return
+    except ModelBusy as e:
+        yield encode("error", {"message": f"❌ {e}", "retry_after": int(MODEL_RETRY_AFTER)})
+        return
+    except ModelError as e:
+        logging.error("Model call failed mid-stream | Agent: %s | %s", agent_type, e)
+        yield encode("error", {"message": f"❌ {MODEL_UNAVAILABLE}", "retry_after": int(MODEL_RETRY_AFTER)})
+        return
+    finally:
+        await upstream.aclose()
+    if released:
+        parts.append(released)
+        yield encode("delta", {"text": released})
+    record_turn(started, agent_type, "model")
+    response_cache.put(agent_type, request.message, agent.name, "".join(parts))
+    yield encode("done", {"cached": False})
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request,
+                      x_session_token: Optional[str] = Header(None)):
+    """
+    Stream the answer as server-sent events (meta, delta..., done | error).
+    Clients sending `Accept: application/x-ndjson` get one JSON object per line instead.
+    """
+    account_number = sessions.resolve(x_session_token)
+    agent_type, intent, direct = await route_request(request, account_number)
+    agent = agents.get(agent_type)
     if not agent:
         return {"agent_name": "System", "response": "❌ Invalid service type."}
 
-    # For now, the response is mocked (replace with actual agent call)
-    mock_response = f"Thank you for your query: '{request.message}'. We are processing it."
+    if "application/x-ndjson" in http_request.headers.get("accept", ""):
+        encode, media_type = ndjson_event, "application/x-ndjson"
+    else:
+        encode, media_type = sse_event, "text/event-stream"
+    return StreamingResponse(
+        relay_answer(http_request, request, agent, agent_type, intent, direct, encode, account_number),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/chat/cache")
+def cache_stats():
+    return response_cache.stats()
+
+@app.get("/chat/model")
+def model_stats():
+    return model_client.stats()
 
-    # Log conversation
-    logging.info(f"UserID: {request.user_id} | Agent: {request.agent_type} | Msg: {request.message}")
+@app.get("/chat/guardrails")
+def guardrail_stats():
+    return guardrails.stats()
 
-    return ChatResponse(agent_name=agent.name, response=mock_response)
+@app.get("/metrics")
+def metrics_endpoint():
+    """Prometheus text exposition of the process's metrics."""
+    return Response(metrics.render(), media_type=CONTENT_TYPE)
 
 @app.get("/")
 def root():
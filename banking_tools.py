@@ -1,82 +1,259 @@
 # banking_tools.py
 
-import random
-import string
-from datetime import datetime
+import asyncio
+import os
+import time
+from datetime import datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
 
-# In-memory database substitute
-users_db = {}
-transactions_db = {}
+from account_numbers import AccountNumberAllocator, SequenceAllocator, is_valid_account_number
+from appointments import AppointmentBook, SharedAppointmentBook, schedule, available_slots
+from credentials import CredentialService, hash_password, verify_password
+from metrics import TOOL_SECONDS, metrics, stats_family, timed
+from ledger_store import (
+    create_store,
+    shared_state_enabled,
+    TX_TYPE_NAMES,
+    TRANSFER_OK,
+    SENDER_NOT_FOUND,
+    RECIPIENT_NOT_FOUND,
+    INSUFFICIENT_FUNDS,
+)
+from velocity_engine import HOLD, create_velocity_engine
+
+# Pluggable storage backend (SQLite by default, see ledger_store.create_store)
+ledger = create_store()
+account_numbers = AccountNumberAllocator(ledger)
+# CREDENTIAL_WORKERS sizes the hashing pool (gunicorn.conf.py splits the cores between workers)
+credential_service = CredentialService(max_workers=int(os.getenv("CREDENTIAL_WORKERS", "0")) or None)
+appointment_ids = SequenceAllocator(ledger, "appointment").next_value
+if shared_state_enabled():
+    appointment_book = SharedAppointmentBook(ledger, appointment_ids)
+else:
+    appointment_book = AppointmentBook(appointment_ids)
+# Sliding-window transfer limits (see velocity_engine.create_velocity_engine)
+velocity = create_velocity_engine(ledger)
+
+OPENING_BALANCE_CENTS = 500000
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 200
+
+TRANSFER_ERRORS = {
+    SENDER_NOT_FOUND: "❌ Sender account not found.",
+    RECIPIENT_NOT_FOUND: "❌ Recipient account not found.",
+    INSUFFICIENT_FUNDS: "❌ Insufficient funds.",
+}
+
+def to_cents(amount):
+    """Whole cents for a dollar amount, rounding half-cents up from its decimal form (10.555 -> 1056)."""
+    return int(Decimal(str(amount)).quantize(Decimal("0.01"), ROUND_HALF_UP) * 100)
+
+def format_timestamp(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
 
 def generate_account_number():
-    return "SBI" + ''.join(random.choices(string.digits, k=6))
+    return account_numbers.allocate()
 
-def create_account(name, password):
+def _open_account(name, password_hash):
     account_number = generate_account_number()
-    users_db[account_number] = {
-        "name": name,
-        "password": password,
-        "balance": 5000.0,
-        "created_at": datetime.now(),
-    }
-    transactions_db[account_number] = []
+    if not ledger.add_account(account_number, name, password_hash, OPENING_BALANCE_CENTS, time.time()):
+        return "❌ Account could not be created. Please try again."
     return f"✅ Account created successfully!\nAccount Number: {account_number}"
 
+@timed(TOOL_SECONDS)
+def create_account(name, password):
+    # the store's password field only ever holds the scrypt hash
+    return _open_account(name, hash_password(password))
+
+@timed(TOOL_SECONDS)
 def validate_login(account_number, password):
-    user = users_db.get(account_number)
-    if user and user["password"] == password:
+    if not is_valid_account_number(account_number):
+        return False  # a typo, not an account: skip the ledger lookup
+    user = ledger.get_account(account_number)
+    if user and verify_password(password, user["password"]):
         return True
     return False
 
+@timed(TOOL_SECONDS)
+async def create_account_async(name, password):
+    """
+    Like create_account, but hashes in the credential process pool and
+    writes the account from a worker thread: a ledger write can wait on a
+    /batch holding the write lock, and must not stall the event loop.
+    """
+    password_hash = await credential_service.hash_password(password)
+    return await asyncio.to_thread(_open_account, name, password_hash)
+
+@timed(TOOL_SECONDS)
+async def validate_login_async(account_number, password):
+    """Like validate_login, but reads the account from a worker thread and verifies in the credential pool."""
+    if not is_valid_account_number(account_number):
+        return False
+    user = await asyncio.to_thread(ledger.get_account, account_number)
+    if not user:
+        return False
+    return await credential_service.verify_password(password, user["password"])
+
+@timed(TOOL_SECONDS)
 def get_account_balance(account_number):
-    user = users_db.get(account_number)
+    user = ledger.get_account(account_number)
     if user:
-        return f"💰 Balance for {account_number}: ${user['balance']:.2f}"
+        return f"💰 Balance for {account_number}: ${user['balance_cents'] / 100:.2f}"
     return "❌ Account not found."
 
-def get_transaction_history(account_number):
-    txs = transactions_db.get(account_number, [])
-    if not txs:
+def render_transaction(tx):
+    return {
+        "id": tx["id"],
+        "type": TX_TYPE_NAMES[tx["type"]],
+        "amount": tx["amount_cents"] / 100,
+        "date": format_timestamp(tx["timestamp"]),
+    }
+
+@timed(TOOL_SECONDS)
+def get_transaction_page(account_number, cursor=None, limit=HISTORY_PAGE_SIZE):
+    """Return one page of transactions, newest first, plus the cursor for the next page."""
+    limit = max(1, min(int(limit), HISTORY_MAX_PAGE_SIZE))
+    before = int(cursor) if cursor is not None else None
+    txs, next_cursor = ledger.get_transaction_page(account_number, before=before, limit=limit)
+    return {
+        "account_number": account_number,
+        "transactions": [render_transaction(t) for t in txs],
+        "next_cursor": next_cursor,
+    }
+
+def iter_transaction_history(account_number, page_size=HISTORY_MAX_PAGE_SIZE):
+    """Yield every transaction, newest first, fetching one page at a time."""
+    cursor = None
+    while True:
+        page = get_transaction_page(account_number, cursor=cursor, limit=page_size)
+        yield from page["transactions"]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return
+
+def format_transaction_page(page):
+    if not page["transactions"]:
         return "📭 No transactions found."
-    history = "\n".join([f"{t['type']} ${t['amount']:.2f} on {t['date']}" for t in txs])
+    history = "\n".join([
+        f"{t['type']} ${t['amount']:.2f} on {t['date']}" for t in page["transactions"]
+    ])
+    if page["next_cursor"] is not None:
+        history += f"\n… older transactions available (cursor: {page['next_cursor']})"
     return f"📄 Transaction History:\n{history}"
 
-def transfer_funds(from_acc, to_acc, amount):
-    sender = users_db.get(from_acc)
-    receiver = users_db.get(to_acc)
-
-    if not sender:
-        return "❌ Sender account not found."
-    if not receiver:
-        return "❌ Recipient account not found."
-    if sender["balance"] < amount:
-        return "❌ Insufficient funds."
-
-    sender["balance"] -= amount
-    receiver["balance"] += amount
-
-    tx = {
-        "type": "Sent",
-        "amount": amount,
-        "date": datetime.now().strftime("%Y-%m-%d %H:%M")
+@timed(TOOL_SECONDS)
+def get_transaction_history(account_number, cursor=None, limit=HISTORY_PAGE_SIZE):
+    return format_transaction_page(get_transaction_page(account_number, cursor, limit))
+
+@timed(TOOL_SECONDS)
+def get_transactions_between(account_number, start_date, end_date, cursor=None, limit=HISTORY_MAX_PAGE_SIZE):
+    """
+    Return one page of transactions between two YYYY-MM-DD dates (inclusive),
+    oldest first, plus the cursor for the next page.
+    """
+    limit = max(1, min(int(limit), HISTORY_MAX_PAGE_SIZE))
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+    except (TypeError, ValueError):
+        return {"error": "Invalid date format", "message": "Please use YYYY-MM-DD format for dates."}
+    after = int(cursor) if cursor is not None else None
+    txs, next_cursor = ledger.get_transactions_between(
+        account_number, start.timestamp(), end.timestamp(), after=after, limit=limit
+    )
+    return {
+        "account_number": account_number,
+        "start_date": start_date,
+        "end_date": end_date,
+        "transactions": [render_transaction(t) for t in txs],
+        "next_cursor": next_cursor,
     }
-    transactions_db[from_acc].append(tx)
 
-    tx_receiver = {
-        "type": "Received",
-        "amount": amount,
-        "date": datetime.now().strftime("%Y-%m-%d %H:%M")
+@timed(TOOL_SECONDS)
+def get_spending_summary(account_number, period=None):
+    """Return sent/received totals for a YYYY-MM month or YYYY-MM-DD day (default: this month)."""
+    period = period or datetime.now().strftime("%Y-%m")
+    fmt = "%Y-%m-%d" if period.count("-") == 2 else "%Y-%m"
+    try:
+        period = datetime.strptime(period, fmt).strftime(fmt)
+    except (TypeError, ValueError):
+        return {"error": "Invalid period", "message": "Please use YYYY-MM for a month or YYYY-MM-DD for a day."}
+    totals = ledger.get_period_totals(account_number, period)
+    return {
+        "account_number": account_number,
+        "period": period,
+        "total_sent": totals["sent_cents"] / 100,
+        "total_received": totals["received_cents"] / 100,
+        "net_change": (totals["received_cents"] - totals["sent_cents"]) / 100,
+        "sent_count": totals["sent_count"],
+        "received_count": totals["received_count"],
     }
-    transactions_db[to_acc].append(tx_receiver)
 
-    return f"✅ ${amount:.2f} transferred from {from_acc} to {to_acc}."
+@timed(TOOL_SECONDS)
+def transfer_funds(from_acc, to_acc, amount):
+    # checked after rounding: 0.001 would otherwise move 0 cents
+    amount_cents = to_cents(amount)
+    if amount_cents <= 0:
+        return "❌ Transfer amount must be at least $0.01."
+    if not is_valid_account_number(to_acc):
+        return "❌ Invalid recipient account number."
+    now = time.time()
+    decision, status = velocity.screen(
+        from_acc, to_acc, amount_cents, now,
+        lambda: ledger.transfer(from_acc, to_acc, amount_cents, now),
+    )
+    if decision.action == HOLD:
+        return f"❌ Transfer held for review ({decision.reason}). Our team will contact you."
+    if status is None:
+        return f"❌ Transfer declined ({decision.reason})."
+    if status != TRANSFER_OK:
+        return TRANSFER_ERRORS[status]
+    return f"✅ ${amount_cents / 100:.2f} transferred from {from_acc} to {to_acc}."
+
+def _velocity_metrics():
+    stats = velocity.stats()
+    if "decisions" not in stats:
+        return []  # velocity checks are turned off
+    return [
+        stats_family("securebank_velocity_decisions_total", "counter",
+                     "Transfers screened by the velocity check, by decision.", "decision", stats["decisions"]),
+        ("securebank_velocity_pending_holds", "gauge", "Held transfers awaiting review.",
+         [({}, stats["pending_holds"])]),
+        ("securebank_velocity_tracked_accounts", "gauge", "Senders tracked by the velocity check.",
+         [({}, stats["tracked_accounts"])]),
+    ]
+
+metrics.add_collector(_velocity_metrics)
 
 # Placeholder functions for next phase
+@timed(TOOL_SECONDS)
 def get_loan_information():
     return "📄 Loan options: Home Loan (5%), Car Loan (7%), Personal Loan (10%)"
 
+@timed(TOOL_SECONDS)
 def get_investment_advice():
     return "📊 Consider diversifying into mutual funds, ETFs, and fixed deposits."
 
-def schedule_appointment():
-    return "📅 Appointment scheduled with banking advisor."
+# Appointments (slot-indexed book, see appointments.py)
+@timed(TOOL_SECONDS)
+def schedule_appointment(account_number, service_type="general", preferred_date=None, preferred_time=None):
+    result = schedule(appointment_book, account_number, service_type, preferred_date, preferred_time)
+    if "error" in result:
+        alternatives = result.get("next_available")
+        hint = f" Next available: {', '.join(alternatives)}." if alternatives else ""
+        return f"❌ {result['message']}{hint}"
+    return (
+        f"📅 Appointment {result['appointment_id']} scheduled with our {result['specialist']} "
+        f"on {result['scheduled_date']} at {result['scheduled_time']}."
+    )
+
+@timed(TOOL_SECONDS)
+def cancel_appointment(account_number, appointment_id):
+    # someone else's booking is reported exactly like a missing one
+    if appointment_book.cancel(appointment_id, account_number):
+        return f"✅ Appointment {appointment_id} cancelled."
+    return "❌ Appointment not found."
+
+@timed(TOOL_SECONDS)
+def get_available_slots(service_type="general", from_date=None, count=5):
+    return available_slots(appointment_book, service_type, from_date, count)
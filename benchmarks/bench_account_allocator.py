@@ -0,0 +1,60 @@
+# benchmarks/bench_account_allocator.py
+"""
+Registrations per second with a growing number of existing accounts.
+
+    python -m benchmarks.bench_account_allocator --existing 100000 1000000 10000000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from account_numbers import AccountNumberAllocator
+from ledger_store import MemoryLedgerStore, SQLiteLedgerStore
+
+MEASURED_REGISTRATIONS = 10000
+
+
+def build_store(backend, directory):
+    if backend == "memory":
+        return MemoryLedgerStore()
+    return SQLiteLedgerStore(os.path.join(directory, "accounts.db"))
+
+
+def register(store, allocator, count, now):
+    created = 0
+    for _ in range(count):
+        if store.add_account(allocator.allocate(), "Bench User", "secret", 0, now):
+            created += 1
+    return created
+
+
+def run(backend, existing):
+    with tempfile.TemporaryDirectory() as directory:
+        store = build_store(backend, directory)
+        allocator = AccountNumberAllocator(store)
+        now = time.time()
+        chunk = 50000
+        for start in range(0, existing, chunk):
+            with store.batch():
+                register(store, allocator, min(chunk, existing - start), now)
+
+        started = time.perf_counter()
+        created = register(store, allocator, MEASURED_REGISTRATIONS, now)
+        elapsed = time.perf_counter() - started
+        assert created == MEASURED_REGISTRATIONS, "account number collision"
+        print(f"{backend:<7} existing={existing:>11,} {created / elapsed:>10,.0f} registrations/sec")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--existing", type=int, nargs="+", default=[100000])
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite"])
+    args = parser.parse_args()
+    for existing in args.existing:
+        for backend in args.backends:
+            run(backend, existing)
+
+
+if __name__ == "__main__":
+    main()
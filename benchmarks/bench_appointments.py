@@ -0,0 +1,78 @@
+# benchmarks/bench_appointments.py
+"""
+Concurrent booking stress test: thousands of parallel requests fight over a
+small set of slots, first in the in-process book and then in the shared
+SQLite one. Fails if any slot is booked twice or an ID repeats.
+
+    python -m benchmarks.bench_appointments --requests 5000 --threads 64
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+from account_numbers import SequenceAllocator
+from appointments import SLOTS_PER_DAY, AppointmentBook, SharedAppointmentBook
+from ledger_store import SQLiteLedgerStore
+
+
+def next_weekday(start):
+    while start.weekday() >= 5:
+        start += timedelta(days=1)
+    return start
+
+
+def run(name, book, targets, threads):
+    successes = []
+    successes_lock = threading.Lock()
+
+    def attempt(target):
+        appointment_id = book.book(*target, "SBI0000000001")
+        if appointment_id is not None:
+            with successes_lock:
+                successes.append((appointment_id, target))
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(attempt, targets))
+    elapsed = time.perf_counter() - started
+
+    booked_slots = [target for _, target in successes]
+    ids = [appointment_id for appointment_id, _ in successes]
+    assert len(set(booked_slots)) == len(booked_slots), "slot booked twice"
+    assert len(set(ids)) == len(ids), "duplicate appointment id"
+    assert len(booked_slots) == len(set(targets)), "a free slot was refused"
+    print(
+        f"{name}: {len(targets):,} requests on {len(set(targets))} distinct slots: "
+        f"{len(successes)} booked, no double bookings, {len(targets) / elapsed:,.0f} requests/sec"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--days", type=int, default=3)
+    args = parser.parse_args()
+
+    first = next_weekday(date.today() + timedelta(days=1))
+    days = [first + timedelta(days=i) for i in range(args.days)]
+    services = ["loan_service", "general"]
+    targets = [
+        (random.choice(services), random.choice(days), random.randrange(SLOTS_PER_DAY))
+        for _ in range(args.requests)
+    ]
+
+    run("memory", AppointmentBook(), targets, args.threads)
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteLedgerStore(os.path.join(directory, "appointments.db"))
+        book = SharedAppointmentBook(store, SequenceAllocator(store, "appointment").next_value)
+        run("sqlite", book, targets, args.threads)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/bench_batch.py
+"""
+Compare transfer throughput of one /chat call per transfer against /batch.
+
+    python -m benchmarks.bench_batch --transfers 5000
+"""
+import argparse
+import re
+import time
+
+from fastapi.testclient import TestClient
+
+from api.server import app
+from banking_tools import velocity
+
+
+def open_accounts(client, count):
+    """Register and log in `count` accounts; returns (account numbers, session tokens)."""
+    numbers, tokens = [], []
+    for i in range(count):
+        response = client.post(
+            "/chat",
+            json={"action": "create_account", "params": {"name": f"Bench {i}", "password": "secret"}},
+        ).json()["response"]
+        number = re.search(r"SBI\d+", response).group(0)
+        login = client.post(
+            "/chat",
+            json={"action": "login", "params": {"account_number": number, "password": "secret"}},
+        ).json()["response"]
+        numbers.append(number)
+        tokens.append(login["token"])
+        # these accounts pay out thousands of transfers a minute, like a payroll sender
+        velocity.add_bulk_sender(number)
+    return numbers, tokens
+
+
+def transfer_items(numbers, tokens, count):
+    return [
+        {
+            "action": "transfer_funds",
+            "params": {
+                "token": tokens[i % len(numbers)],
+                "to_account": numbers[(i + 1) % len(numbers)],
+                "amount": 0.01,
+            },
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transfers", type=int, default=5000)
+    parser.add_argument("--accounts", type=int, default=50)
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    numbers, tokens = open_accounts(client, args.accounts)
+    items = transfer_items(numbers, tokens, args.transfers)
+
+    started = time.perf_counter()
+    for item in items:
+        client.post("/chat", json=item)
+    single = args.transfers / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    result = client.post("/batch", json={"actions": items}).json()
+    batched = args.transfers / (time.perf_counter() - started)
+
+    print(result["response"])
+    print(f"/chat  {single:>10,.0f} transfers/sec")
+    print(f"/batch {batched:>10,.0f} transfers/sec  ({batched / single:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
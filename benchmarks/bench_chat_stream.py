@@ -0,0 +1,103 @@
+# benchmarks/bench_chat_stream.py
+"""
+Time to first byte of the chatbot's buffered /chat versus streamed
+/chat/stream, served by uvicorn against the stub model generating one word
+every --token-ms milliseconds. Also checks that a client hanging up
+mid-answer stops the upstream generation.
+
+    python -m benchmarks.bench_chat_stream --requests 20 --token-ms 40
+"""
+import argparse
+import os
+import socket
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def timed_request(client, path, message, headers=None):
+    """Return seconds to the first body byte, to the first answer text, and to the end of the body."""
+    payload = {"user_id": "bench", "agent_type": "transfer", "message": message}
+    started = time.perf_counter()
+    first_byte = first_text = None
+    with client.stream("POST", path, json=payload, headers=headers) as response:
+        for chunk in response.iter_raw():
+            now = time.perf_counter() - started
+            if first_byte is None and chunk:
+                first_byte = now
+            # buffered responses carry the text in their only chunk
+            if first_text is None and (b"delta" in chunk or path == "/chat"):
+                first_text = now
+    return first_byte, first_text, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--token-ms", type=float, default=40)
+    args = parser.parse_args()
+
+    os.environ["STUB_MODEL_TOKEN_MS"] = str(args.token_ms)
+    import banking_chatbot
+    import stub_model
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(banking_chatbot.app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+
+    base = f"http://127.0.0.1:{port}"
+    with httpx.Client(base_url=base, timeout=60) as client:
+        for label, path, headers in [
+            ("/chat (buffered)", "/chat", None),
+            ("/chat/stream SSE", "/chat/stream", None),
+            ("/chat/stream NDJSON", "/chat/stream", {"Accept": "application/x-ndjson"}),
+        ]:
+            # transfer questions are never cached, so every request reaches the model
+            timings = [
+                timed_request(client, path, f"how do I send money abroad, question {i}", headers)
+                for i in range(args.requests)
+            ]
+            ttfb, first_text, total = (statistics.median(column) * 1000 for column in zip(*timings))
+            print(
+                f"{label:<22} TTFB p50 {ttfb:7.1f} ms   first text p50 {first_text:7.1f} ms   "
+                f"full answer p50 {total:7.1f} ms"
+            )
+
+        # hang up after the first delta; the stub must stop producing words
+        produced = []
+        message = " ".join(["how do I send money abroad"] * 20)
+
+        async def counting_stream(message, token_delay=None):
+            async for word in stub_model.stream_stub_answer(message, token_delay):
+                produced.append(word)
+                yield word
+
+        banking_chatbot.stream_stub_answer = counting_stream
+        payload = {"user_id": "bench", "agent_type": "transfer", "message": message}
+        with client.stream("POST", "/chat/stream", json=payload) as response:
+            for line in response.iter_lines():
+                if line.startswith("event: delta"):
+                    break
+        time.sleep(args.token_ms / 1000 * 5)
+        seen = len(produced)
+        time.sleep(args.token_ms / 1000 * 5)
+        total_words = len(stub_model.stub_answer(message).split(" "))
+        stopped = len(produced) == seen < total_words
+        print(f"disconnect: upstream stopped after {len(produced)} of {total_words} words ({'ok' if stopped else 'NOT CANCELLED'})")
+
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+# benchmarks/bench_dispatch.py
+"""
+Per-request overhead of registry dispatch (lookup + params validation +
+timing hooks) compared with calling the tool function directly.
+
+    python -m benchmarks.bench_dispatch --calls 200000
+"""
+import argparse
+import time
+
+from banking_actions import registry
+from banking_tools import get_loan_information, get_spending_summary
+
+
+def per_call(func, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=100000)
+    args = parser.parse_args()
+
+    registry.add_timing_hook(lambda name, elapsed, ok: None)
+    cases = [
+        ("loan_info", lambda: get_loan_information(), lambda: registry.dispatch("loan_info", {})),
+        (
+            "spending_summary",
+            lambda: get_spending_summary("SBI0000000018", "2026-01"),
+            lambda: registry.dispatch("spending_summary", {"account_number": "SBI0000000018", "period": "2026-01"}),
+        ),
+    ]
+    for name, direct, dispatched in cases:
+        direct_us = per_call(direct, args.calls)
+        dispatched_us = per_call(dispatched, args.calls)
+        print(
+            f"{name:<18} direct={direct_us:6.2f}us  dispatch={dispatched_us:6.2f}us  "
+            f"overhead={dispatched_us - direct_us:5.2f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# benchmarks/bench_fx.py
+"""
+FX engine lookups: single pair rates from the cached cross-rate matrix and
+bulk conversion of many amounts at once.
+
+    python -m benchmarks.bench_fx --amounts 1000000
+"""
+import argparse
+import random
+import time
+
+import numpy as np
+
+from fx_engine import fx
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--lookups", type=int, default=200000)
+    parser.add_argument("--amounts", type=int, default=1000000)
+    args = parser.parse_args()
+
+    snap = fx.snapshot()
+    pairs = [(random.choice(snap.currencies), random.choice(snap.currencies)) for _ in range(args.lookups)]
+
+    started = time.perf_counter()
+    for base, quote in pairs:
+        fx.snapshot().rate(base, quote)
+    elapsed = time.perf_counter() - started
+    print(f"pair lookup:        {elapsed / args.lookups * 1e6:.2f}us/lookup")
+
+    amounts = np.random.uniform(1, 10000, args.amounts)
+    started = time.perf_counter()
+    snap.convert(amounts, "USD", "EUR")
+    elapsed = time.perf_counter() - started
+    print(f"bulk convert (1 pair): {args.amounts / elapsed:,.0f} amounts/sec")
+
+    bases = [random.choice(snap.currencies) for _ in range(args.amounts)]
+    quotes = [random.choice(snap.currencies) for _ in range(args.amounts)]
+    started = time.perf_counter()
+    snap.convert_many(amounts, bases, quotes)
+    elapsed = time.perf_counter() - started
+    print(f"bulk convert (mixed pairs): {args.amounts / elapsed:,.0f} amounts/sec")
+
+
+if __name__ == "__main__":
+    main()
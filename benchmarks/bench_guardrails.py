@@ -0,0 +1,97 @@
+# benchmarks/bench_guardrails.py
+"""
+Output guardrail cost in microseconds per KB, for complete answers and for
+answers streamed in small deltas, against the previous approach of one
+regex pass per rule.
+
+    python -m benchmarks.bench_guardrails --kb 1 16 256
+"""
+import argparse
+import random
+import re
+import time
+
+from enhanced_guardrails import GuardrailEngine, OutputStreamGuard
+
+WORDS = (
+    "your loan application has been reviewed and the monthly payment depends on the term "
+    "and rate we recommend a diversified portfolio of index funds for long term savings"
+).split()
+PII = ["SBI0000000017", "4111 1111 1111 1111", "123-45-6789", "5500-0000-0000-0004"]
+
+# the previous implementation: one regex per rule, each a full pass
+LEGACY_RULES = [
+    re.compile(r"\bSBI\d{10}\b"),
+    re.compile(r"\b\d{3}-\d{2}-\d{4}\b"),
+    re.compile(r"\b(?:\d[ -]?){12,18}\d\b"),
+]
+LEGACY_PHRASES = [re.compile(rf"\b{re.escape(phrase)}\b", re.IGNORECASE) for phrase in (
+    "guaranteed return", "guaranteed profit", "risk-free return", "risk free return",
+    "risk-free investment", "risk free investment", "cannot lose money", "can't lose money",
+    "double your money", "insider tip", "your password is", "your pin is",
+)]
+
+
+def legacy_check(text):
+    blocked = any(phrase.search(text) for phrase in LEGACY_PHRASES)
+    for rule in LEGACY_RULES:
+        text = rule.sub("****", text)
+    return text, blocked
+
+
+def make_text(kb):
+    words = []
+    size = 0
+    while size < kb * 1024:
+        word = random.choice(PII) if random.random() < 0.01 else random.choice(WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return " ".join(words)
+
+
+def per_kb(seconds, kb):
+    return seconds * 1e6 / kb
+
+
+def timed(func, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--kb", type=int, nargs="+", default=[1, 16, 256])
+    parser.add_argument("--delta-chars", type=int, default=20, help="size of each streamed delta")
+    args = parser.parse_args()
+
+    engine = GuardrailEngine(budget_us=1e9)  # no budget warnings while benchmarking
+    print(f"{'size':>7}  {'one pass':>12}  {'per rule':>12}  {'streamed':>12}   (us per KB)")
+    for kb in args.kb:
+        text = make_text(kb)
+        repeat = max(3, 2000 // kb)
+        one_pass = timed(lambda: engine.check(text), repeat)
+        legacy = timed(lambda: legacy_check(text), repeat)
+
+        deltas = [text[i:i + args.delta_chars] for i in range(0, len(text), args.delta_chars)]
+
+        def stream():
+            guard = OutputStreamGuard(engine)
+            for delta in deltas:
+                guard.feed(delta)
+            guard.flush()
+
+        streamed = timed(stream, max(1, repeat // 10))
+        print(
+            f"{kb:>5}KB  {per_kb(one_pass, kb):>12.1f}  {per_kb(legacy, kb):>12.1f}  "
+            f"{per_kb(streamed, kb):>12.1f}"
+        )
+
+    sample = make_text(1)
+    guard_result = engine.check(sample)
+    assert "SBI0000000017" not in guard_result.text and "4111 1111 1111 1111" not in guard_result.text
+
+
+if __name__ == "__main__":
+    main()
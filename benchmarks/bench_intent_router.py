@@ -0,0 +1,62 @@
+# benchmarks/bench_intent_router.py
+"""
+Routing accuracy and classification latency of the intent router on the
+held-out labelled set in benchmarks/intent_eval.jsonl.
+
+    python -m benchmarks.bench_intent_router
+"""
+import argparse
+import os
+import statistics
+import time
+from collections import Counter
+
+from intent_router import INTENTS, IntentRouter, load_examples
+
+DEFAULT_EVAL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_eval.jsonl")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--data", default=DEFAULT_EVAL_FILE)
+    parser.add_argument("--model", default=None)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    router = IntentRouter.load(args.model)
+    examples = load_examples(args.data)
+    routes = [router.route(text) for text, _ in examples]
+
+    correct = Counter()
+    totals = Counter()
+    agent_correct = direct = direct_wrong = 0
+    for (text, intent), route in zip(examples, routes):
+        totals[intent] += 1
+        correct[intent] += route.intent == intent
+        agent_correct += route.agent_type == INTENTS[intent][0]
+        if route.action:
+            direct += 1
+            direct_wrong += route.intent != intent
+    print(f"intent accuracy {sum(correct.values()) / len(examples):.1%}, "
+          f"agent accuracy {agent_correct / len(examples):.1%} on {len(examples)} examples")
+    for intent in INTENTS:
+        if totals[intent]:
+            print(f"  {intent:<12} {correct[intent]:>3}/{totals[intent]}")
+    print(f"answered directly {direct} ({direct / len(examples):.0%}), wrong direct answers {direct_wrong}")
+    print(f"rule hits {sum(route.source == 'rule' for route in routes)}, model {sum(route.source == 'model' for route in routes)}")
+
+    timings = []
+    for _ in range(args.repeat):
+        for text, _ in examples:
+            started = time.perf_counter()
+            router.route(text)
+            timings.append(time.perf_counter() - started)
+    timings.sort()
+    print(
+        f"route latency p50 {statistics.median(timings) * 1e6:.1f} us, "
+        f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.1f} us, max {timings[-1] * 1e6:.1f} us"
+    )
+
+
+if __name__ == "__main__":
+    main()
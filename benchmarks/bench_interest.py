@@ -0,0 +1,44 @@
+# benchmarks/bench_interest.py
+"""
+Vectorized interest maths and the nightly accrual job.
+
+    python -m benchmarks.bench_interest --accounts 10000000 --workers 4
+"""
+import argparse
+import time
+
+import numpy as np
+
+from interest_engine import COMPOUNDING_MODES, compute_interest, run_nightly_accrual
+from ledger_store import MemoryLedgerStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--accounts", type=int, default=1000000)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    principals = np.random.uniform(100, 100000, args.accounts)
+    rates = np.random.uniform(0.5, 6.0, args.accounts)
+    days = np.random.randint(1, 3650, args.accounts)
+    for mode in COMPOUNDING_MODES:
+        started = time.perf_counter()
+        compute_interest(principals, rates, days, mode)
+        elapsed = time.perf_counter() - started
+        print(f"compute {mode:<8} {args.accounts / elapsed:>14,.0f} accounts/sec")
+
+    store = MemoryLedgerStore()
+    now = time.time()
+    with store.batch():
+        for i in range(args.accounts):
+            store.add_account(f"SBI{i:010d}", "Bench", "x", int(principals[i] * 100), now)
+
+    started = time.perf_counter()
+    credited, total = run_nightly_accrual(store, 2.5, workers=args.workers, shard_size=max(1, args.accounts // 8))
+    elapsed = time.perf_counter() - started
+    print(f"nightly accrual: {credited:,} accounts credited ${total / 100:,.2f} in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/bench_ledger.py
+"""
+Compare ledger backends (ops/sec) at different ledger sizes.
+
+    python -m benchmarks.bench_ledger --sizes 10000 1000000 10000000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from ledger_store import MemoryLedgerStore, SQLiteLedgerStore
+
+ACCOUNTS = 1000
+SAMPLE_OPS = 5000
+
+
+def build_store(backend, directory):
+    if backend == "memory":
+        return MemoryLedgerStore()
+    return SQLiteLedgerStore(os.path.join(directory, "bench.db"))
+
+
+def populate(store, transactions):
+    accounts = [f"SBI{i:06d}" for i in range(ACCOUNTS)]
+    now = time.time()
+    with store.batch():
+        for acc in accounts:
+            store.add_account(acc, "Bench User", "secret", 10 ** 12, now)
+    # every transfer writes two transaction rows
+    transfers = transactions // 2
+    chunk = 10000
+    for start in range(0, transfers, chunk):
+        with store.batch():
+            for _ in range(min(chunk, transfers - start)):
+                a, b = random.sample(accounts, 2)
+                store.transfer(a, b, 100, now)
+    return accounts
+
+
+def measure(label, func, ops):
+    started = time.perf_counter()
+    for _ in range(ops):
+        func()
+    elapsed = time.perf_counter() - started
+    print(f"  {label:<22} {ops / elapsed:>12,.0f} ops/sec")
+
+
+def run(backend, size):
+    with tempfile.TemporaryDirectory() as directory:
+        store = build_store(backend, directory)
+        started = time.perf_counter()
+        accounts = populate(store, size)
+        print(f"{backend} @ {size:,} transactions (populated in {time.perf_counter() - started:.1f}s)")
+
+        def transfer():
+            a, b = random.sample(accounts, 2)
+            store.transfer(a, b, 1, time.time())
+
+        measure("transfer", transfer, SAMPLE_OPS)
+        measure("balance lookup", lambda: store.get_account(random.choice(accounts)), SAMPLE_OPS)
+        measure("history read", lambda: store.get_transactions(random.choice(accounts)), 200)
+        measure("history first page", lambda: store.get_transaction_page(random.choice(accounts)), SAMPLE_OPS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000])
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite"])
+    args = parser.parse_args()
+    for size in args.sizes:
+        for backend in args.backends:
+            run(backend, size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+# benchmarks/bench_loan.py
+"""
+Loan schedule latency: first computation versus memoized lookups.
+
+    python -m benchmarks.bench_loan
+"""
+import argparse
+import time
+
+from loan_engine import get_schedule, loan_schedule_page
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=10000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    for i in range(1000):
+        get_schedule(300000.0 + i, 6.5, 360, 0.0)
+    cold = (time.perf_counter() - started) / 1000 * 1e6
+    print(f"30-year schedule, uncached:   {cold:8.1f}us")
+
+    started = time.perf_counter()
+    for _ in range(args.calls):
+        get_schedule(300000.0, 6.5, 360, 0.0)
+    print(f"30-year schedule, cached:     {(time.perf_counter() - started) / args.calls * 1e6:8.2f}us")
+
+    started = time.perf_counter()
+    for _ in range(args.calls):
+        loan_schedule_page(300000, 6.5, 360, page=15)
+    print(f"cached summary + 12-row page: {(time.perf_counter() - started) / args.calls * 1e6:8.1f}us")
+
+
+if __name__ == "__main__":
+    main()
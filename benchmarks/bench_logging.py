@@ -0,0 +1,61 @@
+# benchmarks/bench_logging.py
+"""
+Per-request latency with logging off, with a synchronous FileHandler, and with
+the queue-based pipeline from logging_setup.
+
+    python -m benchmarks.bench_logging --requests 100000
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+
+import logging_setup
+
+
+def fake_request(logger, i):
+    # roughly what an API action does besides logging
+    payload = {"action": "check_balance", "params": {"token": "x" * 32}}
+    logger.info("%s viewed account balance (%s)", f"SBI{i:010d}", payload["action"])
+
+
+def measure(label, logger, requests):
+    latencies = []
+    for i in range(requests):
+        started = time.perf_counter()
+        fake_request(logger, i)
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    mean = sum(latencies) / len(latencies) * 1e6
+    p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+    print(f"{label:<22} mean={mean:6.2f}us  p99={p99:7.2f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        off = logging.getLogger("bench.off")
+        off.propagate = False
+        off.setLevel(logging.CRITICAL)
+        measure("logging off", off, args.requests)
+
+        sync = logging.getLogger("bench.sync")
+        sync.propagate = False
+        sync.setLevel(logging.INFO)
+        handler = logging.FileHandler(os.path.join(directory, "sync.log"))
+        handler.setFormatter(logging.Formatter(logging_setup.TEXT_FORMAT))
+        sync.addHandler(handler)
+        measure("sync FileHandler", sync, args.requests)
+        handler.close()
+
+        logging_setup.configure_logging(os.path.join(directory, "queued.log"))
+        measure("queue pipeline (text)", logging.getLogger("bench.queued"), args.requests)
+        logging_setup.shutdown_logging()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# benchmarks/bench_login.py
+"""
+Login throughput and p99 latency through the credential process pool.
+
+    python -m benchmarks.bench_login --workers 1 2 4 8 --logins 400
+"""
+import argparse
+import asyncio
+import time
+
+from credentials import CredentialService, CredentialServiceBusy, hash_password
+
+
+async def run(workers, logins, concurrency):
+    service = CredentialService(max_workers=workers, max_pending=concurrency)
+    stored = hash_password("correct horse battery staple")
+    await service.verify_password("warm up", stored)  # start the worker processes
+
+    latencies = []
+    rejected = 0
+    queue = asyncio.Queue()
+    for _ in range(logins):
+        queue.put_nowait(None)
+
+    async def client():
+        nonlocal rejected
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                assert await service.verify_password("correct horse battery staple", stored)
+            except CredentialServiceBusy:
+                rejected += 1
+                continue
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    service.shutdown()
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    print(
+        f"workers={workers:<3} {len(latencies) / elapsed:>8,.1f} logins/sec  "
+        f"p50={p50:.1f}ms p99={p99:.1f}ms rejected={rejected}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    args = parser.parse_args()
+    for workers in args.workers:
+        asyncio.run(run(workers, args.logins, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
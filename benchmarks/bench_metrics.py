@@ -0,0 +1,81 @@
+# benchmarks/bench_metrics.py
+"""
+Hot-path cost of the /metrics instrumentation: one histogram observation,
+one counter increment, the registry timing hook and the banking_tools timing
+decorator, single-threaded and from several threads at once, plus the cost of
+rendering a scrape.
+
+    python -m benchmarks.bench_metrics --calls 200000 --threads 8
+"""
+import argparse
+import threading
+import time
+
+from banking_tools import get_loan_information
+from metrics import Metrics, record_action
+
+
+def per_call(func, calls):
+    started = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def threaded(func, calls, threads):
+    """Calls per second with `threads` threads each making `calls` calls."""
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for _ in range(calls):
+            func()
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for worker_thread in workers:
+        worker_thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for worker_thread in workers:
+        worker_thread.join()
+    return calls * threads / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=200000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    registry = Metrics()
+    histogram = registry.histogram("bench_seconds", "bench", ("action",))
+    counter = registry.counter("bench_total", "bench", ("action",))
+    undecorated = get_loan_information.__wrapped__
+
+    cases = [
+        ("histogram.observe", lambda: histogram.observe(0.0042, "check_balance")),
+        ("counter.inc", lambda: counter.inc("check_balance")),
+        ("registry timing hook", lambda: record_action("check_balance", 0.0042, True)),
+        ("timed tool (overhead)", get_loan_information),
+    ]
+    baseline = per_call(undecorated, args.calls)
+    for name, func in cases:
+        cost = per_call(func, args.calls)
+        if func is get_loan_information:
+            cost -= baseline
+        rate = threaded(func, args.calls // args.threads, args.threads)
+        print(f"{name:<24} {cost:6.3f} us/call   {args.threads} threads: {rate:12,.0f} calls/s")
+
+    counts = histogram._merged()[("check_balance",)]
+    expected = args.calls + args.calls // args.threads * args.threads
+    print(f"observations recorded: {sum(counts[:-1])} of {expected} (none lost across threads)")
+
+    for i in range(200):
+        histogram.observe(0.001, f"action_{i}")
+    started = time.perf_counter()
+    text = registry.render()
+    print(f"render: {(time.perf_counter() - started) * 1000:.2f} ms for {text.count(chr(10))} lines")
+
+
+if __name__ == "__main__":
+    main()
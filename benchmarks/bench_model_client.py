@@ -0,0 +1,132 @@
+# benchmarks/bench_model_client.py
+"""
+Traffic spike against the local stub model server (stub_model.py): a naive
+unpooled, unbounded client versus the shared ModelClient with its
+concurrency cap, jittered retries and coalescing of identical calls.
+
+    python -m benchmarks.bench_model_client --requests 1000 --distinct 100 --failure-rate 0.1
+"""
+import argparse
+import asyncio
+import random
+import socket
+import statistics
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from model_client import ModelClient, ModelError
+from stub_model import stub_app, stub_settings, stub_stats
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def reset_stub_stats():
+    stub_stats.update(requests=0, failures=0, in_flight=0, peak_in_flight=0)
+
+
+async def naive_spike(base_url, prompts):
+    """What the app did before: a fresh client per call, no cap, no retry."""
+    async def call(prompt):
+        async with httpx.AsyncClient(timeout=60) as client:
+            response = await client.post(
+                f"{base_url}/chat/completions",
+                json={"model": "stub", "messages": [{"role": "user", "content": prompt}]},
+            )
+            return response.status_code == 200
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(call(prompt) for prompt in prompts))
+    return sum(results), time.perf_counter() - started
+
+
+async def complete(client, prompt):
+    """One answer the way the chatbot asks for one: in a model slot, on the gateway's client, duplicates shared."""
+    async def call():
+        async with client.slot():
+            try:
+                response = await client.http.post(
+                    f"{client.base_url}/chat/completions",
+                    json={"model": "stub", "messages": [{"role": "user", "content": prompt}]},
+                )
+            except httpx.TransportError as e:
+                raise ModelError(f"Model call failed: {type(e).__name__}: {e}") from e
+        if response.status_code >= 400:
+            raise ModelError(f"Model call failed: HTTP {response.status_code}")
+        return response.json()["choices"][0]["message"]["content"]
+    return await client.coalesce(prompt, call)
+
+
+async def pooled_spike(client, prompts):
+    latencies = []
+
+    async def call(prompt):
+        started = time.perf_counter()
+        try:
+            await complete(client, prompt)
+        except ModelError:
+            return False
+        latencies.append(time.perf_counter() - started)
+        return True
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(call(prompt) for prompt in prompts))
+    elapsed = time.perf_counter() - started
+    await client.aclose()
+    return sum(results), elapsed, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--distinct", type=int, default=100, help="distinct prompts in the spike")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--failure-rate", type=float, default=0.1, help="share of stub answers that are 429s")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    stub_settings.update(latency=args.latency_ms / 1000, failure_rate=args.failure_rate)
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(stub_app, port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    base_url = f"http://127.0.0.1:{port}/v1"
+    prompts = [f"question {random.randrange(args.distinct)}" for _ in range(args.requests)]
+
+    reset_stub_stats()
+    ok, elapsed = asyncio.run(naive_spike(base_url, prompts))
+    print(
+        f"naive:  {ok:,}/{len(prompts):,} ok in {elapsed:.2f}s, upstream requests {stub_stats['requests']:,}, "
+        f"peak upstream concurrency {stub_stats['peak_in_flight']}"
+    )
+
+    reset_stub_stats()
+    client = ModelClient(base_url, max_concurrency=args.concurrency, max_queue=args.requests,
+                         backoff_base=0.05)
+    ok, elapsed, latencies = asyncio.run(pooled_spike(client, prompts))
+    stats = client.stats()
+    print(
+        f"pooled: {ok:,}/{len(prompts):,} ok in {elapsed:.2f}s, upstream requests {stub_stats['requests']:,}, "
+        f"peak upstream concurrency {stub_stats['peak_in_flight']} (cap {args.concurrency})"
+    )
+    print(
+        f"        coalesced {stats['coalesced']:,}, retries {stats['retries']:,}, failures {stats['failures']:,}, "
+        f"peak queue depth {stats['peak_queue_depth']:,}"
+    )
+    print(
+        f"        caller p50 {statistics.median(latencies) * 1000:.1f} ms, "
+        f"upstream p50/p95/p99 {stats['upstream_latency_ms']['p50']}/{stats['upstream_latency_ms']['p95']}/"
+        f"{stats['upstream_latency_ms']['p99']} ms, queue wait p95 {stats['queue_wait_ms_p95']} ms"
+    )
+    server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
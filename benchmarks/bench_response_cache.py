@@ -0,0 +1,110 @@
+# benchmarks/bench_response_cache.py
+"""
+Chatbot latency with and without the response cache, against a stub model
+with a fixed round-trip time. Traffic is Zipf-distributed over a pool of FAQ
+questions (with varied casing/punctuation) mixed with account questions that
+must bypass the cache.
+
+    python -m benchmarks.bench_response_cache --requests 2000 --model-ms 400
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from response_cache import ResponseCache
+
+FAQ_TOPICS = [
+    ("loan", "what are your home loan rates"),
+    ("loan", "how do I apply for a car loan"),
+    ("loan", "what documents are needed for a personal loan"),
+    ("loan", "can I repay a loan early"),
+    ("investment", "what is an ETF"),
+    ("investment", "should I invest in mutual funds"),
+    ("investment", "what are fixed deposits"),
+    ("investment", "how risky are index funds"),
+]
+ACCOUNT_QUESTIONS = [
+    ("account", "what is my balance"),
+    ("transfer", "transfer 50 to SBI0000000017"),
+    ("loan", "when is my loan payment due"),
+]
+
+
+def variants(message):
+    return [message, message.capitalize() + "?", f"  {message.upper()}!! ", message + "."]
+
+
+def build_traffic(count, account_share):
+    weights = [1 / rank for rank in range(1, len(FAQ_TOPICS) + 1)]
+    traffic = []
+    for _ in range(count):
+        if random.random() < account_share:
+            traffic.append(random.choice(ACCOUNT_QUESTIONS))
+        else:
+            agent_type, message = random.choices(FAQ_TOPICS, weights)[0]
+            traffic.append((agent_type, random.choice(variants(message))))
+    return traffic
+
+
+async def serve(traffic, cache, model_seconds, concurrency):
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def handle(agent_type, message):
+        async with semaphore:
+            started = time.perf_counter()
+            cached = cache.get(agent_type, message) if cache is not None else None
+            if cached is None:
+                await asyncio.sleep(model_seconds)  # stub model round trip
+                if cache is not None:
+                    cache.put(agent_type, message, "Specialist", f"answer to {message}")
+            latencies.append(time.perf_counter() - started)
+
+    await asyncio.gather(*(handle(*request) for request in traffic))
+    return latencies
+
+
+def report(label, latencies, model_calls):
+    latencies = sorted(latencies)
+    p50 = statistics.median(latencies) * 1000
+    p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+    print(f"{label:<14} p50 {p50:8.2f} ms   p95 {p95:8.2f} ms   model calls {model_calls:,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--model-ms", type=float, default=400)
+    parser.add_argument("--account-share", type=float, default=0.2)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    traffic = build_traffic(args.requests, args.account_share)
+    model_seconds = args.model_ms / 1000
+
+    latencies = asyncio.run(serve(traffic, None, model_seconds, args.concurrency))
+    report("no cache", latencies, len(traffic))
+
+    cache = ResponseCache()
+    latencies = asyncio.run(serve(traffic, cache, model_seconds, args.concurrency))
+    stats = cache.stats()
+    report("memory", latencies, stats["misses"] + stats["bypasses"])
+    print(f"               hit rate {stats['hit_rate']:.1%}, {stats['bypasses']:,} account questions bypassed")
+
+    # a fresh process with the same disk tier answers repeat questions straight away
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "chat_cache.db")
+        asyncio.run(serve(traffic, ResponseCache(disk_path=path), model_seconds, args.concurrency))
+        restarted = ResponseCache(disk_path=path)
+        latencies = asyncio.run(serve(traffic, restarted, model_seconds, args.concurrency))
+        stats = restarted.stats()
+        report("after restart", latencies, stats["misses"] + stats["bypasses"])
+        print(f"             {stats['disk_hits']:,} answers promoted from disk")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# benchmarks/bench_sessions.py
+"""
+Session store memory and throughput at a large number of live sessions.
+
+    python -m benchmarks.bench_sessions --sessions 1000000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from session_store import SessionStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=1000000)
+    parser.add_argument("--lookups", type=int, default=200000)
+    args = parser.parse_args()
+
+    store = SessionStore(max_sessions=args.sessions, ttl_seconds=3600)
+    tracemalloc.start()
+    started = time.perf_counter()
+    tokens = [store.create(f"SBI{i:010d}") for i in range(store.max_sessions)]
+    elapsed = time.perf_counter() - started
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    # the token list is only kept for the benchmark; don't count it against the store
+    per_session = (current - tokens.__sizeof__()) / len(store)
+    print(f"filled {len(store):,} sessions at {len(store) / elapsed:,.0f} creates/sec")
+    print(f"memory: ~{per_session:.0f} bytes/session, ~{per_session * len(store) / 2 ** 20:.0f} MiB total")
+
+    sample = random.sample(tokens, min(args.lookups, len(tokens)))
+    started = time.perf_counter()
+    for token in sample:
+        store.resolve(token)
+    print(f"resolve: {len(sample) / (time.perf_counter() - started):,.0f} lookups/sec")
+
+    # the store is full, so every further create evicts the least recently used session
+    evictions_before = store.evictions
+    started = time.perf_counter()
+    for i in range(args.lookups):
+        store.create(f"SBI{i:010d}")
+    elapsed = time.perf_counter() - started
+    print(
+        f"create at capacity: {args.lookups / elapsed:,.0f} creates/sec, "
+        f"{store.evictions - evictions_before:,} evictions, size stays {len(store):,}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# benchmarks/bench_statement.py
+"""
+Statement export at scale: bulk-load one account with --rows transactions
+spread over a year into a fresh SQLite ledger, then stream its full-year
+statement and report rows/s, output size and the export's peak Python
+memory. Fails if the rows don't reconcile with the checkpoint balances or
+memory goes over --max-mb.
+
+    python -m benchmarks.bench_statement --rows 10000000 --format csv
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+ACCOUNT = "SBI0000000001"
+OPENING_CENTS = 500000
+
+
+def load(path, rows, year):
+    """Write the account and its transactions straight into the ledger schema."""
+    from ledger_store import _SCHEMA, TX_RECEIVED, TX_SENT
+
+    start = datetime(year, 1, 1).timestamp()
+    step = (datetime(year + 1, 1, 1).timestamp() - start) / rows
+    rng = random.Random(1)
+    balance = OPENING_CENTS
+
+    def transactions():
+        nonlocal balance
+        for i in range(rows):
+            amount = rng.randint(1, 5000)
+            tx_type = TX_SENT if balance > amount and rng.random() < 0.5 else TX_RECEIVED
+            balance += -amount if tx_type == TX_SENT else amount
+            yield ACCOUNT, tx_type, amount, start + i * step
+
+    conn = sqlite3.connect(path)
+    conn.executescript(_SCHEMA)
+    with conn:
+        conn.executemany(
+            "INSERT INTO transactions (account_number, type, amount_cents, timestamp) VALUES (?, ?, ?, ?)",
+            transactions(),
+        )
+        conn.execute(
+            "INSERT INTO accounts VALUES (?, 'Bench', 'x', ?, ?)", (ACCOUNT, balance, start - 1)
+        )
+    conn.close()
+    return balance
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--format", choices=["csv", "jsonl", "parquet"], default="csv")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--max-mb", type=float, default=64)
+    parser.add_argument("--skip-memory", action="store_true", help="skip the (slow) traced memory pass")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(prefix="securebank-statement-"), "ledger.db")
+    started = time.perf_counter()
+    final_cents = load(path, args.rows, args.year)
+    print(f"loaded {args.rows:,} transactions in {time.perf_counter() - started:.1f}s")
+
+    os.environ["BANK_STORAGE"] = "sqlite"
+    os.environ["BANK_DB_PATH"] = path
+    from statements import export_statement, open_statement  # builds period totals from the loaded rows
+
+    started = time.perf_counter()
+    statement = open_statement(ACCOUNT, f"{args.year}-01-01", f"{args.year}-12-31")
+    print(f"checkpoint balances in {(time.perf_counter() - started) * 1000:.1f} ms: "
+          f"opening {statement.opening_cents / 100:,.2f}, closing {statement.closing_cents / 100:,.2f}")
+
+    started = time.perf_counter()
+    size = sum(len(part) for part in export_statement(statement, args.format))
+    elapsed = time.perf_counter() - started
+    print(f"exported {statement.row_count:,} rows as {args.format} in {elapsed:.1f}s "
+          f"({statement.row_count / elapsed:,.0f} rows/s, {size / 2 ** 20:,.1f} MB)")
+
+    # a second, traced pass: tracemalloc slows the export several times over
+    peak_mb = 0.0
+    if not args.skip_memory:
+        statement = open_statement(ACCOUNT, f"{args.year}-01-01", f"{args.year}-12-31")
+        tracemalloc.start()
+        for _ in export_statement(statement, args.format):
+            pass
+        peak_mb = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        print(f"peak Python memory during export: {peak_mb:.1f} MB")
+    reconciled = (statement.opening_cents == OPENING_CENTS and statement.closing_cents == final_cents
+                  and statement.row_count == args.rows)
+    if not reconciled:
+        raise SystemExit("statement does not reconcile with the loaded transactions")
+    if peak_mb > args.max_mb:
+        raise SystemExit(f"export used more than {args.max_mb} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+# benchmarks/bench_transfer_concurrency.py
+"""
+Stress concurrent transfers and report throughput as the thread count grows.
+Fails loudly if money is created or destroyed, or a balance goes negative.
+
+    python -m benchmarks.bench_transfer_concurrency --threads 1 2 4 8 16
+"""
+import argparse
+import os
+import random
+import tempfile
+import threading
+import time
+
+from ledger_store import MemoryLedgerStore, SQLiteLedgerStore
+
+OPENING_BALANCE_CENTS = 10000
+
+
+def build_store(backend, directory):
+    if backend == "memory":
+        return MemoryLedgerStore()
+    return SQLiteLedgerStore(os.path.join(directory, "stress.db"))
+
+
+def run(backend, threads, accounts, transfers_per_thread):
+    with tempfile.TemporaryDirectory() as directory:
+        store = build_store(backend, directory)
+        numbers = [f"SBI{i:06d}" for i in range(accounts)]
+        for acc in numbers:
+            store.add_account(acc, "Stress User", "secret", OPENING_BALANCE_CENTS, time.time())
+        expected_total = accounts * OPENING_BALANCE_CENTS
+
+        start_gate = threading.Barrier(threads)
+
+        def worker():
+            rng = random.Random()
+            start_gate.wait()
+            for _ in range(transfers_per_thread):
+                a, b = rng.sample(numbers, 2)
+                # amounts large enough that many transfers hit insufficient funds
+                store.transfer(a, b, rng.randint(1, OPENING_BALANCE_CENTS // 2), time.time())
+
+        pool = [threading.Thread(target=worker) for _ in range(threads)]
+        started = time.perf_counter()
+        for thread in pool:
+            thread.start()
+        for thread in pool:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        balances = [store.get_account(acc)["balance_cents"] for acc in numbers]
+        total = sum(balances)
+        assert total == expected_total, f"money not conserved: {total} != {expected_total}"
+        assert min(balances) >= 0, f"negative balance: {min(balances)}"
+
+        ops = threads * transfers_per_thread
+        print(f"{backend:<7} threads={threads:<3} {ops / elapsed:>10,.0f} transfers/sec  (total conserved)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--accounts", type=int, default=100)
+    parser.add_argument("--transfers", type=int, default=5000, help="transfers per thread")
+    parser.add_argument("--backends", nargs="+", default=["memory", "sqlite"])
+    args = parser.parse_args()
+    for backend in args.backends:
+        for threads in args.threads:
+            run(backend, threads, args.accounts, args.transfers)
+
+
+if __name__ == "__main__":
+    main()
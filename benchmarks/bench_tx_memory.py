@@ -0,0 +1,56 @@
+# benchmarks/bench_tx_memory.py
+"""
+Measure bytes per stored transaction with tracemalloc: the original
+list-of-dicts layout against ledger_store.TransactionColumns.
+
+    python -m benchmarks.bench_tx_memory --transactions 1000000
+"""
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+
+from ledger_store import TransactionColumns, TX_SENT
+
+
+def legacy_layout(count, now):
+    txs = []
+    for i in range(count):
+        txs.append({
+            "type": "Sent",
+            "amount": 12.5 + i,
+            "date": datetime.fromtimestamp(now + i).strftime("%Y-%m-%d %H:%M"),
+        })
+    return txs
+
+
+def columnar_layout(count, now):
+    txs = TransactionColumns()
+    for i in range(count):
+        txs.append(TX_SENT, 1250 + i * 100, now + i)
+    return txs
+
+
+def bytes_per_transaction(builder, count):
+    now = time.time()
+    tracemalloc.start()
+    data = builder(count, now)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del data
+    return current / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transactions", type=int, default=200000)
+    args = parser.parse_args()
+
+    before = bytes_per_transaction(legacy_layout, args.transactions)
+    after = bytes_per_transaction(columnar_layout, args.transactions)
+    print(f"list of dicts       {before:>8.1f} bytes/transaction")
+    print(f"TransactionColumns  {after:>8.1f} bytes/transaction  ({before / after:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
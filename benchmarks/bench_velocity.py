@@ -0,0 +1,68 @@
+# benchmarks/bench_velocity.py
+"""
+Overhead of the transfer velocity checks: added time per screened transfer,
+memory per tracked sender, and the LRU bound when many senders are active.
+
+    python -m benchmarks.bench_velocity --transfers 200000 --accounts 50000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from ledger_store import TRANSFER_OK
+from velocity_engine import ALLOW, VelocityEngine
+
+
+def execute():
+    return TRANSFER_OK
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transfers", type=int, default=200000)
+    parser.add_argument("--accounts", type=int, default=50000)
+    parser.add_argument("--max-accounts", type=int, default=10000)
+    args = parser.parse_args()
+
+    senders = [f"SBI{i:010d}" for i in range(args.accounts)]
+    recipients = senders[:50]
+    rng = random.Random(1)
+    plan = [(rng.choice(senders), rng.choice(recipients), rng.randint(100, 5000)) for _ in range(args.transfers)]
+    # spread the transfers over a day so the windows keep sliding
+    step = 86400 / args.transfers
+    start = 1_700_000_000.0
+
+    started = time.perf_counter()
+    for _ in plan:
+        execute()
+    baseline = time.perf_counter() - started
+
+    engine = VelocityEngine(max_accounts=args.max_accounts)
+    allowed = 0
+    started = time.perf_counter()
+    for i, (sender, recipient, cents) in enumerate(plan):
+        decision, _ = engine.screen(sender, recipient, cents, start + i * step, execute)
+        allowed += decision.action == ALLOW
+    elapsed = time.perf_counter() - started
+    added_us = (elapsed - baseline) / args.transfers * 1e6
+    print(f"screen: {added_us:.2f} us added per transfer ({args.transfers} transfers, "
+          f"{allowed / args.transfers:.1%} allowed)")
+    stats = engine.stats()
+    print(f"tracked senders: {stats['tracked_accounts']} (cap {stats['max_accounts']}), "
+          f"evictions: {stats['evictions']}, decisions: {stats['decisions']}")
+    if stats["tracked_accounts"] > stats["max_accounts"]:
+        raise SystemExit("LRU bound exceeded")
+
+    tracemalloc.start()
+    engine = VelocityEngine(max_accounts=args.accounts)
+    before = tracemalloc.get_traced_memory()[0]
+    for i, sender in enumerate(senders):
+        engine.screen(sender, recipients[i % len(recipients)], 1000, start, execute)
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    print(f"memory: {used / len(senders):.0f} bytes per tracked sender ({len(senders)} senders)")
+
+
+if __name__ == "__main__":
+    main()
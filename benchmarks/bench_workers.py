@@ -0,0 +1,294 @@
+# benchmarks/bench_workers.py
+"""
+Multi-worker scaling of api/server.py under gunicorn (gunicorn.conf.py).
+
+For each worker count, starts gunicorn on a fresh SQLite ledger, opens
+--accounts accounts through the API, then:
+
+  * reads: --clients client processes call check_balance on keep-alive
+    connections for --seconds, with session tokens issued by whichever
+    worker handled the login; reports requests/s, p50/p99 and the speed-up
+    over the first worker count;
+  * balances: every account makes a few transfers to random others over
+    fresh connections (so they land on different workers), then every
+    balance read back through the API must equal the opening balance plus
+    what the clients saw it receive minus what it sent;
+  * velocity: one sender makes 12 transfers over fresh connections, which
+    must be allowed, held and denied exactly as one worker would (5/5/2);
+  * metrics: after one publish interval a scrape must count every /chat
+    response served by any worker.
+
+Read scaling can only be near-linear while workers <= cores (and the client
+processes need cores too); counts above the core count are still checked
+for correctness.
+
+    python -m benchmarks.bench_workers --workers 1 2 4 --seconds 10 --out workers.json
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OPENING_CENTS = 500000
+PASSWORD = "bench-password"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def chat(conn, action, params):
+    body = json.dumps({"action": action, "params": params})
+    conn.request("POST", "/chat", body, {"Content-Type": "application/json"})
+    response = conn.getresponse()
+    payload = response.read()
+    if response.status != 200:
+        raise RuntimeError(f"{action}: HTTP {response.status} {payload[:200]!r}")
+    return json.loads(payload)["response"]
+
+
+def chat_once(port, action, params):
+    """One request on a new connection, so it can land on any worker."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    try:
+        return chat(conn, action, params)
+    finally:
+        conn.close()
+
+
+def balance_cents(text):
+    return round(float(re.search(r"\$([\d.]+)", text).group(1)) * 100)
+
+
+class Server:
+    def __init__(self, workers, directory):
+        self.port = free_port()
+        self.log = open(os.path.join(directory, "gunicorn.log"), "wb")
+        env = dict(
+            os.environ,
+            WEB_CONCURRENCY=str(workers),
+            BIND=f"127.0.0.1:{self.port}",
+            BANK_STORAGE="sqlite",
+            BANK_DB_PATH=os.path.join(directory, "ledger.db"),
+            METRICS_DIR=os.path.join(directory, "metrics"),
+        )
+        if workers == 1:
+            env.pop("BANK_SHARED_STATE", None)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "gunicorn", "api.server:app", "-c", "gunicorn.conf.py"],
+            cwd=ROOT, env=env, stdout=self.log, stderr=subprocess.STDOUT,
+        )
+        deadline = time.time() + 60
+        while True:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+                conn.request("GET", "/")
+                if conn.getresponse().status == 200:
+                    conn.close()
+                    return
+            except OSError:
+                pass
+            if self.process.poll() is not None or time.time() > deadline:
+                raise SystemExit(f"gunicorn did not start, see {self.log.name}")
+            time.sleep(0.2)
+
+    def stop(self):
+        self.process.terminate()
+        self.process.wait(30)
+        self.log.close()
+
+
+def read_client(port, tokens, seconds, start_at, results):
+    rng = random.Random(os.getpid())
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    time.sleep(max(0.0, start_at - time.time()))
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    while True:
+        started = time.perf_counter()
+        if started >= deadline:
+            break
+        response = chat(conn, "check_balance", {"token": rng.choice(tokens)})
+        if not response.startswith("💰"):
+            raise RuntimeError(f"check_balance failed: {response}")
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+    results.put(latencies)
+
+
+def transfer_client(port, sessions, targets, per_account, results):
+    """Each of `sessions` sends `per_account` transfers; returns [(from, to, cents)] that went through."""
+    rng = random.Random(os.getpid())
+    done, requests = [], 0
+    for _ in range(per_account):
+        for account_number, token in sessions:
+            to_account = rng.choice([target for target in targets if target != account_number])
+            cents = rng.randint(1, 5000)
+            response = chat_once(port, "transfer_funds", {"token": token, "to_account": to_account, "amount": cents / 100})
+            requests += 1
+            if response.startswith("✅"):
+                done.append((account_number, to_account, cents))
+    results.put((done, requests))
+
+
+def client_process(target, args, results):
+    try:
+        target(*args, results)
+    except Exception as e:
+        results.put(e)  # the parent is waiting on the queue, so report rather than die silently
+
+
+def run_clients(target, arguments):
+    results = multiprocessing.Queue()
+    clients = [multiprocessing.Process(target=client_process, args=(target, args, results)) for args in arguments]
+    for client in clients:
+        client.start()
+    collected = [results.get() for _ in clients]
+    for client in clients:
+        client.join()
+    for result in collected:
+        if isinstance(result, Exception):
+            raise SystemExit(f"a client failed: {result}")
+    return collected
+
+
+def percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))] * 1e6
+
+
+def scrape_chat_responses(port):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("GET", "/metrics")
+    text = conn.getresponse().read().decode()
+    conn.close()
+    return sum(
+        int(float(line.rsplit(" ", 1)[1])) for line in text.splitlines()
+        if line.startswith("securebank_http_responses_total") and 'route="/chat"' in line
+    )
+
+
+def run_workers(workers, args):
+    directory = tempfile.mkdtemp(prefix=f"securebank-workers-{workers}-")
+    server = Server(workers, directory)
+    chat_requests = 0
+    try:
+        sessions = []
+        for i in range(args.accounts + 1):
+            created = chat_once(server.port, "create_account", {"name": f"Worker {i}", "password": PASSWORD})
+            account_number = re.search(r"SBI\d+", created).group()
+            login = chat_once(server.port, "login", {"account_number": account_number, "password": PASSWORD})
+            sessions.append((account_number, login["token"]))
+            chat_requests += 2
+        probe, sessions = sessions[-1], sessions[:-1]
+        tokens = [token for _, token in sessions]
+
+        start_at = time.time() + 1.0
+        batches = run_clients(read_client, [(server.port, tokens, args.seconds, start_at)] * args.clients)
+        latencies = sorted(latency for batch in batches for latency in batch)
+        chat_requests += len(latencies)
+        reads = {
+            "requests": len(latencies),
+            "requests_per_s": round(len(latencies) / args.seconds, 1),
+            "p50_us": round(percentile(latencies, 0.50), 1),
+            "p99_us": round(percentile(latencies, 0.99), 1),
+        }
+
+        targets = [account_number for account_number, _ in sessions]
+        slices = [(server.port, sessions[i::args.clients], targets, args.transfers) for i in range(args.clients)]
+        expected = {account_number: OPENING_CENTS for account_number in targets}
+        transfers = 0
+        for done, requests in run_clients(transfer_client, slices):
+            chat_requests += requests
+            for from_acc, to_acc, cents in done:
+                expected[from_acc] -= cents
+                expected[to_acc] += cents
+                transfers += 1
+        mismatched = 0
+        for account_number, token in sessions:
+            if balance_cents(chat_once(server.port, "check_balance", {"token": token})) != expected[account_number]:
+                mismatched += 1
+            chat_requests += 1
+
+        outcomes = {"allowed": 0, "held": 0, "declined": 0}
+        for _ in range(12):
+            response = chat_once(server.port, "transfer_funds", {"token": probe[1], "to_account": targets[0], "amount": 1})
+            chat_requests += 1
+            outcome = "allowed" if response.startswith("✅") else "held" if "held" in response else "declined"
+            outcomes[outcome] += 1
+
+        time.sleep(args.publish_wait)
+        counted = scrape_chat_responses(server.port)
+    finally:
+        server.stop()
+        shutil.rmtree(directory, ignore_errors=True)
+    return {
+        "workers": workers,
+        "reads": reads,
+        "transfers": transfers,
+        "balance_mismatches": mismatched,
+        "velocity": outcomes,
+        "metrics_chat_responses": counted,
+        "chat_requests": chat_requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=8, help="load-generating client processes")
+    parser.add_argument("--accounts", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=10, help="length of each read phase")
+    parser.add_argument("--transfers", type=int, default=4, help="transfers per account (under the velocity hold)")
+    parser.add_argument("--publish-wait", type=float, default=6, help="seconds to wait for workers to publish metrics")
+    parser.add_argument("--min-efficiency", type=float, default=0.0,
+                        help="fail if reads/s per worker drops below this fraction of the first run's "
+                             "(only checked while workers <= cores)")
+    parser.add_argument("--out", help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f"{cores} cores, {args.clients} client processes")
+    runs, failures = [], []
+    for workers in args.workers:
+        run = run_workers(workers, args)
+        runs.append(run)
+        reads = run["reads"]
+        speedup = reads["requests_per_s"] / runs[0]["reads"]["requests_per_s"] * runs[0]["workers"]
+        run["speedup"] = round(speedup, 2)
+        print(f"{workers} workers: {reads['requests_per_s']:10,.0f} reads/s  speed-up {speedup:4.2f}x  "
+              f"p50 {reads['p50_us']:8,.0f} us  p99 {reads['p99_us']:8,.0f} us  "
+              f"| {run['transfers']} transfers, {run['balance_mismatches']} balance mismatches  "
+              f"| velocity {run['velocity']}  | metrics {run['metrics_chat_responses']}/{run['chat_requests']}")
+        if run["balance_mismatches"]:
+            failures.append(f"{workers} workers: balances don't match the transfers made")
+        if run["velocity"] != {"allowed": 5, "held": 5, "declined": 2}:
+            failures.append(f"{workers} workers: velocity limits were not shared ({run['velocity']})")
+        if run["metrics_chat_responses"] != run["chat_requests"]:
+            failures.append(f"{workers} workers: /metrics counted {run['metrics_chat_responses']} "
+                            f"of {run['chat_requests']} /chat responses")
+        if workers <= cores and speedup / workers < args.min_efficiency:
+            failures.append(f"{workers} workers: read scaling {speedup:.2f}x is below {args.min_efficiency:.0%} of linear")
+        if workers > cores:
+            print(f"  ({workers} workers on {cores} cores: scaling is bounded by the cores)")
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"cores": cores, "clients": args.clients, "runs": runs}, f, indent=2)
+    if failures:
+        raise SystemExit("\n".join(failures))
+
+
+if __name__ == "__main__":
+    main()
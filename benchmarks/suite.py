@@ -0,0 +1,464 @@
+# benchmarks/suite.py
+"""
+Benchmark and load-test suite: a microbenchmark of every banking_tools and
+advanced_tools function, then in-process ASGI load tests of api/server.py
+and banking_chatbot.py with realistic request mixes, the chatbot answering
+from the stub model. Reports throughput, p50/p95/p99 latency and peak RSS,
+writes them to JSON, and compares two result files to flag regressions.
+
+    python -m benchmarks.suite run --out bench-results.json
+    python -m benchmarks.suite compare baseline.json bench-results.json --threshold 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Peak RSS (not available on Windows)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+LATENCY_METRICS = ("p50_us", "p95_us", "p99_us")
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def percentile(ordered, fraction):
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(latencies, elapsed, errors=0):
+    """Throughput and latency percentiles (microseconds) for one benchmark."""
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "ops_per_sec": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        **{
+            metric: round(percentile(ordered, fraction) * 1e6, 1)
+            for metric, fraction in zip(LATENCY_METRICS, (0.50, 0.95, 0.99))
+        },
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def next_weekday(day):
+    while day.weekday() >= 5:
+        day += timedelta(days=1)
+    return day
+
+
+# Microbenchmarks
+
+HISTORY_TRANSACTIONS = 500
+TRADERS = 8
+
+
+def micro_cases(tools, advanced, accounts):
+    """
+    name -> zero-argument callable. `accounts` are accounts that trade
+    transfers in a ring (spread out so none trips the velocity limits) and
+    the last one with a fixed history for the read cases; cases that book
+    appointments cancel them again.
+    """
+    from action_registry import agent_account
+
+    *traders, history = accounts
+    first = traders[0]
+    today = date.today()
+    month_start = today.replace(day=1).isoformat()
+    counter = iter(range(10 ** 9))
+
+    def transfer():
+        i = next(counter)
+        return tools.transfer_funds(traders[i % len(traders)], traders[(i + 1) % len(traders)], 0.01)
+
+    def schedule_and_cancel():
+        result = tools.schedule_appointment(first, "general")
+        tools.cancel_appointment(first, re.search(r"Appointment (\S+) scheduled", result).group(1))
+
+    slots = [(next_weekday(today + timedelta(days=7 + d)), f"{h:02d}:{m:02d}")
+             for d in range(7) for h in range(9, 17) for m in (0, 30)]
+
+    def account_status():
+        token = agent_account.set(first)
+        try:
+            return advanced.check_account_status()
+        finally:
+            agent_account.reset(token)
+
+    def specialist_appointment():
+        day, hhmm = slots[next(counter) % len(slots)]
+        token = agent_account.set(first)
+        try:
+            booking = advanced.schedule_appointment("loan_service", day.isoformat(), hhmm)
+        finally:
+            agent_account.reset(token)
+        if "appointment_id" in booking:
+            tools.cancel_appointment(first, booking["appointment_id"])
+
+    return {
+        "tools.create_account": lambda: tools.create_account("Bench User", "bench-password"),
+        "tools.validate_login": lambda: tools.validate_login(first, "bench-password"),
+        "tools.generate_account_number": tools.generate_account_number,
+        "tools.get_account_balance": lambda: tools.get_account_balance(first),
+        "tools.transfer_funds": transfer,
+        "tools.get_transaction_page": lambda: tools.get_transaction_page(history),
+        "tools.get_transaction_history": lambda: tools.get_transaction_history(history),
+        "tools.iter_transaction_history": lambda: sum(1 for _ in tools.iter_transaction_history(history)),
+        "tools.get_transactions_between": lambda: tools.get_transactions_between(history, month_start, today.isoformat()),
+        "tools.get_spending_summary": lambda: tools.get_spending_summary(history),
+        "tools.get_loan_information": tools.get_loan_information,
+        "tools.get_investment_advice": tools.get_investment_advice,
+        "tools.schedule_and_cancel_appointment": schedule_and_cancel,
+        "tools.get_available_slots": lambda: tools.get_available_slots("general"),
+        "advanced.check_account_status": account_status,
+        "advanced.calculate_interest_earned": lambda: advanced.calculate_interest_earned(10000, 4.5, 365, "daily"),
+        "advanced.get_exchange_rates": lambda: advanced.get_exchange_rates("EUR"),
+        "advanced.schedule_appointment": specialist_appointment,
+    }
+
+
+def run_micro(cases, seconds, rounds=5):
+    """
+    Call each case repeatedly for about `seconds` in total (at least 5 calls
+    a round), timing every call. The time is split into rounds taken in
+    turn across all cases, so a slow spell on the machine hits every case a
+    little rather than one case a lot.
+    """
+    results = {}
+    samples = {}
+    for name, func in cases.items():
+        if not callable(func):
+            # wrapped as an agents SDK FunctionTool, which can't be called directly
+            results[name] = {"skipped": "not directly callable"}
+            continue
+        func()  # warm up
+        samples[name] = ([], [0.0])
+    for _ in range(rounds):
+        for name, (latencies, elapsed) in samples.items():
+            func = cases[name]
+            calls = 0
+            started = time.perf_counter()
+            deadline = started + seconds / rounds
+            while True:
+                call_started = time.perf_counter()
+                func()
+                now = time.perf_counter()
+                latencies.append(now - call_started)
+                calls += 1
+                if now >= deadline and calls >= 5:
+                    break
+            elapsed[0] += now - started
+    for name, (latencies, elapsed) in samples.items():
+        results[name] = summarize(latencies, elapsed[0])
+        print(format_row(name, results[name]))
+    return results
+
+
+# Load tests
+
+async def drive(client, make_request, total, concurrency):
+    """
+    Send `total` requests from `concurrency` concurrent workers.
+    `make_request(i)` returns (label, method, path, request kwargs).
+    Returns {label: (latencies, errors)} and the wall time.
+    """
+    samples = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            label, method, path, kwargs = make_request(i)
+            started = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            await response.aread()
+            elapsed = time.perf_counter() - started
+            latencies, errors = samples.setdefault(label, ([], [0]))
+            latencies.append(elapsed)
+            if response.status_code >= 400:
+                errors[0] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def summarize_load(prefix, samples, elapsed):
+    results = {}
+    everything, error_total = [], 0
+    for label, (latencies, errors) in sorted(samples.items()):
+        results[f"{prefix}.{label}"] = summarize(latencies, elapsed, errors[0])
+        everything.extend(latencies)
+        error_total += errors[0]
+    results[f"{prefix}.all"] = summarize(everything, elapsed, error_total)
+    for name, result in results.items():
+        print(format_row(name, result))
+    return results
+
+
+def weighted(rng, mix):
+    return rng.choices([entry for _, entry in mix], weights=[weight for weight, _ in mix])[0]
+
+
+def api_mix(rng, sessions):
+    """Customer traffic on api/server.py: mostly reads, some transfers, a little reference data."""
+    def account():
+        return rng.choice(sessions)
+
+    def chat(label, action, params):
+        return label, "POST", "/chat", {"json": {"action": action, "params": params}}
+
+    return [
+        (35, lambda: chat("check_balance", "check_balance", {"token": account()[1]})),
+        (20, lambda: chat("transaction_history", "transaction_history", {"token": account()[1], "format": "json"})),
+        (15, lambda: chat("transfer_funds", "transfer_funds",
+                          {"token": account()[1], "to_account": account()[0], "amount": 1})),
+        (10, lambda: chat("spending_summary", "spending_summary", {"token": account()[1]})),
+        (5, lambda: chat("loan_info", "loan_info", {})),
+        (5, lambda: chat("convert_currency", "convert_currency",
+                         {"amount": 250, "from_currency": "USD", "to_currency": "EUR"})),
+        (5, lambda: chat("loan_schedule", "loan_schedule",
+                         {"principal": 250000, "annual_rate": 6.5, "term_months": 360})),
+        (3, lambda: ("transactions_stream", "GET", "/transactions/stream",
+                     {"headers": {"X-Session-Token": account()[1]}})),
+        (2, lambda: ("batch", "POST", "/batch", {"json": {"actions": [
+            {"action": "check_balance", "params": {"token": account()[1]}} for _ in range(10)
+        ]}})),
+    ]
+
+
+FAQ_QUESTIONS = [
+    ("investment", "What is the difference between an ETF and a mutual fund?"),
+    ("investment", "How should I start investing for retirement?"),
+    ("loan", "What documents do I need for a home loan?"),
+    ("loan", "Can I repay a car loan early?"),
+]
+
+
+def chatbot_mix(rng, sessions):
+    """Chat traffic: direct tool answers, cached FAQs, fresh model questions, streamed answers."""
+    def chat(label, message, agent_type=None, token=None, path="/chat"):
+        payload = {"user_id": "bench", "message": message}
+        if agent_type:
+            payload["agent_type"] = agent_type
+        headers = {"X-Session-Token": token} if token else {}
+        return label, "POST", path, {"json": payload, "headers": headers}
+
+    def model_question(path):
+        # transfer questions are never cached, so every one reaches the model
+        return chat("stream_model" if path != "/chat" else "model", f"How do I send money abroad? #{rng.random()}",
+                    "transfer", path=path)
+
+    return [
+        (30, lambda: chat("direct_balance", "What's my balance?", token=rng.choice(sessions)[1])),
+        (15, lambda: chat("direct_loan_rates", "What are your loan interest rates?")),
+        (25, lambda: chat("cached_faq", *reversed(rng.choice(FAQ_QUESTIONS)))),
+        (20, lambda: model_question("/chat")),
+        (10, lambda: model_question("/chat/stream")),
+    ]
+
+
+async def open_sessions(client, count):
+    """Create and log in `count` accounts through the API; returns [(account number, token)]."""
+    sessions = []
+    for i in range(count):
+        response = await client.post("/chat", json={
+            "action": "create_account", "params": {"name": f"Load {i}", "password": "bench-password"},
+        })
+        account_number = re.search(r"SBI\d+", response.json()["response"]).group()
+        response = await client.post("/chat", json={
+            "action": "login", "params": {"account_number": account_number, "password": "bench-password"},
+        })
+        sessions.append((account_number, response.json()["response"]["token"]))
+    return sessions
+
+
+async def run_load(args):
+    import httpx
+
+    import banking_chatbot
+    from api.server import app as api_app
+    from banking_tools import velocity
+
+    # the chatbot answers from the stub model, never a real upstream
+    for agent in banking_chatbot.agents.values():
+        agent.model = None
+
+    rng = random.Random(args.seed)
+    results = {}
+    api = httpx.AsyncClient(transport=httpx.ASGITransport(app=api_app), base_url="http://api", timeout=120)
+    chatbot = httpx.AsyncClient(transport=httpx.ASGITransport(app=banking_chatbot.app),
+                                base_url="http://chatbot", timeout=120)
+    async with api, chatbot:
+        # one session store serves both apps, so API logins work for the chatbot too
+        sessions = await open_sessions(api, args.accounts)
+        for account_number, _ in sessions:
+            velocity.add_bulk_sender(account_number)
+        if "api" in args.only:
+            mix = api_mix(rng, sessions)
+            samples, elapsed = await drive(api, lambda i: weighted(rng, mix)(), args.requests, args.concurrency)
+            results.update(summarize_load("api", samples, elapsed))
+        if "chatbot" in args.only:
+            mix = chatbot_mix(rng, sessions)
+            samples, elapsed = await drive(chatbot, lambda i: weighted(rng, mix)(), args.requests, args.concurrency)
+            results.update(summarize_load("chatbot", samples, elapsed))
+    return results
+
+
+def format_row(name, result):
+    if "skipped" in result:
+        return f"{name:<42} skipped ({result['skipped']})"
+    return (
+        f"{name:<42} {result['ops_per_sec']:>11,.1f}/s  p50 {result['p50_us']:>10,.1f}us  "
+        f"p95 {result['p95_us']:>10,.1f}us  p99 {result['p99_us']:>10,.1f}us  errors {result['errors']}"
+    )
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    # a throwaway ledger
+    os.environ.setdefault("BANK_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="securebank-bench-"), "bench.db"))
+    os.environ["STUB_MODEL_TOKEN_MS"] = str(args.token_ms)
+    import advanced_tools
+    import banking_tools
+
+    results = {}
+    if "micro" in args.only:
+        accounts = [re.search(r"SBI\d+", banking_tools.create_account(f"Bench {i}", "bench-password")).group()
+                    for i in range(TRADERS + 1)]
+        for account_number in accounts:
+            # the load hammers a few accounts, so they get the payroll (bulk) velocity limits
+            banking_tools.velocity.add_bulk_sender(account_number)
+        for _ in range(HISTORY_TRANSACTIONS):
+            banking_tools.transfer_funds(accounts[-1], accounts[0], 0.01)
+        results.update(run_micro(micro_cases(banking_tools, advanced_tools, accounts), args.micro_seconds, args.rounds))
+    if "api" in args.only or "chatbot" in args.only:
+        results.update(asyncio.run(run_load(args)))
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "storage": os.getenv("BANK_STORAGE", "sqlite"),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "token_ms": args.token_ms,
+        },
+        "peak_rss_mb": peak_rss_mb(),
+        "results": results,
+    }
+    print(f"peak RSS: {report['peak_rss_mb']} MB")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"wrote {args.out}")
+
+
+def compare(baseline, current, threshold, min_delta_us):
+    """
+    Return (rows, regressions). A latency percentile regresses when it grows
+    by more than `threshold` (a fraction) and `min_delta_us`; throughput
+    regresses when it drops by more than `threshold`.
+    """
+    rows, regressions = [], []
+    for name, base in baseline["results"].items():
+        now = current["results"].get(name)
+        if now is None or "skipped" in base or "skipped" in now:
+            continue
+        for metric in (*LATENCY_METRICS, "ops_per_sec"):
+            old, new = base[metric], now[metric]
+            change = (new - old) / old if old else 0.0
+            if metric == "ops_per_sec":
+                worse = change < -threshold
+            else:
+                worse = change > threshold and new - old > min_delta_us
+            rows.append((name, metric, old, new, change, worse))
+            if worse:
+                regressions.append((name, metric))
+    old_rss, new_rss = baseline.get("peak_rss_mb"), current.get("peak_rss_mb")
+    if old_rss and new_rss:
+        change = (new_rss - old_rss) / old_rss
+        worse = change > threshold
+        rows.append(("process", "peak_rss_mb", old_rss, new_rss, change, worse))
+        if worse:
+            regressions.append(("process", "peak_rss_mb"))
+    return rows, regressions
+
+
+def run_compare(args):
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    rows, regressions = compare(baseline, current, args.threshold, args.min_delta_us)
+    for name, metric, old, new, change, worse in rows:
+        if worse or args.verbose:
+            flag = "REGRESSION" if worse else ""
+            print(f"{name:<42} {metric:<12} {old:>12,.1f} -> {new:>12,.1f}  {change:+7.1%}  {flag}")
+    print(f"{len(regressions)} regression(s) over {args.threshold:.0%} "
+          f"({baseline['meta'].get('revision')} -> {current['meta'].get('revision')})")
+    if regressions:
+        raise SystemExit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("--only", nargs="+", choices=["micro", "api", "chatbot"],
+                            default=["micro", "api", "chatbot"])
+    run_parser.add_argument("--out", help="write the results to this JSON file")
+    run_parser.add_argument("--micro-seconds", type=float, default=0.5, help="time spent on each microbenchmark")
+    run_parser.add_argument("--rounds", type=int, default=5, help="microbenchmark rounds, interleaved across cases")
+    run_parser.add_argument("--requests", type=int, default=5000, help="requests per load test")
+    run_parser.add_argument("--concurrency", type=int, default=32)
+    run_parser.add_argument("--accounts", type=int, default=20)
+    run_parser.add_argument("--token-ms", type=float, default=0, help="stub model delay per word")
+    run_parser.add_argument("--seed", type=int, default=1)
+
+    compare_parser = commands.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.2, help="allowed change, as a fraction")
+    compare_parser.add_argument("--min-delta-us", type=float, default=2.0,
+                                help="ignore latency changes smaller than this")
+    compare_parser.add_argument("--verbose", action="store_true", help="show every metric, not just regressions")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        run_compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,10 @@
 import os
 from dotenv import load_dotenv
 import logging
+from functools import lru_cache
 from typing import Optional
+from logging_setup import configure_logging
+from model_client import GEMINI_BASE_URL, get_model_client
 
 # Load environment variables
 load_dotenv()
@@ -15,7 +18,7 @@ class BankingConfig:
         if not self.gemini_api_key:
             raise ValueError("GEMINI_API_KEY environment variable is required")
             
-        self.base_url = "https://generativelanguage.googleapis.com/v1beta/openai/"
+        self.base_url = os.getenv("MODEL_BASE_URL", GEMINI_BASE_URL)
         self.model_name = "gemini-2.0-flash"
         self.bank_name = "SecureBank International"
         self.bank_code = "SBI"
@@ -34,12 +37,17 @@ class BankingConfig:
         if self._provider is None:
             try:
                 from agents import AsyncOpenAI
+                model_client = get_model_client()
+                # shares the pooled HTTP client, whose transport already retries
+                # and times every request, so the SDK must not retry on top
                 self._provider = AsyncOpenAI(
                     api_key=self.gemini_api_key,
                     base_url=self.base_url,
+                    http_client=model_client.http,
+                    max_retries=0,
                 )
             except ImportError as e:
-                self.logger.error(f"Failed to import AsyncOpenAI: {e}")
+                self.logger.error("Failed to import AsyncOpenAI: %s", e)
                 raise
         return self._provider
     
@@ -54,7 +62,7 @@ class BankingConfig:
                     openai_client=self.provider
                 )
             except ImportError as e:
-                self.logger.error(f"Failed to import OpenAIChatCompletionsModel: {e}")
+                self.logger.error("Failed to import OpenAIChatCompletionsModel: %s", e)
                 raise
         return self._model
     
@@ -70,24 +78,17 @@ class BankingConfig:
                     tracing_disabled=True
                 )
             except ImportError as e:
-                self.logger.error(f"Failed to import RunConfig: {e}")
+                self.logger.error("Failed to import RunConfig: %s", e)
                 raise
         return self._run_config
     
     def setup_logging(self):
         """Setup professional logging configuration"""
-        try:
-            logging.basicConfig(
-                level=logging.INFO,
-                format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-                handlers=[
-                    logging.FileHandler('banking_agent.log'),
-                    logging.StreamHandler()
-                ]
-            )
-            self.logger = logging.getLogger(__name__)
-        except Exception as e:
-            print(f"Warning: Could not setup file logging: {e}")
-            # Fallback to console logging only
-            logging.basicConfig(level=logging.INFO)
-            self.logger = logging.getLogger(__name__)
\ No newline at end of file
+        # shared queue-based pipeline; falls back to console if the file can't be opened
+        configure_logging('banking_agent.log', console=True)
+        self.logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def get_config():
+    """The process-wide BankingConfig, so every agent shares one provider and model."""
+    return BankingConfig()
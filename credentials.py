@@ -0,0 +1,92 @@
+# credentials.py
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# scrypt cost parameters: ~16 MiB and a few tens of milliseconds per hash
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SALT_BYTES = 16
+HASH_PREFIX = "scrypt"
+
+
+def hash_password(password, n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P):
+    """Return a self-describing scrypt hash: scrypt$n$r$p$salt$digest."""
+    salt = os.urandom(SALT_BYTES)
+    digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=2 * 128 * r * n)
+    return "$".join([
+        HASH_PREFIX, str(n), str(r), str(p),
+        base64.b64encode(salt).decode(), base64.b64encode(digest).decode(),
+    ])
+
+
+def verify_password(password, stored):
+    """Check a password against a stored hash in constant time; anything but a well-formed hash fails."""
+    if not stored or password is None:
+        return False
+    try:
+        prefix, n, r, p, salt, expected = stored.split("$")
+        if prefix != HASH_PREFIX:
+            return False
+        n, r, p = int(n), int(r), int(p)
+        salt, expected = base64.b64decode(salt, validate=True), base64.b64decode(expected, validate=True)
+        digest = hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=2 * 128 * r * n)
+    except ValueError:  # includes binascii.Error and scrypt rejecting bad parameters
+        return False
+    return hmac.compare_digest(digest, expected)
+
+
+class CredentialServiceBusy(Exception):
+    """Raised when too many hash operations are already queued."""
+
+
+class CredentialService:
+    """
+    Runs password hashing and verification in a bounded process pool so the
+    KDF never blocks the event loop or the request thread pool.
+
+    At most `max_pending` operations may be in flight. Further requests are
+    rejected with CredentialServiceBusy instead of queueing without limit.
+    """
+
+    def __init__(self, max_workers=None, max_pending=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.max_workers * 4
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        """Lazy loading of the worker processes"""
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    async def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise CredentialServiceBusy("Credential service is at capacity")
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, func, *args)
+        finally:
+            self._slots.release()
+
+    async def hash_password(self, password):
+        return await self._run(hash_password, password)
+
+    async def verify_password(self, password, stored):
+        return await self._run(verify_password, password, stored)
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
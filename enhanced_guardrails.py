@@ -1,38 +1,280 @@
 # enhanced_guardrails.py
 
+import os
+import re
+import time
 from functools import wraps
-from pydantic import BaseModel
+from typing import Callable, NamedTuple, Tuple
 import logging
 
-logger = logging.getLogger(__name__)
+from account_numbers import luhn_valid
+from metrics import GUARDRAIL_SECONDS, metrics, stats_family
 
-class SecurityRequest(BaseModel):
-    customer_id: str
-    request_type: str
+logger = logging.getLogger(__name__)
 
 def enhanced_security_check(func):
+    """Warn when a tool is called without a customer ID."""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        try:
-            request = SecurityRequest(**kwargs)
-            if not request.customer_id:
-                logger.warning("Security check: customer ID missing")
-        except Exception as e:
-            logger.warning(f"Security check skipped: {e}")
+        if not kwargs.get("customer_id"):
+            logger.warning("Security check: customer ID missing for %s", func.__name__)
         return func(*args, **kwargs)
     return wrapper
 
-class ComplianceRequest(BaseModel):
-    operation: str
-    data: dict
-
 def compliance_check(func):
+    """Audit-log each call by operation name and argument names (values may hold PII)."""
     @wraps(func)
     def wrapper(*args, **kwargs):
-        try:
-            request = ComplianceRequest(operation=func.__name__, data=kwargs)
-            logger.info(f"Compliance log: {request.operation} with {request.data}")
-        except Exception as e:
-            logger.warning(f"Compliance check skipped: {e}")
+        logger.info("Compliance log: %s with %s", func.__name__, sorted(kwargs))
         return func(*args, **kwargs)
     return wrapper
+
+# Output guardrails
+#
+# Every redaction and policy pattern is compiled into one regex with a named
+# group per rule, so a single scan over the text finds all of them. The
+# regex opens with a lookahead on the characters a match can start with,
+# which lets most positions be rejected after one character test.
+
+class GuardrailViolation(Exception):
+    """Raised when a model answer contains something it must not say."""
+
+
+class GuardrailResult(NamedTuple):
+    text: str                  # the text with PII masked
+    findings: Tuple[str, ...]  # names of the rules that matched
+    blocked: bool              # a policy phrase matched; the text must not be sent
+
+
+def _mask_account(text):
+    return "SBI******" + text[-4:]
+
+
+_NON_DIGIT = re.compile(r"\D")
+
+
+def _mask_card(text):
+    digits = _NON_DIGIT.sub("", text)
+    if not luhn_valid(digits):
+        return None  # a long number, but not a card number
+    return "*" * (len(digits) - 4) + digits[-4:]
+
+
+def _mask_ssn(text):
+    return "***-**-" + text[-4:]
+
+
+class Redaction(NamedTuple):
+    pattern: str      # regex without capturing groups
+    mask: Callable    # matched text -> masked text, or None to leave it alone
+    max_length: int   # longest text the pattern can match
+    first_chars: str  # regex character-class body of the characters a match starts with
+
+
+REDACTIONS = {
+    "account_number": Redaction(r"SBI\d{10}\b", _mask_account, 13, "S"),
+    "ssn": Redaction(r"\d{3}-\d{2}-\d{4}\b", _mask_ssn, 11, r"\d"),
+    "card_number": Redaction(r"\d(?:[ -]?\d){12,18}\b", _mask_card, 37, r"\d"),
+}
+
+# Statements an advisor must never make (matched case-insensitively)
+POLICY_PHRASES = [
+    "guaranteed return", "guaranteed returns", "guaranteed profit", "guaranteed profits",
+    "risk-free return", "risk-free returns", "risk free return", "risk free returns",
+    "risk-free investment", "risk-free investments", "risk free investment", "risk free investments",
+    "cannot lose money", "can't lose money", "double your money", "insider tip",
+    "your password is", "your pin is",
+]
+
+
+def _char_pattern(char):
+    return f"[{char}{char.upper()}]" if char.isalpha() else re.escape(char)
+
+
+def _trie_pattern(phrases):
+    """
+    Case-insensitive regex for a set of lowercase phrases, factored through a
+    prefix trie so the engine follows one path per position instead of
+    trying every phrase.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for char in phrase:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        branches = [_char_pattern(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class GuardrailEngine:
+    """
+    One-pass output guardrails: masks account numbers, SSNs and (Luhn-valid)
+    card numbers, and flags policy phrases that block the answer.
+
+    Each check is timed against a latency budget of `budget_us` plus
+    `budget_us_per_kb` for every KB of text; checks that overrun are logged
+    and counted in stats().
+    """
+
+    def __init__(self, redactions=None, policy_phrases=None, budget_us=50.0, budget_us_per_kb=100.0):
+        redactions = REDACTIONS if redactions is None else redactions
+        phrases = sorted({phrase.lower() for phrase in (POLICY_PHRASES if policy_phrases is None else policy_phrases)})
+        self._maskers = {name: redaction.mask for name, redaction in redactions.items()}
+        groups = [f"(?P<{name}>{redaction.pattern})" for name, redaction in redactions.items()]
+        groups.append(f"(?P<policy>{_trie_pattern(phrases)}\\b)")
+        first_chars = {redaction.first_chars for redaction in redactions.values()}
+        first_chars.update(_char_pattern(phrase[0]).strip("[]") for phrase in phrases)
+        self.pattern = re.compile(f"(?=[{''.join(sorted(first_chars))}])\\b(?:{'|'.join(groups)})")
+        # text this long at the end of a stream is held back until more arrives
+        self.max_match = max([redaction.max_length for redaction in redactions.values()]
+                             + [len(phrase) for phrase in phrases])
+        self.budget_us = budget_us
+        self.budget_us_per_kb = budget_us_per_kb
+        self.checks = 0
+        self.checked_bytes = 0
+        self.check_seconds = 0.0
+        self.over_budget = 0
+        self.blocked = 0
+        self.hits = dict.fromkeys([*redactions, "policy"], 0)
+
+    def apply(self, text, matches, end=None):
+        """Mask the matches that lie before `end`; returns (masked text, findings, blocked)."""
+        end = len(text) if end is None else end
+        parts = []
+        findings = []
+        blocked = False
+        position = 0
+        for match in matches:
+            if match.end() > end:
+                break
+            name = match.lastgroup
+            if name == "policy":
+                blocked = True
+                findings.append(name)
+                continue
+            masked = self._maskers[name](match.group())
+            if masked is None:
+                continue
+            findings.append(name)
+            parts.append(text[position:match.start()])
+            parts.append(masked)
+            position = match.end()
+        parts.append(text[position:end])
+        return "".join(parts), tuple(findings), blocked
+
+    def record(self, started, size, findings, blocked):
+        elapsed = time.perf_counter() - started
+        GUARDRAIL_SECONDS.observe(elapsed)
+        self.checks += 1
+        self.checked_bytes += size
+        self.check_seconds += elapsed
+        for name in findings:
+            self.hits[name] += 1
+        if blocked:
+            self.blocked += 1
+        budget = (self.budget_us + self.budget_us_per_kb * size / 1024) / 1e6
+        if elapsed > budget:
+            self.over_budget += 1
+            logger.warning("Guardrail check over budget: %.0f us for %d bytes", elapsed * 1e6, size)
+
+    def check(self, text):
+        """Scan a complete answer once; returns a GuardrailResult."""
+        started = time.perf_counter()
+        masked, findings, blocked = self.apply(text, self.pattern.finditer(text))
+        self.record(started, len(text), findings, blocked)
+        return GuardrailResult(masked, findings, blocked)
+
+    def stats(self):
+        return {
+            "checks": self.checks,
+            "checked_kb": round(self.checked_bytes / 1024, 1),
+            "mean_us_per_kb": round(self.check_seconds * 1e6 / (self.checked_bytes / 1024), 2)
+            if self.checked_bytes else 0.0,
+            "over_budget": self.over_budget,
+            "blocked": self.blocked,
+            "hits": dict(self.hits),
+        }
+
+
+guardrails = GuardrailEngine(
+    budget_us=float(os.getenv("GUARDRAIL_BUDGET_US", "50")),
+    budget_us_per_kb=float(os.getenv("GUARDRAIL_BUDGET_US_PER_KB", "100")),
+)
+
+
+def _guardrail_metrics():
+    stats = guardrails.stats()
+    return [
+        stats_family("securebank_guardrail_findings_total", "counter",
+                     "Guardrail rule matches in model answers, by rule.", "rule", stats["hits"]),
+        ("securebank_guardrail_blocked_total", "counter", "Answers blocked by a policy phrase.",
+         [({}, stats["blocked"])]),
+        ("securebank_guardrail_over_budget_total", "counter", "Guardrail checks over their latency budget.",
+         [({}, stats["over_budget"])]),
+    ]
+
+
+metrics.add_collector(_guardrail_metrics)
+
+
+def redact_output(text):
+    """Mask PII in a complete answer; raise GuardrailViolation on a policy phrase."""
+    result = guardrails.check(text)
+    if result.blocked:
+        raise GuardrailViolation("Response blocked by compliance guardrail")
+    return result.text
+
+
+class OutputStreamGuard:
+    """
+    Applies the guardrails to a stream of text deltas.
+
+    The last `max_match` characters are held back until more text arrives
+    (or the stream ends), so a number or phrase split across two deltas is
+    still caught; whole words before that are released as soon as they are
+    checked. Each delta costs one scan of the small unreleased tail.
+    """
+
+    def __init__(self, engine=None):
+        self.engine = engine or guardrails
+        self._pending = ""
+
+    def feed(self, delta):
+        """Add a delta; return the text that is now safe to send."""
+        self._pending += delta
+        pending = self._pending
+        cut = len(pending) - self.engine.max_match
+        if cut <= 0:
+            return ""
+        started = time.perf_counter()
+        matches = list(self.engine.pattern.finditer(pending))
+        # never split a match across what is released and what is held back
+        for match in matches:
+            if match.start() < cut < match.end():
+                cut = match.start()
+        # release whole words only, and never part of a grouped number ("4111 1111 ...")
+        space = pending.rfind(" ", 0, cut)
+        while space > 0 and pending[space - 1].isdigit():
+            space = pending.rfind(" ", 0, space)
+        cut = space + 1
+        released, findings, blocked = self.engine.apply(pending, matches, cut)
+        self.engine.record(started, len(pending), findings, blocked)
+        if blocked:
+            raise GuardrailViolation("Response blocked by compliance guardrail")
+        self._pending = pending[cut:]
+        return released
+
+    def flush(self):
+        """End of stream: check and release whatever is still held back."""
+        released, self._pending = self._pending, ""
+        return redact_output(released)
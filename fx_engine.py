@@ -0,0 +1,212 @@
+# fx_engine.py
+
+import json
+import os
+import threading
+import time
+import urllib.request
+from abc import ABC, abstractmethod
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+DEFAULT_RATES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fx_rates.json")
+
+
+class RateSource(ABC):
+    """Where rates come from. fetch() returns (rates quoted against one base, as_of string)."""
+
+    @abstractmethod
+    def fetch(self):
+        pass
+
+
+class StaticRateSource(RateSource):
+    """Fixed rates, for tests and local development."""
+
+    def __init__(self, rates, base="USD"):
+        self.rates = dict(rates)
+        self.base = base
+
+    def fetch(self):
+        return {**self.rates, self.base: 1.0}, datetime.now().isoformat(timespec="seconds")
+
+
+class FileRateSource(RateSource):
+    """Rates from a JSON file: {"base": "USD", "as_of": "...", "rates": {"EUR": 0.85, ...}}"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def _load(self):
+        with open(self.path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def fetch(self):
+        data = self._load()
+        rates = {**data["rates"], data.get("base", "USD"): 1.0}
+        return rates, data.get("as_of") or datetime.now().isoformat(timespec="seconds")
+
+
+class HttpRateSource(FileRateSource):
+    """Rates from a JSON feed in the same shape as FileRateSource."""
+
+    def __init__(self, url, timeout=5):
+        self.url = url
+        self.timeout = timeout
+
+    def _load(self):
+        with urllib.request.urlopen(self.url, timeout=self.timeout) as response:
+            return json.load(response)
+
+
+class FxSnapshot:
+    """
+    Immutable set of rates with the full N×N cross-rate matrix precomputed:
+    matrix[i, j] is how many units of currency j one unit of currency i buys.
+    """
+
+    __slots__ = ("version", "as_of", "currencies", "index", "matrix", "_rows")
+
+    def __init__(self, version, as_of, rates):
+        self.version = version
+        self.as_of = as_of
+        self.currencies = tuple(sorted(rates))
+        self.index = {code: i for i, code in enumerate(self.currencies)}
+        per_base = np.array([rates[code] for code in self.currencies], dtype=np.float64)
+        self.matrix = per_base[np.newaxis, :] / per_base[:, np.newaxis]
+        self.matrix.setflags(write=False)
+        # plain-float copy so single lookups skip NumPy scalar overhead
+        self._rows = self.matrix.tolist()
+
+    def _indices(self, codes):
+        try:
+            return np.fromiter((self.index[code] for code in codes), dtype=np.intp, count=len(codes))
+        except KeyError as e:
+            raise ValueError(f"Unsupported currency: {e.args[0]}") from None
+
+    def _position(self, code):
+        try:
+            return self.index[code]
+        except KeyError:
+            raise ValueError(f"Unsupported currency: {code}") from None
+
+    def rate(self, base, quote):
+        return self._rows[self._position(base)][self._position(quote)]
+
+    def row(self, base):
+        """All rates for one base currency, as {quote: rate}."""
+        return dict(zip(self.currencies, self._rows[self._position(base)]))
+
+    def convert(self, amounts, base, quote):
+        """Convert an array of amounts from one currency to another."""
+        return np.asarray(amounts, dtype=np.float64) * self.rate(base, quote)
+
+    def convert_many(self, amounts, bases, quotes):
+        """Convert amounts[k] from bases[k] to quotes[k] in one vectorized lookup."""
+        rates = self.matrix[self._indices(bases), self._indices(quotes)]
+        return np.asarray(amounts, dtype=np.float64) * rates
+
+
+class FxEngine:
+    """
+    TTL cache over a RateSource. Each refresh builds a new versioned
+    FxSnapshot; readers always get a complete snapshot and never wait on a
+    refresh unless the cache has expired. The last few snapshots are kept so
+    quotes can be traced back to the rates they used.
+    """
+
+    def __init__(self, source, ttl_seconds=300, keep_snapshots=5):
+        self.source = source
+        self.ttl_seconds = ttl_seconds
+        self._snapshot = None
+        self._expires_at = 0.0
+        self._history = deque(maxlen=keep_snapshots)
+        self._lock = threading.Lock()
+
+    def snapshot(self, version=None):
+        if version is not None:
+            for snap in self._history:
+                if snap.version == version:
+                    return snap
+            raise KeyError(f"FX snapshot {version} is no longer available")
+        if self._snapshot is None or time.monotonic() >= self._expires_at:
+            self.refresh()
+        return self._snapshot
+
+    def refresh(self):
+        with self._lock:
+            # another thread may have refreshed while we waited
+            if self._snapshot is not None and time.monotonic() < self._expires_at:
+                return self._snapshot
+            try:
+                rates, as_of = self.source.fetch()
+            except Exception:
+                if self._snapshot is None:
+                    raise
+                # keep serving the last good rates and retry after another TTL
+                self._expires_at = time.monotonic() + self.ttl_seconds
+                return self._snapshot
+            version = self._snapshot.version + 1 if self._snapshot else 1
+            snap = FxSnapshot(version, as_of, rates)
+            self._history.append(snap)
+            self._snapshot = snap
+            self._expires_at = time.monotonic() + self.ttl_seconds
+            return snap
+
+
+def create_rate_source():
+    """FX_RATES_URL selects a live feed; otherwise rates come from FX_RATES_FILE (default fx_rates.json)."""
+    url = os.getenv("FX_RATES_URL")
+    if url:
+        return HttpRateSource(url)
+    return FileRateSource(os.getenv("FX_RATES_FILE", DEFAULT_RATES_FILE))
+
+
+fx = FxEngine(create_rate_source(), ttl_seconds=int(os.getenv("FX_TTL_SECONDS", "300")))
+
+
+def supported_currencies():
+    return fx.snapshot().currencies
+
+
+def exchange_rates_for(base_currency="USD"):
+    """Rates from base_currency to every other supported currency."""
+    base_currency = base_currency.strip().upper()
+    snap = fx.snapshot()
+    if base_currency not in snap.index:
+        return {
+            "error": "Invalid base currency",
+            "message": f"Base currency must be one of: {', '.join(snap.currencies)}"
+        }
+    rates = snap.row(base_currency)
+    del rates[base_currency]
+    return {
+        "base_currency": base_currency,
+        "rates": {code: round(rate, 4) for code, rate in rates.items()},
+        "last_updated": snap.as_of,
+        "rates_version": snap.version,
+    }
+
+
+def convert_currency(amount, from_currency, to_currency):
+    """Convert one amount between two supported currencies (codes in any case)."""
+    from_currency, to_currency = from_currency.strip().upper(), to_currency.strip().upper()
+    snap = fx.snapshot()
+    for code in (from_currency, to_currency):
+        if code not in snap.index:
+            return {
+                "error": "Invalid currency",
+                "message": f"Currency must be one of: {', '.join(snap.currencies)}"
+            }
+    rate = snap.rate(from_currency, to_currency)
+    return {
+        "amount": amount,
+        "from_currency": from_currency,
+        "to_currency": to_currency,
+        "rate": round(rate, 6),
+        "converted_amount": round(amount * rate, 2),
+        "rates_version": snap.version,
+        "last_updated": snap.as_of,
+    }
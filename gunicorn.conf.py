@@ -0,0 +1,49 @@
+# gunicorn.conf.py
+"""
+Multi-worker serving for the API (gunicorn reads this file from the working
+directory):
+
+    WEB_CONCURRENCY=4 gunicorn api.server:app
+
+With more than one worker every process opens the same SQLite ledger
+(BANK_DB_PATH, WAL mode), so accounts and balances are shared, and
+BANK_SHARED_STATE=1 moves sessions, transfer velocity windows and
+appointment calendars into that file too. Reads stay local: each worker
+queries the ledger on its own connections, with no coordinator in between.
+Metrics are merged across workers through METRICS_DIR. The in-memory
+ledger (BANK_STORAGE=memory) only works with a single worker.
+"""
+import multiprocessing
+import os
+import tempfile
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+# workers import the app after the fork, so no SQLite connection or thread crosses it
+preload_app = False
+keepalive = 5
+
+if workers > 1:
+    if os.getenv("BANK_STORAGE", "sqlite").lower() != "sqlite":
+        raise RuntimeError("Several workers need BANK_STORAGE=sqlite: the memory ledger lives in one process")
+    os.environ.setdefault("BANK_SHARED_STATE", "1")
+    # one credential hashing pool per worker: split the cores rather than multiply them
+    os.environ.setdefault("CREDENTIAL_WORKERS", str(max(1, multiprocessing.cpu_count() // workers)))
+    os.environ.setdefault("METRICS_DIR", tempfile.mkdtemp(prefix="securebank-metrics-"))
+
+
+def post_worker_init(worker):
+    if os.getenv("METRICS_DIR"):
+        from metrics import metrics
+        metrics.share(os.environ["METRICS_DIR"])
+
+
+def child_exit(server, worker):
+    # a finished worker's values leave the totals (scrapers see a counter reset)
+    directory = os.getenv("METRICS_DIR")
+    if directory:
+        try:
+            os.remove(os.path.join(directory, f"{worker.pid}.json"))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,155 @@
+# intent_router.py
+
+import argparse
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import NamedTuple, Optional
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_TRAINING_FILE = os.path.join(_HERE, "intent_training.jsonl")
+DEFAULT_MODEL_FILE = os.path.join(_HERE, "intent_model.json")
+
+# intent -> (specialized agent, registry action that answers it without the model)
+INTENTS = {
+    "balance": ("account", "check_balance"),
+    "history": ("account", "transaction_history"),
+    "loan_rates": ("loan", "loan_info"),
+    "account": ("account", None),
+    "transfer": ("transfer", None),
+    "loan": ("loan", None),
+    "investment": ("investment", None),
+}
+
+# Unambiguous phrasings that skip the model; checked in order
+RULES = [
+    ("balance", re.compile(r"\b(?:my|account|current|available|remaining) balance\b|\bhow much (?:money|cash|funds?) (?:do|have) i\b")),
+    ("history", re.compile(r"\btransaction (?:history|list|log)\b|\brecent (?:transactions|activity|payments)\b|\baccount (?:activity|history|statement)\b")),
+    ("loan_rates", re.compile(r"\b(?:loan|mortgage|lending) (?:interest )?(?:rates?|apr)\b|\binterest rates? (?:on|for) (?:a |an )?\w* ?(?:loan|mortgage)s?\b")),
+]
+
+# Below this model confidence the message is routed, but never answered directly
+MIN_DIRECT_CONFIDENCE = 0.9
+
+_TOKEN = re.compile(r"sbi\d+|\d+|[a-z]+")
+
+
+class Route(NamedTuple):
+    intent: str
+    agent_type: str
+    action: Optional[str]
+    confidence: float
+    source: str  # "rule" or "model"
+
+
+def features(text):
+    """
+    Distinct word unigrams and bigrams, lightly stemmed, with numbers and
+    account numbers collapsed. Repeating a phrase doesn't add weight to it.
+    """
+    words = []
+    for token in _TOKEN.findall(text.lower().replace("'", "")):
+        if token.startswith("sbi"):
+            token = "<account>"
+        elif token.isdigit():
+            token = "<number>"
+        elif len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        words.append(token)
+    return set(words).union(f"{a} {b}" for a, b in zip(words, words[1:]))
+
+
+def train(examples, alpha=0.1):
+    """Fit a multinomial naive Bayes model to (text, intent) pairs; returns its JSON form."""
+    labels = sorted({intent for _, intent in examples})
+    label_counts = Counter(intent for _, intent in examples)
+    feature_counts = defaultdict(Counter)
+    for text, intent in examples:
+        feature_counts[intent].update(features(text))
+    vocabulary = sorted(set().union(*feature_counts.values()))
+    log_likelihoods = {feature: [] for feature in vocabulary}
+    for label in labels:
+        counts = feature_counts[label]
+        denominator = math.log(sum(counts.values()) + alpha * len(vocabulary))
+        for feature in vocabulary:
+            log_likelihoods[feature].append(round(math.log(counts[feature] + alpha) - denominator, 5))
+    return {
+        "labels": labels,
+        "log_priors": [round(math.log(label_counts[label] / len(examples)), 5) for label in labels],
+        "log_likelihoods": log_likelihoods,
+    }
+
+
+class IntentRouter:
+    """
+    Picks the specialized agent for a chat message, and the registry action
+    that can answer it directly when the request is deterministic.
+
+    Regex rules catch the unambiguous phrasings; everything else goes to a
+    naive Bayes model over word n-grams, trained offline
+    (`python -m intent_router train`) and loaded from JSON at startup.
+    Classification is a handful of dict lookups, well under a millisecond.
+    """
+
+    def __init__(self, model):
+        self.labels = model["labels"]
+        self.log_priors = model["log_priors"]
+        self.log_likelihoods = {feature: tuple(values) for feature, values in model["log_likelihoods"].items()}
+
+    @classmethod
+    def load(cls, path=None):
+        with open(path or os.getenv("INTENT_MODEL_FILE", DEFAULT_MODEL_FILE), encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def classify(self, text):
+        """Return (intent, confidence) from the model alone."""
+        scores = list(self.log_priors)
+        for feature in features(text):
+            weights = self.log_likelihoods.get(feature)
+            if weights is not None:
+                scores = [score + weight for score, weight in zip(scores, weights)]
+        best = max(range(len(scores)), key=scores.__getitem__)
+        top = scores[best]
+        confidence = 1.0 / sum(math.exp(score - top) for score in scores)
+        return self.labels[best], confidence
+
+    def route(self, text):
+        lowered = text.lower()
+        for intent, pattern in RULES:
+            if pattern.search(lowered):
+                agent_type, action = INTENTS[intent]
+                return Route(intent, agent_type, action, 1.0, "rule")
+        intent, confidence = self.classify(text)
+        agent_type, action = INTENTS[intent]
+        if confidence < MIN_DIRECT_CONFIDENCE:
+            action = None
+        return Route(intent, agent_type, action, confidence, "model")
+
+
+def load_examples(path):
+    with open(path, encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row["text"], row["intent"]) for row in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the chatbot intent model")
+    parser.add_argument("command", choices=["train"])
+    parser.add_argument("--data", default=DEFAULT_TRAINING_FILE)
+    parser.add_argument("--out", default=DEFAULT_MODEL_FILE)
+    args = parser.parse_args()
+
+    examples = load_examples(args.data)
+    unknown = {intent for _, intent in examples} - INTENTS.keys()
+    if unknown:
+        raise SystemExit(f"Unknown intents in {args.data}: {', '.join(sorted(unknown))}")
+    model = train(examples)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(model, f, separators=(",", ":"))
+    print(f"Trained on {len(examples)} examples, {len(model['log_likelihoods'])} features -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,944 @@
+# ledger_store.py
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from array import array
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Transfer outcomes returned by LedgerStore.transfer
+TRANSFER_OK = "ok"
+SENDER_NOT_FOUND = "sender_not_found"
+RECIPIENT_NOT_FOUND = "recipient_not_found"
+INSUFFICIENT_FUNDS = "insufficient_funds"
+
+# Transaction type codes (stored as small integers, rendered on read)
+TX_SENT = 1
+TX_RECEIVED = 2
+TX_INTEREST = 3
+TX_TYPE_NAMES = {TX_SENT: "Sent", TX_RECEIVED: "Received", TX_INTEREST: "Interest"}
+
+
+def period_keys(timestamp):
+    """Return the ("YYYY-MM-DD", "YYYY-MM") aggregate buckets for a local timestamp."""
+    t = time.localtime(timestamp)
+    month = f"{t.tm_year:04d}-{t.tm_mon:02d}"
+    return f"{month}-{t.tm_mday:02d}", month
+
+
+def empty_totals():
+    return {"sent_cents": 0, "sent_count": 0, "received_cents": 0, "received_count": 0}
+
+
+def counts_from(period, day):
+    """
+    True for the period_keys buckets that together cover everything from the
+    local day "YYYY-MM-DD" onwards, without overlap: the months after the
+    day's month, then the days from `day` to the end of its month.
+    """
+    if len(period) == 7:
+        return period > day[:7]
+    return period >= day and period[:7] == day[:7]
+
+
+class LedgerStore(ABC):
+    """
+    Storage backend interface for accounts and transactions.
+    Amounts are integer cents and times are epoch seconds.
+    """
+
+    @abstractmethod
+    def add_account(self, account_number, name, password, balance_cents, created_at):
+        """Insert a new account. Returns False if the number is already taken."""
+
+    @abstractmethod
+    def get_account(self, account_number):
+        """Return a dict with name, password, balance_cents and created_at, or None."""
+
+    @abstractmethod
+    def transfer(self, from_acc, to_acc, amount_cents, timestamp):
+        """Move money between two accounts and record both legs. Returns a TRANSFER_* status."""
+
+    @abstractmethod
+    def get_transactions(self, account_number):
+        """Return the account's transactions in chronological order."""
+
+    @abstractmethod
+    def get_transaction_page(self, account_number, before=None, limit=20):
+        """
+        Return (transactions, next_cursor) with the newest transactions first.
+        Pass next_cursor back as `before` to fetch the next older page;
+        it is None once the oldest transaction has been returned.
+        """
+
+    @abstractmethod
+    def get_transactions_between(self, account_number, start, end, after=None, limit=200):
+        """
+        Return (transactions, next_cursor) for up to `limit` transactions with
+        start <= timestamp < end, in chronological order. Pass next_cursor
+        back as `after` to fetch the next page; it is None once the range
+        has been returned in full.
+        """
+
+    @abstractmethod
+    def get_period_totals(self, account_number, period):
+        """
+        Return sent/received totals and counts for a "YYYY-MM-DD" day or
+        "YYYY-MM" month. Totals are maintained on every transfer.
+        """
+
+    @abstractmethod
+    def balance_snapshot(self):
+        """Return (account numbers, balances in cents) for every account, read consistently."""
+
+    @abstractmethod
+    def get_statement_bounds(self, account_number, first_day, after_day):
+        """
+        Return (opening cents, closing cents, through_id) for a statement of
+        local days first_day <= day < after_day ("YYYY-MM-DD"), or None for
+        an unknown account. Balances at the start of a day are worked back
+        from the current balance through the period totals (whole months
+        where possible, days otherwise), so no transactions are replayed.
+        through_id is the newest transaction id at that moment: rows after
+        it are not part of the statement. Everything is read consistently.
+        """
+
+    @abstractmethod
+    def iter_transactions_between(self, account_number, start, end, through_id, chunk_size=5000):
+        """
+        Yield lists of up to `chunk_size` (id, type, amount_cents, timestamp)
+        tuples with start <= timestamp < end and id <= through_id, in
+        chronological order, fetching one chunk at a time.
+        """
+
+    @abstractmethod
+    def post_interest(self, credits, timestamp, accrual_date):
+        """
+        Credit (account_number, cents) pairs and record each as an Interest
+        transaction (counted as received in the period totals), in one write.
+        Accounts already credited for the local day accrual_date ("YYYY-MM-DD")
+        or a later one are skipped; the rest are marked as credited for it.
+        Returns (accounts credited, cents posted).
+        """
+
+    @abstractmethod
+    def accrual_completed(self, accrual_date):
+        """True once complete_accrual has been called for accrual_date."""
+
+    @abstractmethod
+    def complete_accrual(self, accrual_date, timestamp):
+        """Record that every account has been credited for accrual_date."""
+
+    @abstractmethod
+    def reserve_block(self, sequence, size):
+        """Atomically reserve `size` consecutive values of a named sequence; returns the first."""
+
+    @contextmanager
+    def batch(self):
+        """Group several writes into one commit where the backend supports it."""
+        yield self
+
+
+class TransactionColumns:
+    """
+    Append-only, column-oriented transaction log for one account.
+    Each entry costs 17 bytes (type code, cents, epoch seconds) instead of a
+    dict holding two strings. Timestamps never decrease, so time ranges are
+    found by binary search.
+    """
+
+    __slots__ = ("types", "amounts", "timestamps")
+
+    def __init__(self):
+        self.types = array("B")
+        self.amounts = array("q")
+        self.timestamps = array("d")
+
+    def __len__(self):
+        return len(self.types)
+
+    def append(self, tx_type, amount_cents, timestamp):
+        # clamp clock steps backwards so the timestamp column stays sorted
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            timestamp = self.timestamps[-1]
+        self.types.append(tx_type)
+        self.amounts.append(amount_cents)
+        self.timestamps.append(timestamp)
+
+    def record(self, index):
+        return {
+            "id": index,
+            "type": self.types[index],
+            "amount_cents": self.amounts[index],
+            "timestamp": self.timestamps[index],
+        }
+
+    def index_range(self, start, end):
+        return bisect_left(self.timestamps, start), bisect_left(self.timestamps, end)
+
+
+class MemoryLedgerStore(LedgerStore):
+    """
+    Process-local backend: accounts in a dict, transactions in per-account
+    TransactionColumns.
+
+    Accounts are guarded by a fixed pool of striped locks. A transfer takes the
+    stripes of both accounts in ascending stripe order, so two transfers can
+    never wait on each other in a cycle, and transfers on unrelated stripes do
+    not contend.
+    """
+
+    def __init__(self, lock_stripes=64):
+        self.users = {}
+        self.transactions = {}
+        self.totals = {}
+        self.sequences = {}
+        self.accrued_on = {}
+        self.accrual_runs = {}
+        self._sequence_lock = threading.Lock()
+        # RLocks so callers already holding a stripe can re-enter it
+        self._locks = [threading.RLock() for _ in range(lock_stripes)]
+
+    def _stripe(self, account_number):
+        return hash(account_number) % len(self._locks)
+
+    @contextmanager
+    def _locked(self, *account_numbers):
+        stripes = sorted({self._stripe(acc) for acc in account_numbers})
+        for stripe in stripes:
+            self._locks[stripe].acquire()
+        try:
+            yield
+        finally:
+            for stripe in reversed(stripes):
+                self._locks[stripe].release()
+
+    def add_account(self, account_number, name, password, balance_cents, created_at):
+        with self._locked(account_number):
+            if account_number in self.users:
+                return False
+            self.transactions[account_number] = TransactionColumns()
+            self.totals[account_number] = {}
+            self.users[account_number] = {
+                "name": name,
+                "password": password,
+                "balance_cents": balance_cents,
+                "created_at": created_at,
+            }
+        return True
+
+    def get_account(self, account_number):
+        with self._locked(account_number):
+            user = self.users.get(account_number)
+            return dict(user) if user else None
+
+    def transfer(self, from_acc, to_acc, amount_cents, timestamp):
+        with self._locked(from_acc, to_acc):
+            sender = self.users.get(from_acc)
+            receiver = self.users.get(to_acc)
+
+            if not sender:
+                return SENDER_NOT_FOUND
+            if not receiver:
+                return RECIPIENT_NOT_FOUND
+            if sender["balance_cents"] < amount_cents:
+                return INSUFFICIENT_FUNDS
+
+            sender["balance_cents"] -= amount_cents
+            receiver["balance_cents"] += amount_cents
+            self.transactions[from_acc].append(TX_SENT, amount_cents, timestamp)
+            self.transactions[to_acc].append(TX_RECEIVED, amount_cents, timestamp)
+            for period in period_keys(timestamp):
+                sent = self.totals[from_acc].setdefault(period, empty_totals())
+                sent["sent_cents"] += amount_cents
+                sent["sent_count"] += 1
+                received = self.totals[to_acc].setdefault(period, empty_totals())
+                received["received_cents"] += amount_cents
+                received["received_count"] += 1
+        return TRANSFER_OK
+
+    def get_transactions(self, account_number):
+        with self._locked(account_number):
+            txs = self.transactions.get(account_number)
+            if txs is None:
+                return []
+            return [txs.record(i) for i in range(len(txs))]
+
+    def get_transaction_page(self, account_number, before=None, limit=20):
+        # transaction ids are positions in the account's append-only columns
+        with self._locked(account_number):
+            txs = self.transactions.get(account_number)
+            if txs is None:
+                return [], None
+            end = len(txs) if before is None else min(before, len(txs))
+            start = max(0, end - limit)
+            page = [txs.record(i) for i in range(end - 1, start - 1, -1)]
+        return page, (start if start > 0 else None)
+
+    def get_transactions_between(self, account_number, start, end, after=None, limit=200):
+        with self._locked(account_number):
+            txs = self.transactions.get(account_number)
+            if txs is None:
+                return [], None
+            first, last = txs.index_range(start, end)
+            if after is not None:
+                first = max(first, after + 1)
+            stop = min(last, first + limit)
+            page = [txs.record(i) for i in range(first, stop)]
+        return page, (stop - 1 if stop < last else None)
+
+    def get_period_totals(self, account_number, period):
+        with self._locked(account_number):
+            totals = self.totals.get(account_number, {}).get(period)
+            return dict(totals) if totals else empty_totals()
+
+    def balance_snapshot(self):
+        with self.batch():
+            accounts = list(self.users)
+            return accounts, [self.users[acc]["balance_cents"] for acc in accounts]
+
+    def get_statement_bounds(self, account_number, first_day, after_day):
+        with self._locked(account_number):
+            user = self.users.get(account_number)
+            if user is None:
+                return None
+            balance = user["balance_cents"]
+            opening = closing = balance
+            for period, totals in self.totals[account_number].items():
+                net = totals["received_cents"] - totals["sent_cents"]
+                if counts_from(period, first_day):
+                    opening -= net
+                if counts_from(period, after_day):
+                    closing -= net
+            # transaction ids are positions in the account's columns
+            return opening, closing, len(self.transactions[account_number]) - 1
+
+    def iter_transactions_between(self, account_number, start, end, through_id, chunk_size=5000):
+        with self._locked(account_number):
+            txs = self.transactions.get(account_number)
+            if txs is None:
+                return
+            first, last = txs.index_range(start, end)
+        last = min(last, through_id + 1)
+        for chunk_start in range(first, last, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, last)
+            # the columns only grow, so positions read here never move
+            with self._locked(account_number):
+                rows = list(zip(
+                    range(chunk_start, chunk_end),
+                    txs.types[chunk_start:chunk_end],
+                    txs.amounts[chunk_start:chunk_end],
+                    txs.timestamps[chunk_start:chunk_end],
+                ))
+            yield rows
+
+    def post_interest(self, credits, timestamp, accrual_date):
+        periods = period_keys(timestamp)
+        users, transactions, all_totals, accrued_on = self.users, self.transactions, self.totals, self.accrued_on
+        credited = posted = 0
+        with self.batch():
+            for account_number, cents in credits:
+                user = users.get(account_number)
+                if user is None or accrued_on.get(account_number, "") >= accrual_date:
+                    continue
+                accrued_on[account_number] = accrual_date
+                credited += 1
+                posted += cents
+                user["balance_cents"] += cents
+                transactions[account_number].append(TX_INTEREST, cents, timestamp)
+                account_totals = all_totals[account_number]
+                for period in periods:
+                    totals = account_totals.get(period)
+                    if totals is None:
+                        totals = account_totals[period] = empty_totals()
+                    totals["received_cents"] += cents
+                    totals["received_count"] += 1
+        return credited, posted
+
+    def accrual_completed(self, accrual_date):
+        return accrual_date in self.accrual_runs
+
+    def complete_accrual(self, accrual_date, timestamp):
+        self.accrual_runs.setdefault(accrual_date, timestamp)
+
+    def reserve_block(self, sequence, size):
+        with self._sequence_lock:
+            start = self.sequences.get(sequence, 1)
+            self.sequences[sequence] = start + size
+        return start
+
+    @contextmanager
+    def batch(self):
+        """Hold every stripe so the grouped operations see one consistent ledger."""
+        for lock in self._locks:
+            lock.acquire()
+        try:
+            yield self
+        finally:
+            for lock in reversed(self._locks):
+                lock.release()
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS accounts (
+    account_number TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    password TEXT NOT NULL,
+    balance_cents INTEGER NOT NULL,
+    created_at REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS transactions (
+    id INTEGER PRIMARY KEY,
+    account_number TEXT NOT NULL,
+    type INTEGER NOT NULL,
+    amount_cents INTEGER NOT NULL,
+    timestamp REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_account
+    ON transactions (account_number, id);
+
+CREATE INDEX IF NOT EXISTS idx_transactions_account_time
+    ON transactions (account_number, timestamp);
+
+CREATE TABLE IF NOT EXISTS period_totals (
+    account_number TEXT NOT NULL,
+    period TEXT NOT NULL,
+    sent_cents INTEGER NOT NULL DEFAULT 0,
+    sent_count INTEGER NOT NULL DEFAULT 0,
+    received_cents INTEGER NOT NULL DEFAULT 0,
+    received_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (account_number, period)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS sequences (
+    name TEXT PRIMARY KEY,
+    next_value INTEGER NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS interest_accruals (
+    account_number TEXT PRIMARY KEY,
+    accrued_on TEXT NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS interest_runs (
+    accrual_date TEXT PRIMARY KEY,
+    completed_at REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS sessions (
+    token TEXT PRIMARY KEY,
+    account_number TEXT NOT NULL,
+    expires_at REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_sessions_expiry ON sessions (expires_at);
+
+CREATE TABLE IF NOT EXISTS velocity_buckets (
+    account_number TEXT NOT NULL,
+    window_key TEXT NOT NULL,
+    epoch INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    cents INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (account_number, window_key, epoch)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_velocity_buckets_updated ON velocity_buckets (updated_at);
+
+CREATE TABLE IF NOT EXISTS velocity_recipients (
+    account_number TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    epoch INTEGER NOT NULL,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (account_number, recipient)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_velocity_recipients_seen ON velocity_recipients (seen_at);
+
+CREATE TABLE IF NOT EXISTS appointments (
+    appointment_id TEXT PRIMARY KEY,
+    service TEXT NOT NULL,
+    day TEXT NOT NULL,
+    slot INTEGER NOT NULL,
+    account_number TEXT NOT NULL,
+    UNIQUE (service, day, slot)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_SENT = """
+INSERT INTO period_totals (account_number, period, sent_cents, sent_count)
+VALUES (?, ?, ?, 1)
+ON CONFLICT (account_number, period) DO UPDATE SET
+    sent_cents = sent_cents + excluded.sent_cents,
+    sent_count = sent_count + 1
+"""
+
+_UPSERT_RECEIVED = """
+INSERT INTO period_totals (account_number, period, received_cents, received_count)
+VALUES (?, ?, ?, 1)
+ON CONFLICT (account_number, period) DO UPDATE SET
+    received_cents = received_cents + excluded.received_cents,
+    received_count = received_count + 1
+"""
+
+# Net cents (received - sent) from a local day onwards: whole months after
+# the day's month, then the day and the rest of its month
+_NET_SINCE = """
+SELECT COALESCE(SUM(received_cents - sent_cents), 0) FROM period_totals
+WHERE account_number = ? AND period > ? AND (length(period) = 7 OR (period >= ? AND period < ?))
+"""
+
+
+def _net_since_params(account_number, day):
+    month = day[:7]
+    return account_number, month, day, month + "-32"
+
+
+class SQLiteLedgerStore(LedgerStore):
+    """
+    SQLite backend running in WAL mode.
+    Each thread gets its own connection; statements are parameterised so
+    sqlite3's per-connection statement cache reuses the compiled plans.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path,
+                isolation_level=None,  # transactions are managed explicitly
+                check_same_thread=False,
+                cached_statements=256,
+                timeout=30,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=OFF")
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    @contextmanager
+    def _write(self):
+        """Open a write transaction, or join the one already open on this thread."""
+        conn = self._connection()
+        if self._local.depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        self._local.depth += 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth -= 1
+            if self._local.depth == 0:
+                conn.execute("ROLLBACK")
+            raise
+        self._local.depth -= 1
+        if self._local.depth == 0:
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def batch(self):
+        with self._write():
+            yield self
+
+    def add_account(self, account_number, name, password, balance_cents, created_at):
+        try:
+            with self._write() as conn:
+                conn.execute(
+                    "INSERT INTO accounts (account_number, name, password, balance_cents, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (account_number, name, password, balance_cents, created_at),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def get_account(self, account_number):
+        row = self._connection().execute(
+            "SELECT name, password, balance_cents, created_at FROM accounts WHERE account_number = ?",
+            (account_number,),
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "name": row[0],
+            "password": row[1],
+            "balance_cents": row[2],
+            "created_at": row[3],
+        }
+
+    def transfer(self, from_acc, to_acc, amount_cents, timestamp):
+        with self._write() as conn:
+            sender = conn.execute(
+                "SELECT balance_cents FROM accounts WHERE account_number = ?", (from_acc,)
+            ).fetchone()
+            if sender is None:
+                return SENDER_NOT_FOUND
+            receiver = conn.execute(
+                "SELECT 1 FROM accounts WHERE account_number = ?", (to_acc,)
+            ).fetchone()
+            if receiver is None:
+                return RECIPIENT_NOT_FOUND
+            if sender[0] < amount_cents:
+                return INSUFFICIENT_FUNDS
+
+            conn.execute(
+                "UPDATE accounts SET balance_cents = balance_cents - ? WHERE account_number = ?",
+                (amount_cents, from_acc),
+            )
+            conn.execute(
+                "UPDATE accounts SET balance_cents = balance_cents + ? WHERE account_number = ?",
+                (amount_cents, to_acc),
+            )
+            conn.executemany(
+                "INSERT INTO transactions (account_number, type, amount_cents, timestamp) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    (from_acc, TX_SENT, amount_cents, timestamp),
+                    (to_acc, TX_RECEIVED, amount_cents, timestamp),
+                ),
+            )
+            periods = period_keys(timestamp)
+            conn.executemany(_UPSERT_SENT, [(from_acc, p, amount_cents) for p in periods])
+            conn.executemany(_UPSERT_RECEIVED, [(to_acc, p, amount_cents) for p in periods])
+        return TRANSFER_OK
+
+    def get_transactions(self, account_number):
+        rows = self._connection().execute(
+            "SELECT id, type, amount_cents, timestamp FROM transactions "
+            "WHERE account_number = ? ORDER BY id",
+            (account_number,),
+        )
+        return [
+            {"id": row[0], "type": row[1], "amount_cents": row[2], "timestamp": row[3]}
+            for row in rows
+        ]
+
+    def get_transaction_page(self, account_number, before=None, limit=20):
+        # fetch one extra row to learn whether an older page exists
+        if before is None:
+            rows = self._connection().execute(
+                "SELECT id, type, amount_cents, timestamp FROM transactions "
+                "WHERE account_number = ? ORDER BY id DESC LIMIT ?",
+                (account_number, limit + 1),
+            ).fetchall()
+        else:
+            rows = self._connection().execute(
+                "SELECT id, type, amount_cents, timestamp FROM transactions "
+                "WHERE account_number = ? AND id < ? ORDER BY id DESC LIMIT ?",
+                (account_number, before, limit + 1),
+            ).fetchall()
+        page = [
+            {"id": row[0], "type": row[1], "amount_cents": row[2], "timestamp": row[3]}
+            for row in rows[:limit]
+        ]
+        next_cursor = page[-1]["id"] if len(rows) > limit else None
+        return page, next_cursor
+
+    def get_transactions_between(self, account_number, start, end, after=None, limit=200):
+        # keyset pagination on (timestamp, id), resuming after the cursor's row;
+        # one extra row tells whether another page exists
+        if after is None:
+            rows = self._connection().execute(
+                "SELECT id, type, amount_cents, timestamp FROM transactions "
+                "WHERE account_number = ? AND timestamp >= ? AND timestamp < ? "
+                "ORDER BY timestamp, id LIMIT ?",
+                (account_number, start, end, limit + 1),
+            ).fetchall()
+        else:
+            rows = self._connection().execute(
+                "SELECT id, type, amount_cents, timestamp FROM transactions "
+                "WHERE account_number = ? AND timestamp >= ? AND timestamp < ? "
+                "AND (timestamp, id) > (SELECT timestamp, id FROM transactions WHERE id = ?) "
+                "ORDER BY timestamp, id LIMIT ?",
+                (account_number, start, end, after, limit + 1),
+            ).fetchall()
+        page = [
+            {"id": row[0], "type": row[1], "amount_cents": row[2], "timestamp": row[3]}
+            for row in rows[:limit]
+        ]
+        next_cursor = page[-1]["id"] if len(rows) > limit else None
+        return page, next_cursor
+
+    @contextmanager
+    def _snapshot(self):
+        """Read several statements from one WAL snapshot (or the write transaction already open)."""
+        conn = self._connection()
+        if self._local.depth:
+            yield conn
+            return
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    def get_statement_bounds(self, account_number, first_day, after_day):
+        with self._snapshot() as conn:
+            row = conn.execute(
+                "SELECT balance_cents FROM accounts WHERE account_number = ?", (account_number,)
+            ).fetchone()
+            if row is None:
+                return None
+            balance = row[0]
+            opening = balance - conn.execute(_NET_SINCE, _net_since_params(account_number, first_day)).fetchone()[0]
+            closing = balance - conn.execute(_NET_SINCE, _net_since_params(account_number, after_day)).fetchone()[0]
+            through_id = conn.execute(
+                "SELECT MAX(id) FROM transactions WHERE account_number = ?", (account_number,)
+            ).fetchone()[0]
+        return opening, closing, through_id or 0
+
+    def iter_transactions_between(self, account_number, start, end, through_id, chunk_size=5000):
+        # keyset pagination on (timestamp, id): each chunk is one short indexed query
+        last_timestamp, last_id = start, 0
+        while True:
+            rows = self._connection().execute(
+                "SELECT id, type, amount_cents, timestamp FROM transactions "
+                "WHERE account_number = ? AND timestamp >= ? AND timestamp < ? AND id <= ? "
+                "AND (timestamp > ? OR id > ?) ORDER BY timestamp, id LIMIT ?",
+                (account_number, last_timestamp, end, through_id, last_timestamp, last_id, chunk_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield rows
+            if len(rows) < chunk_size:
+                return
+            last_id, last_timestamp = rows[-1][0], rows[-1][3]
+
+    def balance_snapshot(self):
+        # a single SELECT reads one consistent WAL snapshot
+        rows = self._connection().execute(
+            "SELECT account_number, balance_cents FROM accounts"
+        ).fetchall()
+        return [row[0] for row in rows], [row[1] for row in rows]
+
+    def post_interest(self, credits, timestamp, accrual_date):
+        periods = period_keys(timestamp)
+        with self._write() as conn:
+            # decided inside the write lock, so two runs for one day can't both credit an account
+            done = {row[0] for row in conn.execute(
+                "SELECT a.account_number FROM interest_accruals a "
+                "JOIN json_each(?) j ON a.account_number = j.value WHERE a.accrued_on >= ?",
+                (json.dumps([acc for acc, _ in credits]), accrual_date),
+            )}
+            credits = [(acc, cents) for acc, cents in credits if acc not in done]
+            conn.executemany(
+                "UPDATE accounts SET balance_cents = balance_cents + ? WHERE account_number = ?",
+                ((cents, acc) for acc, cents in credits),
+            )
+            conn.executemany(
+                "INSERT INTO transactions (account_number, type, amount_cents, timestamp) "
+                "VALUES (?, ?, ?, ?)",
+                ((acc, TX_INTEREST, cents, timestamp) for acc, cents in credits),
+            )
+            conn.executemany(
+                _UPSERT_RECEIVED,
+                ((acc, period, cents) for acc, cents in credits for period in periods),
+            )
+            conn.executemany(
+                "INSERT INTO interest_accruals (account_number, accrued_on) VALUES (?, ?) "
+                "ON CONFLICT (account_number) DO UPDATE SET accrued_on = excluded.accrued_on",
+                ((acc, accrual_date) for acc, _ in credits),
+            )
+        return len(credits), sum(cents for _, cents in credits)
+
+    def accrual_completed(self, accrual_date):
+        row = self._connection().execute(
+            "SELECT 1 FROM interest_runs WHERE accrual_date = ?", (accrual_date,)
+        ).fetchone()
+        return row is not None
+
+    def complete_accrual(self, accrual_date, timestamp):
+        with self._write() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO interest_runs (accrual_date, completed_at) VALUES (?, ?)",
+                (accrual_date, timestamp),
+            )
+
+    def reserve_block(self, sequence, size):
+        # the write lock makes the read-and-advance atomic across processes
+        with self._write() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO sequences (name, next_value) VALUES (?, 1)", (sequence,)
+            )
+            row = conn.execute(
+                "UPDATE sequences SET next_value = next_value + ? WHERE name = ? "
+                "RETURNING next_value - ?",
+                (size, sequence, size),
+            ).fetchone()
+        return row[0]
+
+    def get_period_totals(self, account_number, period):
+        row = self._connection().execute(
+            "SELECT sent_cents, sent_count, received_cents, received_count FROM period_totals "
+            "WHERE account_number = ? AND period = ?",
+            (account_number, period),
+        ).fetchone()
+        if row is None:
+            return empty_totals()
+        return {
+            "sent_cents": row[0],
+            "sent_count": row[1],
+            "received_cents": row[2],
+            "received_count": row[3],
+        }
+
+    # Worker state shared through the ledger file (BANK_SHARED_STATE=1), so
+    # every gunicorn worker sees the same sessions, velocity windows and
+    # appointment calendars. Only the SQLite backend can be shared.
+
+    def add_session(self, token, account_number, expires_at):
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO sessions (token, account_number, expires_at) VALUES (?, ?, ?)",
+                (token, account_number, expires_at),
+            )
+
+    def get_session(self, token):
+        """Return (account_number, expires_at) for a token, or None."""
+        return self._connection().execute(
+            "SELECT account_number, expires_at FROM sessions WHERE token = ?", (token,)
+        ).fetchone()
+
+    def touch_session(self, token, expires_at):
+        with self._write() as conn:
+            conn.execute("UPDATE sessions SET expires_at = ? WHERE token = ?", (expires_at, token))
+
+    def delete_session(self, token):
+        with self._write() as conn:
+            return conn.execute("DELETE FROM sessions WHERE token = ?", (token,)).rowcount > 0
+
+    def purge_sessions(self, now, max_sessions):
+        """Drop expired sessions, then the soonest to expire beyond `max_sessions`; returns how many were evicted."""
+        with self._write() as conn:
+            conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+            return conn.execute(
+                "DELETE FROM sessions WHERE token IN "
+                "(SELECT token FROM sessions ORDER BY expires_at LIMIT max(0, (SELECT COUNT(*) FROM sessions) - ?))",
+                (max_sessions,),
+            ).rowcount
+
+    def count_sessions(self):
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def velocity_totals(self, account_number, ranges):
+        """
+        Sum a sender's buckets per window: `ranges` are (window key, oldest
+        epoch) pairs; returns a (count, cents) pair for each. Each sum reads
+        at most one window's worth of rows from the primary key.
+        """
+        conn = self._connection()
+        return [
+            conn.execute(
+                "SELECT COALESCE(SUM(count), 0), COALESCE(SUM(cents), 0) FROM velocity_buckets "
+                "WHERE account_number = ? AND window_key = ? AND epoch >= ?",
+                (account_number, window_key, oldest),
+            ).fetchone()
+            for window_key, oldest in ranges
+        ]
+
+    def add_velocity(self, account_number, changes, updated_at):
+        """Add (window key, epoch, count, cents) deltas to a sender's buckets."""
+        with self._write() as conn:
+            conn.executemany(
+                "INSERT INTO velocity_buckets (account_number, window_key, epoch, count, cents, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (account_number, window_key, epoch) DO UPDATE SET "
+                "count = count + excluded.count, cents = cents + excluded.cents, updated_at = excluded.updated_at",
+                ((account_number, window_key, epoch, count, cents, updated_at)
+                 for window_key, epoch, count, cents in changes),
+            )
+
+    def get_velocity_recipient(self, account_number, recipient):
+        """Return the fan-out bucket the sender last paid `recipient` in, or None."""
+        row = self._connection().execute(
+            "SELECT epoch FROM velocity_recipients WHERE account_number = ? AND recipient = ?",
+            (account_number, recipient),
+        ).fetchone()
+        return row[0] if row else None
+
+    def put_velocity_recipient(self, account_number, recipient, epoch, seen_at):
+        with self._write() as conn:
+            conn.execute(
+                "INSERT INTO velocity_recipients (account_number, recipient, epoch, seen_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (account_number, recipient) DO UPDATE SET "
+                "epoch = excluded.epoch, seen_at = excluded.seen_at",
+                (account_number, recipient, epoch, seen_at),
+            )
+
+    def purge_velocity_state(self, before):
+        """Drop buckets and recipients not touched since `before`; returns how many rows went."""
+        with self._write() as conn:
+            purged = conn.execute("DELETE FROM velocity_buckets WHERE updated_at < ?", (before,)).rowcount
+            return purged + conn.execute("DELETE FROM velocity_recipients WHERE seen_at < ?", (before,)).rowcount
+
+    def count_velocity_state(self):
+        """Number of senders with velocity buckets."""
+        return self._connection().execute(
+            "SELECT COUNT(DISTINCT account_number) FROM velocity_buckets"
+        ).fetchone()[0]
+
+    def add_appointment(self, appointment_id, service, day, slot, account_number):
+        """Take a calendar slot for an account; returns False if it is already booked."""
+        try:
+            with self._write() as conn:
+                conn.execute(
+                    "INSERT INTO appointments (appointment_id, service, day, slot, account_number) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (appointment_id, service, day, slot, account_number),
+                )
+        except sqlite3.IntegrityError:
+            return False
+        return True
+
+    def get_appointment(self, appointment_id):
+        """Return (service, "YYYY-MM-DD", slot, account_number), or None."""
+        return self._connection().execute(
+            "SELECT service, day, slot, account_number FROM appointments WHERE appointment_id = ?",
+            (appointment_id,),
+        ).fetchone()
+
+    def delete_appointment(self, appointment_id, account_number):
+        """Cancel the account's own booking; returns False if it has no such appointment."""
+        with self._write() as conn:
+            return conn.execute(
+                "DELETE FROM appointments WHERE appointment_id = ? AND account_number = ?",
+                (appointment_id, account_number),
+            ).rowcount > 0
+
+    def get_booked_slots(self, service, day):
+        return [row[0] for row in self._connection().execute(
+            "SELECT slot FROM appointments WHERE service = ? AND day = ?", (service, day)
+        )]
+
+
+def shared_state_enabled():
+    """True when several processes (gunicorn workers) serve the same ledger, see gunicorn.conf.py."""
+    return os.getenv("BANK_SHARED_STATE", "0") == "1"
+
+
+def create_store(backend=None, path=None):
+    """
+    Build the ledger backend selected by BANK_STORAGE ("sqlite" or "memory").
+    The SQLite file location comes from BANK_DB_PATH.
+    """
+    backend = (backend or os.getenv("BANK_STORAGE", "sqlite")).lower()
+    if backend == "memory":
+        if shared_state_enabled():
+            raise ValueError("BANK_SHARED_STATE needs the sqlite backend: the memory store lives in one process")
+        return MemoryLedgerStore()
+    if backend == "sqlite":
+        return SQLiteLedgerStore(path or os.getenv("BANK_DB_PATH", "securebank.db"))
+    raise ValueError(f"Unknown BANK_STORAGE backend: {backend}")
@@ -0,0 +1,115 @@
+# loan_engine.py
+
+from functools import lru_cache
+
+import numpy as np
+
+SCHEDULE_CACHE_SIZE = 1024
+
+
+def monthly_payment(principal, annual_rate, term_months):
+    """Level monthly payment for a fully amortizing loan (annual_rate in percent)."""
+    r = annual_rate / 100 / 12
+    if r == 0:
+        return principal / term_months
+    return principal * r / -np.expm1(-term_months * np.log1p(r))
+
+
+class LoanSchedule:
+    """
+    Full amortization schedule held as read-only NumPy columns, one row per
+    month: payment, interest, principal repaid and remaining balance.
+    """
+
+    __slots__ = ("principal", "annual_rate", "term_months", "extra_payment",
+                 "scheduled_payment", "payments", "interest", "principal_paid", "balance")
+
+    def __init__(self, principal, annual_rate, term_months, extra_payment):
+        self.principal = principal
+        self.annual_rate = annual_rate
+        self.term_months = term_months
+        self.extra_payment = extra_payment
+        self.scheduled_payment = float(monthly_payment(principal, annual_rate, term_months))
+
+        r = annual_rate / 100 / 12
+        paid = self.scheduled_payment + extra_payment
+        k = np.arange(1, term_months + 1, dtype=np.float64)
+        # closed-form balance after k payments of `paid`
+        if r == 0:
+            balance = principal - paid * k
+        else:
+            growth = np.exp(k * np.log1p(r))
+            balance = principal * growth - paid * (growth - 1) / r
+
+        # extra payments retire the loan early: stop at the first month the balance clears
+        cleared = np.flatnonzero(balance <= 1e-6)
+        months = int(cleared[0]) + 1 if cleared.size else term_months
+        balance = np.maximum(balance[:months], 0.0)
+        balance[-1] = 0.0
+
+        opening = np.concatenate(([float(principal)], balance[:-1]))
+        interest = opening * r
+        principal_paid = opening - balance
+        self.payments = principal_paid + interest
+        self.interest = interest
+        self.principal_paid = principal_paid
+        self.balance = balance
+        for column in (self.payments, self.interest, self.principal_paid, self.balance):
+            column.setflags(write=False)
+
+    def __len__(self):
+        return len(self.balance)
+
+    @property
+    def total_interest(self):
+        return float(self.interest.sum())
+
+    def rows(self, start, stop):
+        """Materialise only the requested months as dicts."""
+        return [
+            {
+                "month": month + 1,
+                "payment": round(payment, 2),
+                "interest": round(interest, 2),
+                "principal": round(principal, 2),
+                "balance": round(balance, 2),
+            }
+            for month, payment, interest, principal, balance in zip(
+                range(start, stop),
+                self.payments[start:stop].tolist(),
+                self.interest[start:stop].tolist(),
+                self.principal_paid[start:stop].tolist(),
+                self.balance[start:stop].tolist(),
+            )
+        ]
+
+
+@lru_cache(maxsize=SCHEDULE_CACHE_SIZE)
+def get_schedule(principal, annual_rate, term_months, extra_payment=0.0):
+    """Memoized LoanSchedule keyed by (principal, rate, term, extra payment)."""
+    return LoanSchedule(principal, annual_rate, term_months, extra_payment)
+
+
+def loan_schedule_page(principal, annual_rate, term_months, extra_payment=0.0, page=1, page_size=12):
+    """Loan summary plus one page of the amortization schedule."""
+    schedule = get_schedule(float(principal), float(annual_rate), int(term_months), float(extra_payment))
+    start = (page - 1) * page_size
+    stop = min(start + page_size, len(schedule))
+    summary = {
+        "principal": principal,
+        "annual_rate": annual_rate,
+        "term_months": term_months,
+        "monthly_payment": round(schedule.scheduled_payment, 2),
+        "extra_payment": extra_payment,
+        "payoff_months": len(schedule),
+        "total_interest": round(schedule.total_interest, 2),
+        "total_paid": round(principal + schedule.total_interest, 2),
+        "page": page,
+        "total_pages": -(-len(schedule) // page_size),
+        "schedule": schedule.rows(start, stop) if start < len(schedule) else [],
+    }
+    if extra_payment:
+        baseline = get_schedule(float(principal), float(annual_rate), int(term_months), 0.0)
+        summary["interest_saved"] = round(baseline.total_interest - schedule.total_interest, 2)
+        summary["months_saved"] = len(baseline) - len(schedule)
+    return summary
@@ -0,0 +1,105 @@
+# logging_setup.py
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+from datetime import datetime
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+_listener = None
+
+
+class JsonLineFormatter(logging.Formatter):
+    """Render each record as one JSON object per line."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves %-style formatting to the listener thread.
+    The stock handler formats in the caller; here the caller only enqueues.
+    """
+
+    def prepare(self, record):
+        if record.exc_info:
+            # tracebacks can't cross the queue safely, so render them now
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _file_handler(log_file, max_bytes, backup_count, when):
+    if when:
+        return logging.handlers.TimedRotatingFileHandler(
+            log_file, when=when, backupCount=backup_count, encoding="utf-8"
+        )
+    return logging.handlers.RotatingFileHandler(
+        log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+
+
+def configure_logging(log_file, level=logging.INFO, console=False, fmt=None,
+                      max_bytes=None, backup_count=None, when=None):
+    """
+    Route all logging through a background QueueListener that writes to a
+    rotating file. Request threads only pay for putting a record on a queue.
+
+    Settings not passed explicitly come from the environment:
+    LOG_FORMAT ("text" or "json"), LOG_MAX_BYTES, LOG_BACKUP_COUNT and
+    LOG_ROTATE_WHEN (e.g. "midnight" for time-based rotation).
+    Only the first call in a process takes effect.
+    """
+    global _listener
+    if _listener is not None:
+        return logging.getLogger()
+
+    fmt = fmt or os.getenv("LOG_FORMAT", "text")
+    max_bytes = max_bytes if max_bytes is not None else int(os.getenv("LOG_MAX_BYTES", str(10 * 2 ** 20)))
+    backup_count = backup_count if backup_count is not None else int(os.getenv("LOG_BACKUP_COUNT", "5"))
+    when = when or os.getenv("LOG_ROTATE_WHEN")
+
+    formatter = JsonLineFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = []
+    try:
+        handlers.append(_file_handler(log_file, max_bytes, backup_count, when))
+    except OSError as e:
+        print(f"Warning: Could not setup file logging: {e}")
+        console = True
+    if console:
+        handlers.append(logging.StreamHandler())
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(DeferredQueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return root
+
+
+def shutdown_logging():
+    """Flush queued records and stop the background writer."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
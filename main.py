@@ -1,80 +1,127 @@
 import logging
 from getpass import getpass
-from banking_tools import (
-    create_account,
-    validate_login,
-    get_account_balance,
-    transfer_funds,
-    get_transaction_history,
-    get_loan_information,
-    get_investment_advice,
-    schedule_appointment,
-)
-
-# Configure logging
-logging.basicConfig(
-    filename="user_activity.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s"
-)
+from logging_setup import configure_logging
+from action_registry import ActionError
+from banking_actions import registry
+from banking_tools import get_transaction_page, format_transaction_page
+from statements import export_statement, open_statement
+
+# Configure logging (background writer, see logging_setup.py)
+configure_logging("user_activity.log")
 
 def display_header(title):
     print("\n" + "=" * 60)
     print(f"{title.center(60)}")
     print("=" * 60)
 
+# Post-login menu entries come straight from the action registry
+MENU_ACTIONS = [action for action in registry if action.menu_label]
+
+def show_transaction_history(account_number):
+    cursor = None
+    while True:
+        page = get_transaction_page(account_number, cursor=cursor)
+        print(f"\n{format_transaction_page(page)}")
+        cursor = page["next_cursor"]
+        if cursor is None or input("Show older transactions? (y/n): ").strip().lower() != 'y':
+            break
+
+def export_statement_to_file(account_number):
+    params = prompt_params(registry.get("export_statement"))
+    params["account_number"] = account_number
+    try:
+        _, params = registry.parse("export_statement", params)
+    except ActionError as e:
+        print(f"❌ {e}")
+        return
+    statement = open_statement(account_number, params.start_date, params.end_date)
+    if isinstance(statement, dict):
+        print(f"❌ {statement['message']}")
+        return
+    path = input(f"Save to (blank for {statement.filename(params.format)}): ").strip() or statement.filename(params.format)
+    try:
+        # written chunk by chunk, so even a very long history never sits in memory
+        with open(path, "wb") as f:
+            for part in export_statement(statement, params.format):
+                f.write(part)
+    except (OSError, ValueError) as e:
+        print(f"❌ Statement could not be written: {e}")
+        return
+    logging.info("%s exported a %s statement", account_number, params.format)
+    print(
+        f"\n📑 Statement saved to {path}\n"
+        f"Opening balance: ${statement.opening_cents / 100:.2f}\n"
+        f"Closing balance: ${statement.closing_cents / 100:.2f}\n"
+        f"Transactions: {statement.row_count}"
+    )
+
+# Actions whose CLI presentation differs from "prompt, run, print"
+CLI_HANDLERS = {
+    "transaction_history": show_transaction_history,
+    "export_statement": export_statement_to_file,
+}
+
+def prompt_params(action):
+    """Ask for every field the action's params model marks with a prompt."""
+    params = {}
+    for name, field in action.params_model.model_fields.items():
+        prompt = (field.json_schema_extra or {}).get("prompt")
+        if not prompt:
+            continue
+        value = input(f"{prompt}: ").strip()
+        if value or field.is_required():
+            params[name] = value
+    return params
+
+def format_response(response):
+    if not isinstance(response, dict):
+        return str(response)
+    if "error" in response:
+        return f"❌ {response['message']}"
+    lines = []
+    for key, value in response.items():
+        if isinstance(value, list):
+            lines.append(f"{key.replace('_', ' ').title()}:")
+            lines.extend(f"  {item}" for item in value)
+        else:
+            lines.append(f"{key.replace('_', ' ').title()}: {value}")
+    return "\n".join(lines)
+
 def main_menu(account_number):
+    logout_option = str(len(MENU_ACTIONS) + 1)
     while True:
         display_header("SecureBank International - Main Menu")
-        print("1. 📊 Check Account Balance")
-        print("2. 💸 Transfer Funds")
-        print("3. 🧾 View Transaction History")
-        print("4. 🏠 Loan Information")
-        print("5. 📈 Investment Advice")
-        print("6. 📅 Schedule Appointment")
-        print("7. 🔒 Logout")
-
-        choice = input("\nPlease select an option (1-7): ").strip()
-
-        if choice == '1':
-            response = get_account_balance(account_number)
-            logging.info(f"{account_number} viewed account balance")
-            print(f"\n✅ Account Balance Details:\n{response}")
-
-        elif choice == '2':
-            to_account = input("Enter the recipient's account number: ").strip()
-            try:
-                amount = float(input("Enter the amount to transfer: "))
-                logging.info(f"{account_number} attempted transfer of {amount} to {to_account}")
-                response = transfer_funds(account_number, to_account, amount)
-                print(f"\n✅ Transfer Status:\n{response}")
-            except ValueError:
-                logging.warning(f"{account_number} entered invalid amount for transfer")
-                print("❌ Invalid amount entered. Please enter a numeric value.")
-
-        elif choice == '3':
-            logging.info(f"{account_number} accessed transaction history")
-            print(f"\n📄 Transaction History:\n{get_transaction_history(account_number)}")
-
-        elif choice == '4':
-            logging.info(f"{account_number} requested loan information")
-            print(f"\n🏠 Loan Information:\n{get_loan_information()}")
-
-        elif choice == '5':
-            logging.info(f"{account_number} requested investment advice")
-            print(f"\n📈 Investment Advice:\n{get_investment_advice()}")
-
-        elif choice == '6':
-            logging.info(f"{account_number} scheduled an appointment")
-            print(f"\n📅 Appointment Scheduling:\n{schedule_appointment()}")
-
-        elif choice == '7':
-            logging.info(f"{account_number} logged out")
+        for number, action in enumerate(MENU_ACTIONS, 1):
+            print(f"{number}. {action.menu_label}")
+        print(f"{logout_option}. 🔒 Logout")
+
+        choice = input(f"\nPlease select an option (1-{logout_option}): ").strip()
+
+        if choice == logout_option:
+            logging.info("%s logged out", account_number)
             print("\n🔒 You have been successfully logged out. Thank you for banking with us.")
             break
 
-        else:
-            print("⚠️ Invalid selection. Please choose a valid option (1-7).")
+        if not choice.isdigit() or not 1 <= int(choice) <= len(MENU_ACTIONS):
+            print(f"⚠️ Invalid selection. Please choose a valid option (1-{logout_option}).")
+            continue
+
+        action = MENU_ACTIONS[int(choice) - 1]
+        logging.info("%s selected %s", account_number, action.name)
+        if action.name in CLI_HANDLERS:
+            CLI_HANDLERS[action.name](account_number)
+            continue
+
+        params = prompt_params(action)
+        if action.requires_account:
+            params["account_number"] = account_number
+        try:
+            response = registry.dispatch(action.name, params)
+        except ActionError as e:
+            logging.warning("%s sent invalid input for %s", account_number, action.name)
+            print(f"❌ {e}")
+            continue
+        print(f"\n{action.menu_label}:\n{format_response(response)}")
 
 def welcome():
     display_header("Welcome to SecureBank International")
@@ -88,20 +135,31 @@ def welcome():
         if option == '1':
             name = input("Enter your full name: ").strip()
             password = getpass("Create a secure password (input hidden): ")
-            result = create_account(name, password)
-            logging.info(f"New account registered for {name}")
+            try:
+                result = registry.dispatch("create_account", {"name": name, "password": password})
+            except ActionError as e:
+                print(f"❌ {e}")
+                continue
+            logging.info("New account registered for %s", name)
             print(f"\n✅ Registration Successful:\n{result}")
 
         elif option == '2':
             account_number = input("Enter your account number: ").strip()
             password = getpass("Enter your password (input hidden): ")
 
-            if validate_login(account_number, password):
-                logging.info(f"{account_number} logged in successfully")
+            try:
+                authenticated = registry.dispatch(
+                    "login", {"account_number": account_number, "password": password}
+                )
+            except ActionError:
+                authenticated = False
+
+            if authenticated:
+                logging.info("%s logged in successfully", account_number)
                 print(f"\n🔓 Login Successful. Welcome back, {account_number}!")
                 main_menu(account_number)
             else:
-                logging.warning(f"Failed login attempt for account {account_number}")
+                logging.warning("Failed login attempt for account %s", account_number)
                 print("❌ Invalid credentials. Please try again.")
 
         elif option == '3':
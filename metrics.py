@@ -0,0 +1,335 @@
+# metrics.py
+
+import asyncio
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Latency buckets in seconds, from tens of microseconds (tool calls) to
+# tens of seconds (model answers)
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+    0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(names, values, extra=""):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, help, labelnames):
+        self._registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _merged(self, others=()):
+        """label values -> value summed over every thread's shard (and other workers' `others`)."""
+        merged = {}
+        for shard in self._registry.shards():
+            for (metric, labels), value in list(shard.items()):
+                if metric is self:
+                    merged[labels] = self._add(merged.get(labels), value)
+        for labels, value in others:
+            labels = tuple(labels)
+            merged[labels] = self._add(merged.get(labels), value)
+        return merged
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        shard = self._registry.shard()
+        key = (self, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    @staticmethod
+    def _add(total, value):
+        return value if total is None else total + value
+
+    def render(self, others=()):
+        for labels, value in sorted(self._merged(others).items()):
+            yield f"{self.name}{_label_text(self.labelnames, labels)} {_number(value)}"
+
+
+class Gauge(Counter):
+    """A counter that also goes down; inc/dec may happen on different threads."""
+
+    kind = "gauge"
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, registry, name, help, labelnames, buckets=LATENCY_BUCKETS):
+        super().__init__(registry, name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        shard = self._registry.shard()
+        key = (self, labels)
+        series = shard.get(key)
+        if series is None:
+            # one count per bucket, then +Inf, then the sum
+            series = shard[key] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    @staticmethod
+    def _add(total, series):
+        return list(series) if total is None else [a + b for a, b in zip(total, series)]
+
+    def render(self, others=()):
+        bounds = [*self.buckets, float("inf")]
+        for labels, series in sorted(self._merged(others).items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                yield f"{self.name}_bucket{_label_text(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_label_text(self.labelnames, labels)} {_number(series[-1])}"
+            yield f"{self.name}_count{_label_text(self.labelnames, labels)} {cumulative}"
+
+
+class Metrics:
+    """
+    Process-wide metrics, rendered in the Prometheus text format.
+
+    Each thread records into its own shard (a plain dict reached through a
+    threading.local), so counting and observing never take a lock or
+    contend with other threads; shards are only summed when /metrics is
+    scraped. Values kept elsewhere (cache, model client, guardrail and
+    velocity stats) are read at scrape time by collectors instead of being
+    counted twice.
+
+    Under gunicorn, share() makes every worker publish its values to a
+    directory every few seconds, and a scrape of any worker adds up the
+    others' latest files with its own live values. Collectors still report
+    the worker that was scraped.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards = []
+        self._shards_lock = threading.Lock()  # only taken when a thread records for the first time
+        self._metrics = []
+        self._collectors = []
+        self._shared_dir = None
+
+    def shard(self):
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._shards_lock:
+                self._shards.append(values)
+            return values
+
+    def shards(self):
+        with self._shards_lock:
+            return list(self._shards)
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(self, name, help, labelnames))
+
+    def gauge(self, name, help, labelnames=()):
+        return self._add(Gauge(self, name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Histogram(self, name, help, labelnames, buckets))
+
+    def add_collector(self, collect):
+        """
+        Register `collect()`, called on every scrape; it returns
+        (name, kind, help, [(labels dict, value), ...]) tuples.
+        """
+        self._collectors.append(collect)
+
+    def share(self, directory, interval=5.0):
+        """Publish this process's values to `directory` every `interval` seconds and merge the other workers' in."""
+        os.makedirs(directory, exist_ok=True)
+        self._shared_dir = directory
+        self.publish()
+
+        def publish_forever():
+            while True:
+                time.sleep(interval)
+                self.publish()
+
+        threading.Thread(target=publish_forever, name="metrics-publisher", daemon=True).start()
+
+    def snapshot_path(self, pid=None):
+        return os.path.join(self._shared_dir, f"{pid or os.getpid()}.json")
+
+    def publish(self):
+        snapshot = {metric.name: [[labels, value] for labels, value in metric._merged().items()]
+                    for metric in self._metrics}
+        path = self.snapshot_path()
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+        os.replace(path + ".tmp", path)  # readers never see a half-written file
+
+    def _other_workers(self):
+        """metric name -> [(labels, value), ...] from every other worker's latest snapshot."""
+        others = {}
+        if self._shared_dir is None:
+            return others
+        own = os.path.basename(self.snapshot_path())
+        for name in os.listdir(self._shared_dir):
+            if name == own or not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self._shared_dir, name), encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue  # the worker exited while we listed the directory
+            for metric_name, samples in snapshot.items():
+                others.setdefault(metric_name, []).extend(samples)
+        return others
+
+    def render(self):
+        lines = []
+        others = self._other_workers()
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render(others.get(metric.name, ())))
+        for collect in self._collectors:
+            for name, kind, help, samples in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_label_text(labels, labels.values())} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+ACTION_SECONDS = metrics.histogram(
+    "securebank_action_duration_seconds", "Time to run a registry action (API, batch, CLI and agent tools).",
+    ("action",),
+)
+ACTION_ERRORS = metrics.counter(
+    "securebank_action_errors_total", "Registry actions that failed or returned an error.", ("action",),
+)
+TOOL_SECONDS = metrics.histogram(
+    "securebank_tool_duration_seconds", "Time spent in each banking_tools function.", ("tool",),
+)
+AGENT_TURN_SECONDS = metrics.histogram(
+    "securebank_agent_turn_duration_seconds", "Time for a chat answer, by agent and by what produced it.",
+    ("agent", "answered_by"),
+)
+AGENT_TOOL_SECONDS = metrics.histogram(
+    "securebank_agent_tool_duration_seconds", "Time for each tool call an agent makes.", ("tool",),
+)
+GUARDRAIL_SECONDS = metrics.histogram(
+    "securebank_guardrail_check_duration_seconds", "Time for one output guardrail scan.",
+)
+HTTP_IN_FLIGHT = metrics.gauge(
+    "securebank_http_requests_in_flight", "Requests being served, streams until their last byte.", ("app",),
+)
+HTTP_RESPONSES = metrics.counter(
+    "securebank_http_responses_total", "Responses by route and status code.", ("app", "route", "status"),
+)
+HTTP_SECONDS = metrics.histogram(
+    "securebank_http_request_duration_seconds", "Time from request to the last response byte.", ("app", "route"),
+)
+
+
+def record_action(name, elapsed, ok):
+    """ActionRegistry timing hook."""
+    ACTION_SECONDS.observe(elapsed, name)
+    if not ok:
+        ACTION_ERRORS.inc(name)
+
+
+def timed(histogram):
+    """Decorator observing each call's duration in `histogram`, labelled with the function name."""
+    def decorator(func):
+        name = func.__name__
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    histogram.observe(time.perf_counter() - started, name)
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started, name)
+        return wrapper
+    return decorator
+
+
+def stats_family(name, kind, help, label, values, keys=None):
+    """Collector family with one sample per entry of a stats() dict (or its `keys`), labelled `label`."""
+    keys = values.keys() if keys is None else [key for key in keys if key in values]
+    return name, kind, help, [({label: key}, values[key]) for key in keys]
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting in-flight requests and timing every response
+    by route template (so /transactions/stream, never per-account paths).
+    """
+
+    def __init__(self, app, app_name):
+        self.app = app
+        self.app_name = app_name
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_IN_FLIGHT.inc(self.app_name)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec(self.app_name)
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            HTTP_SECONDS.observe(time.perf_counter() - started, self.app_name, path)
+            HTTP_RESPONSES.inc(self.app_name, path, str(status[0]))
@@ -0,0 +1,219 @@
+# model_client.py
+
+import asyncio
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+
+import httpx
+
+GEMINI_BASE_URL = "https://generativelanguage.googleapis.com/v1beta/openai/"
+
+# Upstream answers worth retrying: rate limited or temporarily unavailable
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class ModelBusy(Exception):
+    """Raised when the queue for a model slot is full."""
+
+
+class ModelError(Exception):
+    """Raised when a model call still fails after all retries."""
+
+
+def _percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+class _GatewayTransport(httpx.AsyncBaseTransport):
+    """
+    Transport under ModelClient.http: every request sent through it, the
+    agents SDK's included, is retried and timed here. Latency is measured to
+    the response headers, so streamed answers count their time to first byte.
+    """
+
+    def __init__(self, client, limits):
+        self._client = client
+        self._transport = httpx.AsyncHTTPTransport(limits=limits)
+
+    async def handle_async_request(self, request):
+        client = self._client
+        for attempt in range(client.max_retries + 1):
+            last = attempt == client.max_retries
+            client.upstream_calls += 1
+            started = time.perf_counter()
+            retry_after = None
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TransportError:
+                if last:
+                    client.failures += 1
+                    raise
+            else:
+                client._upstream_latencies.append(time.perf_counter() - started)
+                if response.status_code < 400:
+                    return response
+                if last or response.status_code not in RETRY_STATUSES:
+                    client.failures += 1
+                    return response
+                retry_after = response.headers.get("retry-after")
+                await response.aclose()
+            client.retries += 1
+            await asyncio.sleep(client._backoff(attempt, retry_after))
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class ModelClient:
+    """
+    Process-wide gateway to the OpenAI-compatible model endpoint.
+
+    One pooled httpx.AsyncClient is shared by every model call, including the
+    agents SDK's (see BankingConfig.provider). At most `max_concurrency` calls
+    run at once; further callers queue for a slot, and once `max_queue` are
+    waiting new ones get ModelBusy instead of piling up. Failed requests
+    (connection errors, 429 and 5xx) are retried by the client's transport
+    with full-jitter exponential backoff, honouring Retry-After, while the
+    caller keeps its slot so a struggling upstream sees less traffic, not
+    more. Identical calls already in flight share one upstream request.
+    """
+
+    def __init__(self, base_url, max_concurrency=16, max_queue=256, max_retries=3,
+                 timeout=30.0, backoff_base=0.25, backoff_cap=8.0):
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.http = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=5.0),
+            transport=_GatewayTransport(self, httpx.Limits(
+                max_connections=max_concurrency * 2,
+                max_keepalive_connections=max_concurrency,
+                keepalive_expiry=60.0,
+            )),
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._pending_calls = {}
+        self._waiting = 0
+        self._active = 0
+        # recent samples for the latency percentiles
+        self._upstream_latencies = deque(maxlen=2048)
+        self._queue_waits = deque(maxlen=2048)
+        self.peak_queue_depth = 0
+        self.requests = 0
+        self.upstream_calls = 0
+        self.retries = 0
+        self.coalesced = 0
+        self.rejected = 0
+        self.failures = 0
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the `max_concurrency` model slots, queueing for it if need be."""
+        queued_at = time.perf_counter()
+        if self._semaphore.locked():
+            if self._waiting >= self.max_queue:
+                self.rejected += 1
+                raise ModelBusy("The assistant is busy, please try again shortly")
+            self._waiting += 1
+            self.peak_queue_depth = max(self.peak_queue_depth, self._waiting)
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self._queue_waits.append(time.perf_counter() - queued_at)
+        self._active += 1
+        try:
+            yield
+        finally:
+            self._active -= 1
+            self._semaphore.release()
+
+    async def coalesce(self, key, call):
+        """
+        Await `call()`, unless a call with the same key is already in flight,
+        in which case share its result. A caller that goes away does not
+        cancel the shared call for the others.
+        """
+        self.requests += 1
+        future = self._pending_calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+        else:
+            future = asyncio.ensure_future(call())
+            self._pending_calls[key] = future
+            future.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(future)
+
+    def _forget(self, key, future):
+        if self._pending_calls.get(key) is future:
+            del self._pending_calls[key]
+        if not future.cancelled():
+            future.exception()  # retrieved here so an unawaited failure isn't reported as lost
+
+    def _backoff(self, attempt, retry_after):
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        return delay
+
+    def stats(self):
+        upstream = list(self._upstream_latencies)
+        waits = list(self._queue_waits)
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._active,
+            "queue_depth": self._waiting,
+            "peak_queue_depth": self.peak_queue_depth,
+            "requests": self.requests,
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "retries": self.retries,
+            "rejected": self.rejected,
+            "failures": self.failures,
+            "upstream_latency_ms": {
+                name: round(_percentile(upstream, fraction) * 1000, 2)
+                for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+            },
+            "queue_wait_ms_p95": round(_percentile(waits, 0.95) * 1000, 2),
+        }
+
+    async def aclose(self):
+        await self.http.aclose()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_model_client():
+    """
+    The process-wide ModelClient, built on first use from MODEL_BASE_URL,
+    MODEL_MAX_CONCURRENCY, MODEL_MAX_QUEUE, MODEL_MAX_RETRIES and
+    MODEL_TIMEOUT. The API key goes with each request (see BankingConfig.provider).
+    """
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ModelClient(
+                os.getenv("MODEL_BASE_URL", GEMINI_BASE_URL),
+                max_concurrency=int(os.getenv("MODEL_MAX_CONCURRENCY", "16")),
+                max_queue=int(os.getenv("MODEL_MAX_QUEUE", "256")),
+                max_retries=int(os.getenv("MODEL_MAX_RETRIES", "3")),
+                timeout=float(os.getenv("MODEL_TIMEOUT", "30")),
+            )
+        return _client
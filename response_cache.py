@@ -0,0 +1,187 @@
+# response_cache.py
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Agents whose answers are general product information. Account and transfer
+# agents always work on a customer's own data, so they are never cached.
+CACHEABLE_AGENTS = frozenset({"loan", "investment"})
+
+# A message mentioning any of these is about a specific customer's money
+_ACCOUNT_DATA = re.compile(
+    r"\bSBI\d|\d{5,}|\bbalance|\btransaction|\btransfer|\bstatement|\bpassword|\blog ?in\b"
+    r"|\bmy (?:account|loan|card|appointment|payment|investment|portfolio)s?\b",
+    re.IGNORECASE,
+)
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+_DISK_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    cache_key  TEXT PRIMARY KEY,
+    agent_name TEXT NOT NULL,
+    response   TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+def normalize_message(message):
+    """Case-, punctuation- and whitespace-insensitive form of a question."""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", message.lower())).strip()
+
+
+def is_cacheable(agent_type, message):
+    return agent_type in CACHEABLE_AGENTS and not _ACCOUNT_DATA.search(message)
+
+
+class _DiskTier:
+    """SQLite table of cached responses that survives restarts."""
+
+    # expired rows are swept every this many writes
+    SWEEP_EVERY = 1000
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_DISK_SCHEMA)
+        self._writes = 0
+
+    def get(self, key, now):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT agent_name, response, expires_at FROM responses WHERE cache_key = ?", (key,)
+            ).fetchone()
+        if row is None or row[2] <= now:
+            return None
+        return row
+
+    def put(self, key, agent_name, response, expires_at):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (cache_key, agent_name, response, expires_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, agent_name, response, expires_at),
+            )
+            self._writes += 1
+            if self._writes % self.SWEEP_EVERY == 0:
+                self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),))
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of chatbot answers keyed on (agent type, normalized message).
+
+    Only general questions to the loan and investment agents are cached;
+    anything naming an account, balance, transaction or other customer data
+    bypasses the cache entirely. The in-memory tier is an OrderedDict kept in
+    least-recently-used order and capped at `max_entries`. With `disk_path`
+    set, answers are also written through to SQLite, and a memory miss that
+    hits disk is promoted back into memory, so a restart starts warm.
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=3600, disk_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (agent_name, response, expires_at), least recently used first
+        self._entries = OrderedDict()
+        self._disk = _DiskTier(disk_path) if disk_path else None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(agent_type, message):
+        return f"{agent_type}:{normalize_message(message)}"
+
+    def get(self, agent_type, message):
+        """Return (agent_name, response) for a cached answer, or None."""
+        if not is_cacheable(agent_type, message):
+            with self._lock:
+                self.bypasses += 1
+            return None
+        key = self.key(agent_type, message)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[2] > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0], entry[1]
+                del self._entries[key]
+        entry = self._disk.get(key, now) if self._disk else None
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, entry)
+        return entry[0], entry[1]
+
+    def put(self, agent_type, message, agent_name, response):
+        if not is_cacheable(agent_type, message):
+            return
+        key = self.key(agent_type, message)
+        entry = (agent_name, response, time.time() + self.ttl_seconds)
+        with self._lock:
+            self._store(key, entry)
+        if self._disk:
+            self._disk.put(key, *entry)
+
+    def _store(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._disk:
+            self._disk.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "disk_tier": self._disk is not None,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypasses": self.bypasses,
+                "evictions": self.evictions,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def create_response_cache():
+    """
+    Build the chatbot cache from CHAT_CACHE_SIZE, CHAT_CACHE_TTL and
+    CHAT_CACHE_DB (path of the optional on-disk tier; unset keeps it in memory).
+    """
+    return ResponseCache(
+        max_entries=int(os.getenv("CHAT_CACHE_SIZE", "10000")),
+        ttl_seconds=float(os.getenv("CHAT_CACHE_TTL", "3600")),
+        disk_path=os.getenv("CHAT_CACHE_DB") or None,
+    )
@@ -0,0 +1,157 @@
+# session_store.py
+
+import itertools
+import os
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from ledger_store import shared_state_enabled
+
+
+class _Shard:
+    __slots__ = ("lock", "entries")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # token -> (account_number, expires_at), least recently used first
+        self.entries = OrderedDict()
+
+
+class SessionStore:
+    """
+    Bounded in-memory session tokens with sliding TTL and LRU eviction.
+
+    Tokens are spread over independently locked shards. Every access moves a
+    session to the end of its shard and pushes its expiry forward, so each
+    shard stays ordered by expiry: expired sessions are always at the front
+    and are dropped in O(1) as new ones arrive. When a shard is full its least
+    recently used session is evicted, which caps memory at `max_sessions`.
+    """
+
+    def __init__(self, max_sessions=100000, ttl_seconds=1800, shards=16):
+        self.ttl_seconds = ttl_seconds
+        self.shard_capacity = max(1, max_sessions // shards)
+        self.max_sessions = self.shard_capacity * shards
+        self._shards = [_Shard() for _ in range(shards)]
+        self.evictions = 0
+
+    def _shard(self, token):
+        return self._shards[hash(token) % len(self._shards)]
+
+    def _purge_expired(self, shard, now):
+        entries = shard.entries
+        while entries:
+            token, (_, expires_at) = next(iter(entries.items()))
+            if expires_at > now:
+                return
+            del entries[token]
+
+    def create(self, account_number):
+        """Issue a new session token for an authenticated account."""
+        token = secrets.token_urlsafe(24)
+        now = time.monotonic()
+        shard = self._shard(token)
+        with shard.lock:
+            self._purge_expired(shard, now)
+            shard.entries[token] = (account_number, now + self.ttl_seconds)
+            while len(shard.entries) > self.shard_capacity:
+                shard.entries.popitem(last=False)
+                self.evictions += 1
+        return token
+
+    def resolve(self, token):
+        """Return the account number for a live token (refreshing its TTL), or None."""
+        if not token:
+            return None
+        now = time.monotonic()
+        shard = self._shard(token)
+        with shard.lock:
+            entry = shard.entries.get(token)
+            if entry is None:
+                return None
+            account_number, expires_at = entry
+            if expires_at <= now:
+                del shard.entries[token]
+                return None
+            shard.entries[token] = (account_number, now + self.ttl_seconds)
+            shard.entries.move_to_end(token)
+            return account_number
+
+    def revoke(self, token):
+        shard = self._shard(token)
+        with shard.lock:
+            return shard.entries.pop(token, None) is not None
+
+    def __len__(self):
+        return sum(len(shard.entries) for shard in self._shards)
+
+
+class SharedSessionStore:
+    """
+    Session tokens kept in the SQLite ledger, so a token issued by one
+    gunicorn worker is valid on every other one (and logging out anywhere
+    revokes it everywhere).
+
+    Resolving a token is one primary-key read on the worker's own
+    connection. The sliding expiry is only written back once it has moved
+    by `refresh_seconds`, so busy sessions don't turn every read into a
+    write. Expired sessions, and the oldest beyond `max_sessions`, are
+    purged every `purge_every` logins.
+    """
+
+    def __init__(self, store, max_sessions=100000, ttl_seconds=1800, refresh_seconds=60, purge_every=1000):
+        self.store = store
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.refresh_seconds = min(refresh_seconds, ttl_seconds / 2)
+        self.purge_every = purge_every
+        self._created = itertools.count(1)
+        self.evictions = 0
+
+    def create(self, account_number):
+        token = secrets.token_urlsafe(24)
+        now = time.time()  # wall clock: expiries are compared across processes
+        if next(self._created) % self.purge_every == 0:
+            self.evictions += self.store.purge_sessions(now, self.max_sessions)
+        self.store.add_session(token, account_number, now + self.ttl_seconds)
+        return token
+
+    def resolve(self, token):
+        if not token:
+            return None
+        row = self.store.get_session(token)
+        if row is None:
+            return None
+        account_number, expires_at = row
+        now = time.time()
+        if expires_at <= now:
+            self.store.delete_session(token)
+            return None
+        if now + self.ttl_seconds - expires_at >= self.refresh_seconds:
+            self.store.touch_session(token, now + self.ttl_seconds)
+        return account_number
+
+    def revoke(self, token):
+        return bool(token) and self.store.delete_session(token)
+
+    def __len__(self):
+        return self.store.count_sessions()
+
+
+def create_session_store():
+    """
+    Build the session store from SESSION_MAX and SESSION_TTL_SECONDS: in
+    memory, or in the shared ledger when BANK_SHARED_STATE=1 (several workers).
+    """
+    max_sessions = int(os.getenv("SESSION_MAX", "100000"))
+    ttl_seconds = int(os.getenv("SESSION_TTL_SECONDS", "1800"))
+    if shared_state_enabled():
+        from banking_tools import ledger
+        return SharedSessionStore(ledger, max_sessions=max_sessions, ttl_seconds=ttl_seconds)
+    return SessionStore(max_sessions=max_sessions, ttl_seconds=ttl_seconds)
+
+
+# Process-wide store: tokens issued by the API also authenticate chatbot requests
+sessions = create_session_store()
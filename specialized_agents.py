@@ -1,11 +1,16 @@
 # specialized_agents.py
 
+import logging
+
+from enhanced_guardrails import guardrails
+
+logger = logging.getLogger(__name__)
+
 # Safe imports with fallbacks
 try:
-    from agents import Agent
-    from config import BankingConfig
-    from enhanced_guardrails import enhanced_security_check, compliance_check
-    from banking_tools import ALL_BANKING_TOOLS
+    from agents import Agent, GuardrailFunctionOutput, output_guardrail
+    from config import get_config
+    from banking_actions import ALL_BANKING_TOOLS
     AGENTS_AVAILABLE = True
 except ImportError:
     AGENTS_AVAILABLE = False
@@ -20,13 +25,18 @@ except ImportError:
 
 def softened_guardrails(output):
     """Passive guardrails — logs issues but does not block output"""
-    try:
-        compliance_check(output)
-        enhanced_security_check(output)
-    except Exception as e:
-        print(f"⚠️ Guardrail warning (ignored): {e}")
+    result = guardrails.check(str(output))
+    if result.findings:
+        logger.warning("Guardrail findings (not blocked): %s", ", ".join(sorted(set(result.findings))))
     return output
 
+if AGENTS_AVAILABLE:
+    @output_guardrail
+    def passive_output_guardrail(context, agent, output):
+        # enforcement (masking, blocking) happens where answers leave the chatbot
+        softened_guardrails(output)
+        return GuardrailFunctionOutput(output_info=None, tripwire_triggered=False)
+
 def create_specialized_agents():
     """Create all specialized banking agents"""
     if not AGENTS_AVAILABLE:
@@ -38,7 +48,7 @@ def create_specialized_agents():
         }
 
     try:
-        config = BankingConfig()
+        config = get_config()
 
         def agent_template(name, role_instructions):
             return Agent(
@@ -46,7 +56,7 @@ def create_specialized_agents():
                 instructions=role_instructions,
                 model=config.model,
                 tools=ALL_BANKING_TOOLS,
-                output_guardrails=[softened_guardrails]  # soft guardrails only
+                output_guardrails=[passive_output_guardrail]  # soft guardrails only
             )
 
         return {
@@ -0,0 +1,220 @@
+# statements.py
+
+import csv
+import io
+import json
+import logging
+from datetime import datetime, timedelta
+
+from banking_tools import ledger
+from ledger_store import TX_SENT, TX_TYPE_NAMES
+
+# Parquet export (optional)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+STATEMENT_CHUNK_ROWS = 5000
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+CSV_COLUMNS = ("record", "id", "date", "type", "amount", "balance")
+
+
+def _dollars(cents):
+    return f"{cents / 100:.2f}"
+
+
+def _iso(timestamp):
+    return datetime.fromtimestamp(timestamp).isoformat(timespec="seconds")
+
+
+class Statement:
+    """
+    One account's statement for a range of local days, ready to stream.
+
+    The opening and closing balances and the newest transaction id come from
+    one consistent ledger read (see LedgerStore.get_statement_bounds); rows
+    are then fetched in chunks of STATEMENT_CHUNK_ROWS with a running
+    balance, so exporting any number of rows takes the same memory.
+    """
+
+    def __init__(self, account_number, start_date, end_date, first, after, bounds):
+        self.account_number = account_number
+        self.start_date = start_date
+        self.end_date = end_date
+        self._start = first.timestamp()
+        self._end = after.timestamp()
+        self.opening_cents, self.closing_cents, self._through_id = bounds
+        self.row_count = 0
+
+    def filename(self, fmt):
+        return f"statement-{self.account_number}-{self.start_date}-{self.end_date}.{fmt}"
+
+    def chunks(self):
+        """Yield lists of (id, type name, amount cents, timestamp, balance cents after it)."""
+        balance = self.opening_cents
+        for rows in ledger.iter_transactions_between(
+            self.account_number, self._start, self._end, self._through_id, STATEMENT_CHUNK_ROWS
+        ):
+            chunk = []
+            for tx_id, tx_type, amount_cents, timestamp in rows:
+                balance += -amount_cents if tx_type == TX_SENT else amount_cents
+                chunk.append((tx_id, TX_TYPE_NAMES[tx_type], amount_cents, timestamp, balance))
+            self.row_count += len(chunk)
+            yield chunk
+        if balance != self.closing_cents:
+            logging.warning(
+                "Statement for %s (%s to %s) does not reconcile: rows end at %d cents, closing balance is %d",
+                self.account_number, self.start_date, self.end_date, balance, self.closing_cents,
+            )
+
+    def summary(self):
+        return {
+            "account_number": self.account_number,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
+            "opening_balance": self.opening_cents / 100,
+            "closing_balance": self.closing_cents / 100,
+            "net_change": (self.closing_cents - self.opening_cents) / 100,
+        }
+
+
+def open_statement(account_number, start_date, end_date):
+    """Return a Statement for two YYYY-MM-DD dates (inclusive), or an error dict."""
+    try:
+        first = datetime.strptime(start_date, "%Y-%m-%d")
+        after = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)
+    except (TypeError, ValueError):
+        return {"error": "Invalid date format", "message": "Please use YYYY-MM-DD format for dates."}
+    if after <= first:
+        return {"error": "Invalid date range", "message": "The start date must not be after the end date."}
+    bounds = ledger.get_statement_bounds(account_number, first.strftime("%Y-%m-%d"), after.strftime("%Y-%m-%d"))
+    if bounds is None:
+        return {"error": "Account not found", "message": "Account not found."}
+    return Statement(account_number, start_date, end_date, first, after, bounds)
+
+
+def statement_summary(account_number, start_date, end_date, format="csv"):
+    """Opening and closing balances for a statement, and where to download it."""
+    if format == "parquet" and pa is None:
+        return {"error": "Format unavailable", "message": "Parquet export needs pyarrow installed."}
+    statement = open_statement(account_number, start_date, end_date)
+    if isinstance(statement, dict):
+        return statement
+    return {
+        **statement.summary(),
+        "download": f"/statements/export?start_date={start_date}&end_date={end_date}&format={format}",
+    }
+
+
+def _csv_lines(statement):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    writer.writerow(("opening", "", statement.start_date, "", "", _dollars(statement.opening_cents)))
+    yield buffer.getvalue()
+    for chunk in statement.chunks():
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(
+            ("transaction", tx_id, _iso(timestamp), type_name, _dollars(amount), _dollars(balance))
+            for tx_id, type_name, amount, timestamp, balance in chunk
+        )
+        yield buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    writer.writerow(("closing", "", statement.end_date, "", "", _dollars(statement.closing_cents)))
+    yield buffer.getvalue()
+
+
+def _jsonl_lines(statement):
+    yield json.dumps({"record": "opening", **statement.summary()}) + "\n"
+    for chunk in statement.chunks():
+        yield "".join(
+            json.dumps({
+                "record": "transaction", "id": tx_id, "date": _iso(timestamp), "type": type_name,
+                "amount": amount / 100, "balance": balance / 100,
+            }) + "\n"
+            for tx_id, type_name, amount, timestamp, balance in chunk
+        )
+    yield json.dumps({
+        "record": "closing", "balance": statement.closing_cents / 100, "transactions": statement.row_count,
+    }) + "\n"
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _parquet_parts(statement):
+    """One Parquet row group per chunk; balances travel in the file's key-value metadata."""
+    schema = pa.schema(
+        [
+            ("id", pa.int64()),
+            ("timestamp", pa.timestamp("s")),
+            ("type", pa.string()),
+            ("amount_cents", pa.int64()),
+            ("balance_cents", pa.int64()),
+        ],
+        metadata={key: str(value) for key, value in {
+            **statement.summary(),
+            "opening_balance_cents": statement.opening_cents,
+            "closing_balance_cents": statement.closing_cents,
+        }.items()},
+    )
+    sink = _DrainableSink()
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in statement.chunks():
+            columns = list(zip(*chunk))
+            writer.write_table(pa.table(
+                [
+                    pa.array(columns[0], pa.int64()),
+                    pa.array([int(timestamp) for timestamp in columns[3]], pa.timestamp("s")),
+                    pa.array(columns[1], pa.string()),
+                    pa.array(columns[2], pa.int64()),
+                    pa.array(columns[4], pa.int64()),
+                ],
+                schema=schema,
+            ))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export_statement(statement, fmt):
+    """Yield the statement in `fmt` ("csv", "jsonl" or "parquet") one chunk at a time, as bytes."""
+    if fmt == "parquet":
+        if pa is None:
+            raise ValueError("Parquet export needs pyarrow installed")
+        yield from _parquet_parts(statement)
+        return
+    lines = {"csv": _csv_lines, "jsonl": _jsonl_lines}[fmt]
+    for text in lines(statement):
+        yield text.encode("utf-8")
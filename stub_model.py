@@ -0,0 +1,77 @@
+# stub_model.py
+
+import argparse
+import asyncio
+import os
+import random
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Per-token delay of the stub model, to mimic real generation speed
+STUB_TOKEN_DELAY = float(os.getenv("STUB_MODEL_TOKEN_MS", "0")) / 1000
+
+
+def stub_answer(message):
+    return f"Thank you for your query: '{message}'. We are processing it."
+
+
+async def stream_stub_answer(message, token_delay=None):
+    """Yield the canned answer word by word, sleeping `token_delay` seconds per word."""
+    delay = STUB_TOKEN_DELAY if token_delay is None else token_delay
+    words = stub_answer(message).split(" ")
+    for i, word in enumerate(words):
+        if delay:
+            await asyncio.sleep(delay)
+        yield word if i == len(words) - 1 else word + " "
+
+
+# Local OpenAI-compatible stub server, for exercising ModelClient without the
+# real upstream:  python -m stub_model --port 8900 --latency-ms 200 --failure-rate 0.1
+
+stub_app = FastAPI(title="Stub model")
+stub_settings = {"latency": 0.05, "failure_rate": 0.0}
+stub_stats = {"requests": 0, "failures": 0, "in_flight": 0, "peak_in_flight": 0}
+
+
+@stub_app.post("/v1/chat/completions")
+async def stub_completion(request: Request):
+    body = await request.json()
+    stub_stats["requests"] += 1
+    stub_stats["in_flight"] += 1
+    stub_stats["peak_in_flight"] = max(stub_stats["peak_in_flight"], stub_stats["in_flight"])
+    try:
+        await asyncio.sleep(stub_settings["latency"])
+        if random.random() < stub_settings["failure_rate"]:
+            stub_stats["failures"] += 1
+            return JSONResponse({"error": {"message": "rate limited"}}, status_code=429, headers={"Retry-After": "0"})
+        message = body["messages"][-1]["content"]
+        return {
+            "object": "chat.completion",
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": stub_answer(message)}}],
+        }
+    finally:
+        stub_stats["in_flight"] -= 1
+
+
+@stub_app.get("/stats")
+def get_stub_stats():
+    return stub_stats
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub model server")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    stub_settings.update(latency=args.latency_ms / 1000, failure_rate=args.failure_rate)
+    uvicorn.run(stub_app, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
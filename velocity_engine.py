@@ -0,0 +1,459 @@
+# velocity_engine.py
+
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict, deque
+from typing import NamedTuple
+
+from ledger_store import TRANSFER_OK, shared_state_enabled
+
+logger = logging.getLogger(__name__)
+
+ALLOW = "allow"
+HOLD = "hold"
+DENY = "deny"
+
+
+class WindowLimit(NamedTuple):
+    name: str
+    seconds: int
+    buckets: int  # the window slides one bucket (seconds / buckets) at a time
+    hold_count: int
+    deny_count: int
+    hold_cents: int
+    deny_cents: int
+
+
+class FanoutLimit(NamedTuple):
+    seconds: int
+    hold_recipients: int
+    deny_recipients: int
+
+
+class Decision(NamedTuple):
+    action: str  # ALLOW, HOLD or DENY
+    reason: str = ""
+
+
+DEFAULT_WINDOWS = (
+    WindowLimit("1m", 60, 6, hold_count=5, deny_count=10, hold_cents=500000, deny_cents=2000000),
+    WindowLimit("1h", 3600, 6, hold_count=20, deny_count=40, hold_cents=2000000, deny_cents=5000000),
+    WindowLimit("1d", 86400, 12, hold_count=50, deny_count=100, hold_cents=5000000, deny_cents=10000000),
+)
+DEFAULT_FANOUT = FanoutLimit(3600, hold_recipients=10, deny_recipients=25)
+# Payroll and settlement senders pay thousands of people in one /batch
+BULK_WINDOWS = (
+    WindowLimit("1m", 60, 6, hold_count=10000, deny_count=20000, hold_cents=500000000, deny_cents=1000000000),
+    WindowLimit("1h", 3600, 6, hold_count=100000, deny_count=200000,
+                hold_cents=2000000000, deny_cents=5000000000),
+    WindowLimit("1d", 86400, 12, hold_count=500000, deny_count=1000000,
+                hold_cents=5000000000, deny_cents=10000000000),
+)
+BULK_FANOUT = FanoutLimit(3600, hold_recipients=20000, deny_recipients=50000)
+# SharedVelocityEngine counts distinct recipients in this many buckets of the fan-out window
+FANOUT_BUCKETS = 6
+ALLOWED = Decision(ALLOW)
+
+
+class _AccountState:
+    """Bucketed counts and sums for every window of one sender, plus recent recipients."""
+
+    __slots__ = ("epochs", "counts", "sums", "totals", "recipients")
+
+    def __init__(self, windows):
+        self.epochs = [0] * len(windows)       # bucket number each window last advanced to
+        size = sum(window.buckets for window in windows)
+        self.counts = [0] * size
+        self.sums = [0] * size
+        self.totals = [0] * (2 * len(windows))  # count, sum per window
+        self.recipients = OrderedDict()         # recipient -> last transfer time, oldest first
+
+
+class _Stripe:
+    __slots__ = ("lock", "accounts")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.accounts = OrderedDict()  # least recently active sender first
+
+
+class VelocityEngine:
+    """
+    Per-sender sliding-window velocity limits on transfers.
+
+    Each window (1 minute, 1 hour, 1 day by default) is a ring of buckets
+    holding the count and cents sent in that slice of time, with running
+    totals, so checking or recording a transfer touches a fixed number of
+    slots however busy the account is. Distinct recipients within the fan-out
+    window are tracked in a small insertion-ordered map capped just above the
+    deny threshold.
+
+    Going over a hold threshold holds the transfer for review (it is not
+    executed, but counts toward the windows); going over a deny threshold
+    refuses it. Senders in `bulk_senders` (payroll and settlement accounts)
+    are screened by the `bulk` engine and its much higher limits instead.
+    Senders live in lock-striped LRU maps capped at `max_accounts` in total,
+    so memory stays bounded however many accounts exist; the least recently
+    active sender is dropped first.
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS, fanout=DEFAULT_FANOUT, max_accounts=100000,
+                 lock_stripes=64, max_holds=10000, bulk=None, bulk_senders=()):
+        self.bulk = bulk
+        self.bulk_senders = set(bulk_senders)
+        self.windows = tuple(windows)
+        self.fanout = fanout
+        self._offsets = []
+        offset = 0
+        for window in self.windows:
+            self._offsets.append(offset)
+            offset += window.buckets
+        self._widths = [window.seconds / window.buckets for window in self.windows]
+        self._stripes = [_Stripe() for _ in range(lock_stripes)]
+        self.stripe_capacity = max(1, max_accounts // lock_stripes)
+        self.max_accounts = self.stripe_capacity * lock_stripes
+        # held transfers awaiting review, newest last
+        self.holds = deque(maxlen=max_holds)
+        self.evictions = 0
+        self.decisions = {ALLOW: 0, HOLD: 0, DENY: 0}
+
+    def add_bulk_sender(self, account_number):
+        """Screen `account_number` with the bulk policy from now on."""
+        self.bulk_senders.add(account_number)
+
+    def _engine(self, account_number):
+        if self.bulk is not None and account_number in self.bulk_senders:
+            return self.bulk
+        return self
+
+    def _state(self, stripe, account_number, create):
+        accounts = stripe.accounts
+        state = accounts.get(account_number)
+        if state is not None:
+            accounts.move_to_end(account_number)
+        elif create:
+            state = accounts[account_number] = _AccountState(self.windows)
+            if len(accounts) > self.stripe_capacity:
+                accounts.popitem(last=False)
+                self.evictions += 1
+        return state
+
+    def _advance(self, state, now):
+        """Slide every window up to `now`, emptying buckets that fell out of it."""
+        for i, window in enumerate(self.windows):
+            epoch = int(now // self._widths[i])
+            stale = epoch - state.epochs[i]
+            if stale <= 0:
+                continue
+            base = self._offsets[i]
+            totals = state.totals
+            for step in range(1, min(stale, window.buckets) + 1):
+                slot = base + (state.epochs[i] + step) % window.buckets
+                totals[2 * i] -= state.counts[slot]
+                totals[2 * i + 1] -= state.sums[slot]
+                state.counts[slot] = 0
+                state.sums[slot] = 0
+            state.epochs[i] = epoch
+
+    def _decide(self, state, to_acc, amount_cents, now):
+        recipients = state.recipients
+        distinct = None
+        if to_acc not in recipients:
+            cutoff = now - self.fanout.seconds
+            while recipients and next(iter(recipients.values())) <= cutoff:
+                recipients.popitem(last=False)
+            distinct = len(recipients) + 1
+        return self._verdict(state.totals, amount_cents, distinct)
+
+    def _verdict(self, totals, amount_cents, distinct):
+        """
+        Decide from the per-window (count, cents) `totals` before this
+        transfer and `distinct`, the number of recipients in the fan-out
+        window counting this one, or None if it has been paid there already.
+        """
+        hold = None
+        for i, window in enumerate(self.windows):
+            count = totals[2 * i] + 1
+            cents = totals[2 * i + 1] + amount_cents
+            if count > window.deny_count:
+                return Decision(DENY, f"more than {window.deny_count} transfers in {window.name}")
+            if cents > window.deny_cents:
+                return Decision(DENY, f"more than ${window.deny_cents / 100:,.2f} sent in {window.name}")
+            if hold is None:
+                if count > window.hold_count:
+                    hold = f"more than {window.hold_count} transfers in {window.name}"
+                elif cents > window.hold_cents:
+                    hold = f"more than ${window.hold_cents / 100:,.2f} sent in {window.name}"
+        if distinct is not None:
+            if distinct > self.fanout.deny_recipients:
+                return Decision(DENY, f"transfers to more than {self.fanout.deny_recipients} recipients")
+            if hold is None and distinct > self.fanout.hold_recipients:
+                hold = f"transfers to more than {self.fanout.hold_recipients} recipients"
+        return ALLOWED if hold is None else Decision(HOLD, hold)
+
+    def _record(self, state, to_acc, amount_cents, now):
+        """Count a transfer; returns (bucket epochs, recipient was new) for _unrecord."""
+        totals = state.totals
+        for i, window in enumerate(self.windows):
+            slot = self._offsets[i] + state.epochs[i] % window.buckets
+            state.counts[slot] += 1
+            state.sums[slot] += amount_cents
+            totals[2 * i] += 1
+            totals[2 * i + 1] += amount_cents
+        recipients = state.recipients
+        new_recipient = recipients.pop(to_acc, None) is None
+        recipients[to_acc] = now
+        if len(recipients) > self.fanout.deny_recipients + 1:
+            recipients.popitem(last=False)
+        return list(state.epochs), new_recipient
+
+    def _unrecord(self, state, to_acc, amount_cents, recorded):
+        """Take back a _record whose transfer the ledger refused, from buckets still in their window."""
+        epochs, new_recipient = recorded
+        totals = state.totals
+        for i, window in enumerate(self.windows):
+            if state.epochs[i] - epochs[i] >= window.buckets:
+                continue  # that bucket has slid out of the window and been emptied
+            slot = self._offsets[i] + epochs[i] % window.buckets
+            state.counts[slot] -= 1
+            state.sums[slot] -= amount_cents
+            totals[2 * i] -= 1
+            totals[2 * i + 1] -= amount_cents
+        if new_recipient:
+            state.recipients.pop(to_acc, None)
+
+    def check(self, from_acc, to_acc, amount_cents, now):
+        """Decide on a transfer without recording it."""
+        engine = self._engine(from_acc)
+        if engine is not self:
+            return engine.check(from_acc, to_acc, amount_cents, now)
+        stripe = self._stripes[hash(from_acc) % len(self._stripes)]
+        with stripe.lock:
+            state = self._state(stripe, from_acc, create=False)
+            if state is None:
+                state = _AccountState(self.windows)
+            self._advance(state, now)
+            return self._decide(state, to_acc, amount_cents, now)
+
+    def screen(self, from_acc, to_acc, amount_cents, now, execute):
+        """
+        Check a transfer and, if it is allowed, run `execute()` (the ledger
+        transfer). Returns (decision, status or None).
+
+        The sender's stripe is only locked while deciding and recording,
+        never around `execute()`: a /batch holding the ledger lock screens
+        its own transfers on another thread, so waiting for the ledger here
+        would deadlock against it. An allowed transfer is counted before it
+        runs, so parallel requests can't slip past a limit together, and is
+        taken back out if the ledger refuses it.
+        """
+        engine = self._engine(from_acc)
+        if engine is not self:
+            return engine.screen(from_acc, to_acc, amount_cents, now, execute)
+        stripe = self._stripes[hash(from_acc) % len(self._stripes)]
+        with stripe.lock:
+            state = self._state(stripe, from_acc, create=True)
+            self._advance(state, now)
+            decision = self._decide(state, to_acc, amount_cents, now)
+            self.decisions[decision.action] += 1
+            if decision.action != DENY:
+                # held attempts still count, so a sender who keeps retrying gets denied
+                recorded = self._record(state, to_acc, amount_cents, now)
+            if decision.action == HOLD:
+                self.holds.append((now, from_acc, to_acc, amount_cents, decision.reason))
+        if decision.action != ALLOW:
+            logger.warning("Transfer %s by velocity check: %s", decision.action, decision.reason)
+            return decision, None
+        status = execute()
+        if status != TRANSFER_OK:
+            with stripe.lock:
+                self._unrecord(state, to_acc, amount_cents, recorded)
+        return decision, status
+
+    def __len__(self):
+        return sum(len(stripe.accounts) for stripe in self._stripes)
+
+    def _tracked(self):
+        return len(self) + (len(self.bulk) if self.bulk is not None else 0)
+
+    def stats(self):
+        stats = {
+            "tracked_accounts": self._tracked(),
+            "max_accounts": self.max_accounts,
+            "evictions": self.evictions,
+            "decisions": dict(self.decisions),
+            "pending_holds": len(self.holds),
+            "bulk_senders": len(self.bulk_senders),
+        }
+        if self.bulk is not None:
+            bulk = self.bulk.stats()
+            stats["evictions"] += bulk["evictions"]
+            stats["pending_holds"] += bulk["pending_holds"]
+            for action, count in bulk["decisions"].items():
+                stats["decisions"][action] += count
+        return stats
+
+
+class SharedVelocityEngine(VelocityEngine):
+    """
+    VelocityEngine whose per-sender windows live in the SQLite ledger, so
+    the limits hold across every gunicorn worker rather than per worker.
+
+    Screening runs inside the ledger's write transaction: the sender's
+    state is read, decided on and written back in the same commit as the
+    transfer, so two workers can't both let the same sender past a limit.
+
+    The state is kept as rows, so a screen touches a fixed number of them
+    however many recipients a sender pays: one row per window bucket, and
+    one per recipient holding the fan-out bucket it was last paid in. The
+    distinct recipients are counted by bucket like the windows (each
+    recipient in the bucket of its latest transfer), so fan-out is exact to
+    one bucket's width rather than to the second. Rows idle for longer than
+    the longest window are purged every `purge_every` screens. Held
+    transfers and decision counts stay per worker.
+    """
+
+    def __init__(self, store, windows=DEFAULT_WINDOWS, fanout=DEFAULT_FANOUT, purge_every=1000, max_holds=10000,
+                 bulk=None, bulk_senders=()):
+        super().__init__(windows, fanout, lock_stripes=1, max_holds=max_holds, bulk=bulk, bulk_senders=bulk_senders)
+        self.store = store
+        self.purge_every = purge_every
+        self.horizon = max([window.seconds for window in self.windows] + [fanout.seconds])
+        self._screens = 0
+        # bucket rows are keyed by the window's shape, so a policy change never misreads old epochs
+        self._keys = [f"{i}:{window.seconds}/{window.buckets}" for i, window in enumerate(self.windows)]
+        self._fanout_key = f"fanout:{fanout.seconds}/{FANOUT_BUCKETS}"
+        self._fanout_width = fanout.seconds / FANOUT_BUCKETS
+
+    def _read(self, from_acc, to_acc, now):
+        """
+        Return (window epochs, fan-out epoch, the recipient's fan-out epoch if
+        it is still inside the window, totals, distinct) for _verdict/_write.
+        """
+        epochs = [int(now // width) for width in self._widths]
+        fanout_epoch = int(now // self._fanout_width)
+        oldest_fanout = fanout_epoch - FANOUT_BUCKETS + 1
+        seen = self.store.get_velocity_recipient(from_acc, to_acc)
+        if seen is not None and seen < oldest_fanout:
+            seen = None
+        ranges = [(key, epoch - window.buckets + 1) for key, epoch, window in zip(self._keys, epochs, self.windows)]
+        if seen is None:
+            ranges.append((self._fanout_key, oldest_fanout))
+        sums = self.store.velocity_totals(from_acc, ranges)
+        totals = [value for count, cents in sums[:len(self.windows)] for value in (count, cents)]
+        distinct = sums[-1][0] + 1 if seen is None else None
+        return epochs, fanout_epoch, seen, totals, distinct
+
+    def _write(self, from_acc, to_acc, amount_cents, now, epochs, fanout_epoch, seen):
+        changes = [(key, epoch, 1, amount_cents) for key, epoch in zip(self._keys, epochs)]
+        if seen != fanout_epoch:
+            # the recipient moves to the current bucket, counted once
+            if seen is not None:
+                changes.append((self._fanout_key, seen, -1, 0))
+            changes.append((self._fanout_key, fanout_epoch, 1, 0))
+            self.store.put_velocity_recipient(from_acc, to_acc, fanout_epoch, now)
+        self.store.add_velocity(from_acc, changes, now)
+
+    def check(self, from_acc, to_acc, amount_cents, now):
+        engine = self._engine(from_acc)
+        if engine is not self:
+            return engine.check(from_acc, to_acc, amount_cents, now)
+        _, _, _, totals, distinct = self._read(from_acc, to_acc, now)
+        return self._verdict(totals, amount_cents, distinct)
+
+    def screen(self, from_acc, to_acc, amount_cents, now, execute):
+        # the ledger's write transaction is the only lock taken (a /batch on this
+        # thread has already opened it), so nothing here can wait on it out of order
+        engine = self._engine(from_acc)
+        if engine is not self:
+            return engine.screen(from_acc, to_acc, amount_cents, now, execute)
+        with self.store.batch():
+            self._screens += 1
+            if self._screens % self.purge_every == 0:
+                self.store.purge_velocity_state(now - self.horizon)
+            epochs, fanout_epoch, seen, totals, distinct = self._read(from_acc, to_acc, now)
+            decision = self._verdict(totals, amount_cents, distinct)
+            self.decisions[decision.action] += 1
+            status = None
+            if decision.action == ALLOW:
+                status = execute()
+            if decision.action == HOLD or status == TRANSFER_OK:
+                self._write(from_acc, to_acc, amount_cents, now, epochs, fanout_epoch, seen)
+            if decision.action == HOLD:
+                self.holds.append((now, from_acc, to_acc, amount_cents, decision.reason))
+        if decision.action != ALLOW:
+            logger.warning("Transfer %s by velocity check: %s", decision.action, decision.reason)
+        return decision, status
+
+    def __len__(self):
+        return self.store.count_velocity_state()
+
+    def _tracked(self):
+        return len(self)  # one table holds both policies' senders
+
+
+class _DisabledVelocityEngine:
+    """Stand-in used when VELOCITY_ENABLED=0: every transfer is allowed."""
+
+    holds = ()
+
+    def check(self, from_acc, to_acc, amount_cents, now):
+        return ALLOWED
+
+    def screen(self, from_acc, to_acc, amount_cents, now, execute):
+        return ALLOWED, execute()
+
+    def add_bulk_sender(self, account_number):
+        pass
+
+    def stats(self):
+        return {"enabled": False}
+
+
+def load_limits(path):
+    """Read window and fan-out limits from a JSON file (see DEFAULT_WINDOWS for the fields)."""
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+    windows = tuple(WindowLimit(**window) for window in config.get("windows", []))
+    fanout = FanoutLimit(**config["fanout"]) if "fanout" in config else DEFAULT_FANOUT
+    return windows or DEFAULT_WINDOWS, fanout
+
+
+def load_bulk_policy(path):
+    """
+    Read the optional "bulk" section of a limits file: {"senders": [...],
+    "windows": [...], "fanout": {...}}. Returns (windows, fanout, senders).
+    """
+    with open(path, encoding="utf-8") as f:
+        bulk = json.load(f).get("bulk", {})
+    windows = tuple(WindowLimit(**window) for window in bulk.get("windows", []))
+    fanout = FanoutLimit(**bulk["fanout"]) if "fanout" in bulk else BULK_FANOUT
+    return windows or BULK_WINDOWS, fanout, bulk.get("senders", [])
+
+
+def create_velocity_engine(store=None):
+    """
+    Build the transfer velocity engine. VELOCITY_ENABLED=0 turns it off,
+    VELOCITY_LIMITS_FILE points at JSON limits and VELOCITY_MAX_ACCOUNTS caps
+    how many senders are tracked. Payroll and settlement accounts listed in
+    VELOCITY_BULK_SENDERS (comma-separated) or the file's "bulk" section get
+    the bulk limits. With BANK_SHARED_STATE=1 the windows are kept in the
+    ledger `store`, shared by every worker.
+    """
+    if os.getenv("VELOCITY_ENABLED", "1") == "0":
+        return _DisabledVelocityEngine()
+    windows, fanout = DEFAULT_WINDOWS, DEFAULT_FANOUT
+    bulk_windows, bulk_fanout, bulk_senders = BULK_WINDOWS, BULK_FANOUT, []
+    path = os.getenv("VELOCITY_LIMITS_FILE")
+    if path:
+        windows, fanout = load_limits(path)
+        bulk_windows, bulk_fanout, bulk_senders = load_bulk_policy(path)
+    bulk_senders = [*bulk_senders, *(acc.strip() for acc in os.getenv("VELOCITY_BULK_SENDERS", "").split(",") if acc.strip())]
+    if store is not None and shared_state_enabled():
+        bulk = SharedVelocityEngine(store, bulk_windows, bulk_fanout)
+        return SharedVelocityEngine(store, windows, fanout, bulk=bulk, bulk_senders=bulk_senders)
+    max_accounts = int(os.getenv("VELOCITY_MAX_ACCOUNTS", "100000"))
+    bulk = VelocityEngine(bulk_windows, bulk_fanout, max_accounts=max_accounts)
+    return VelocityEngine(windows, fanout, max_accounts=max_accounts, bulk=bulk, bulk_senders=bulk_senders)